@@ -60,6 +60,11 @@ setup(
         ],
         'full': [
             'numpy>=1.20.0',
+            'asyncssh>=2.13.0',  # 可选：集群节点检查的异步后端
+            'orjson>=3.6.0',  # 可选：集群状态缓存的快速 JSON 序列化
+            'watchdog>=2.1.0',  # 可选：集群 run 输出文件校验的事件驱动等待
+            'isal>=1.0.0',  # 可选：count 解析 .gz 输入时的 ISA-L 加速解压
+            'pyarrow>=10.0.0',  # 可选：count 并行时以 Arrow IPC 格式共享注释表
             # 'pysam>=0.16.0',
         ]
     }
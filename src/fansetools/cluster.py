@@ -1,9 +1,11 @@
 import json
 import os
+import stat
+import sys
 import argparse
 from .utils.rich_help import CustomHelpFormatter, add_rich_epilog
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 import warnings
 try:
     from cryptography.utils import CryptographyDeprecationWarning
@@ -11,26 +13,441 @@ try:
 except ImportError:
     pass
 import paramiko
+import collections
+import contextlib
+import io
 import base64  # 新增：用于 PowerShell 脚本编码
 import gzip
 import shutil
 import tempfile
 import subprocess
+import functools
+import hashlib
 from dataclasses import dataclass
 
 # 修正：Windows下支持ESC键检测用于中断watch
 try:
     import msvcrt  # Windows 控制台按键检测
+    import ctypes
     _HAS_MSVCRT = True
 except Exception:
     _HAS_MSVCRT = False
+# 修正：进度条依赖在模块级可选导入，不可用时回退为简单计数
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+# 修正：可选 orjson（C 实现），状态缓存序列化/解析优先使用，未安装时回退标准库 json
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+# 修正：可选 asyncssh 后端，安装后节点检查改为单线程事件循环并发
+import asyncio
+try:
+    import asyncssh
+    _HAS_ASYNCSSH = True
+except ImportError:
+    _HAS_ASYNCSSH = False
+# 修正：可选 watchdog，输出文件校验改为目录变更事件唤醒（inotify / ReadDirectoryChangesW）
+try:
+    from watchdog.observers import Observer as _WatchdogObserver
+    from watchdog.events import FileSystemEventHandler as _WatchdogHandler
+    _HAS_WATCHDOG = True
+except ImportError:
+    _HAS_WATCHDOG = False
 import socket
 import time
+import queue
+import random
 import re
-import queue  # 新增：用于动态任务队列
-from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import shlex
+import atexit
+import select
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .utils.path_utils import PathProcessor
 
+# 修正：/proc/net/dev 与 wmic 网络计数解析使用预编译正则，一次 findall 完成整段文本解析
+# 修正：正则内以 (?!lo) 直接排除回环接口，省去逐接口的 startswith 判断
+_NETDEV_RE = re.compile(r'^\s*(?!lo)([^\s:]+):\s*(\d+)(?:\s+\d+){7}\s+(\d+)', re.M)
+_PAT_BRX = re.compile(r'BytesReceivedPersec=(\d+)')
+_PAT_BTX = re.compile(r'BytesSentPersec=(\d+)')
+# 修正：合并输出的探测命令（如两次网络采样）使用的分隔标记
+_PROBE_SPLIT = '__FANSE_PROBE_SPLIT__'
+# 修正：节点探测输出解析用到的正则统一在模块级预编译
+_PAT_NAME = re.compile(r'Name=(.+)')
+_PAT_FREQ = re.compile(r'CurrentClockSpeed=(\d+)')
+_PAT_TOTAL = re.compile(r'TotalVisibleMemorySize=(\d+)')
+_PAT_FREE = re.compile(r'FreePhysicalMemory=(\d+)')
+_PAT_CORES = re.compile(r'NumberOfCores=(\d+)')
+_PAT_LOAD = re.compile(r'LoadPercentage=(\d+)')
+_PAT_VERSION = re.compile(r'\d+\.\d+\.\d+')
+_PAT_IPV4 = re.compile(r'^\d+\.\d+\.\d+\.\d+$')
+_PAT_NSLOOKUP_ADDR = re.compile(r'Address:\s*([0-9]{1,3}(?:\.[0-9]{1,3}){3})')
+
+# 修正：节点探测的固定命令表在模块级构建一次，_build_probe_commands 仅补充节点相关的路径检测
+_WIN_NET_CMD = 'wmic path Win32_PerfFormattedData_Tcpip_NetworkInterface get BytesReceivedPersec,BytesSentPersec /value'
+_WIN_PROBE_COMMANDS = {
+    'cpu_cores': 'wmic cpu get NumberOfCores /value',
+    'cpu_usage': 'wmic cpu get loadpercentage /value',
+    'cpu_info': 'wmic cpu get Name,CurrentClockSpeed /value',
+    'memory': 'wmic OS get TotalVisibleMemorySize,FreePhysicalMemory /value',
+    'disk': 'wmic logicaldisk get size,freespace,caption | findstr "^C:"',
+    # conda 为批处理脚本，使用 call 保证返回后继续执行后续探测
+    'conda': 'call conda --version',
+    'fansetools': 'call fanse --version',
+}
+_WIN_DETAIL_COMMANDS = {
+    # 两次采样间隔约1秒（ping 本机作为 cmd 下的 sleep）
+    'net': f'{_WIN_NET_CMD} & ping -n 2 127.0.0.1 >nul & echo {_PROBE_SPLIT} & {_WIN_NET_CMD}',
+}
+_WIN_EXIST_FMT = 'if exist "{}" echo EXISTS'
+_LINUX_PROBE_COMMANDS = {
+    'cpu_cores': 'nproc',
+    'cpu_usage': "top -bn1 | grep 'Cpu(s)' | awk '{print $2}' | cut -d'%' -f1",
+    'cpu_model': "lscpu | sed -n 's/Model name:\\s*//p'",
+    'cpu_model_fallback': "awk -F: '/model name/ {print $2; exit}' /proc/cpuinfo",
+    'cpu_freq': "awk -F: '/cpu MHz/ {sum+=$2; cnt++} END {if(cnt>0) printf \"%.0f\", sum/cnt}' /proc/cpuinfo",
+    # 修正：显示已用/总量（GB）和百分比
+    'memory': "free -b | awk '/Mem:/ {printf \"%.1f/%.1f GB, %.1f%%\", $3/1e9, $2/1e9, ($3/$2)*100}'",
+    'disk': "df -B1 / | tail -1 | awk '{printf \"%.1f/%.1f GB, %s\", $3/1e9, $2/1e9, $5}'",
+    'conda': 'bash -c "source ~/.bashrc && conda --version"',
+    'conda_direct': 'conda --version',
+    'fansetools': 'fanse --version',
+}
+_LINUX_DETAIL_COMMANDS = {
+    'load_avg': "cat /proc/loadavg | awk '{printf \"%s,%s,%s\", $1,$2,$3}'",
+    'kernel': 'uname -r',
+    # Linux 网络带宽，采样两次 /proc/net/dev
+    'net': f'cat /proc/net/dev; sleep 1; echo {_PROBE_SPLIT}; cat /proc/net/dev',
+}
+_LINUX_EXIST_FMT = 'test -e "{}" && echo EXISTS'
+
+
+def _parse_netdev(text: str) -> Dict[str, Tuple[int, int]]:
+    """解析 /proc/net/dev 文本为 {接口: (接收字节, 发送字节)}"""
+    return {iface: (int(rx), int(tx)) for iface, rx, tx in _NETDEV_RE.findall(text)}
+
+
+# 修正：native 模式下 run 参数到 fanse3g 参数的映射
+_NATIVE_FLAG_MAP = {'-i': '-D', '-r': '-R', '-o': '-O'}
+# 修正：Windows 节点作业成功后以单独一条 cmd 命令查询输出文件大小，本地据此判定输出非空，省去 UNC 元数据等待；
+# 不再拼接到作业命令之后（PowerShell 默认 shell 下 && 与 for 语法不可用，且标记会混入作业输出与日志）
+_OUTSIZE_QUERY_FMT = 'for %A in ("{}") do @echo %~zA'
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """紧凑、键排序的 UTF-8 JSON 序列化（有 orjson 时走 C 实现）"""
+    if _HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data):
+    """解析 JSON 文本或字节（有 orjson 时走 C 实现）"""
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _row_fmt(widths: Tuple[int, ...]) -> str:
+    """按列宽生成定宽行模板（左对齐并截断到列宽）"""
+    return " ".join(f"{{:<{w}.{w}}}" for w in widths)
+
+
+# 修正：list/check 表格行使用预生成的 format 模板，每行一次 format 调用完成截断与补齐
+_CHECK_WIDTHS1 = (16, 8, 10, 10, 30, 30, 32, 12)
+_CHECK_WIDTHS2 = (16, 16, 16, 28, 12, 28, 12)
+_CHECK_WIDTHS2_DETAIL = _CHECK_WIDTHS2 + (20, 16, 10, 10)
+_ROW_FMT1 = _row_fmt(_CHECK_WIDTHS1)
+_ROW_FMT2 = _row_fmt(_CHECK_WIDTHS2)
+_ROW_FMT2_DETAIL = _row_fmt(_CHECK_WIDTHS2_DETAIL)
+_ROW_FMT_LIST = '{:<10} {:<10} {:<10} {:<10} {:<10} {:<10} {:<24} {:<24} {:<8}'
+
+
+# 修正：安装脚本在进程内为常量，缓存读取结果与 PowerShell 编码结果，避免每个节点重复读盘/编码
+@functools.lru_cache(maxsize=4)
+def _load_install_script(path: Path) -> str:
+    """读取 utils 下的安装脚本（按路径缓存）"""
+    if not path.exists():
+        raise FileNotFoundError(str(path))
+    return path.read_text(encoding='utf-8')
+
+
+@functools.lru_cache(maxsize=16)
+def _win_encoded(script_body: str, inv: Tuple[str, ...]) -> str:
+    """拼接调用参数并编码为 PowerShell -EncodedCommand 所需的 UTF-16LE base64"""
+    full_script = script_body + "\n" + " ".join(inv)
+    return base64.b64encode(full_script.encode('utf-16le')).decode('utf-8')
+
+
+@functools.lru_cache(maxsize=256)
+def _build_remote_cmd_cached(tokens: Tuple[str, ...], native_mode: bool, exe_path: str, windows: bool = True) -> str:
+    """将 run 参数组装为远程命令（按参数元组缓存）"""
+    # 修正：将原run参数组装为远程命令，默认前缀 'fanse run '
+    # 修正：引号统一交给 subprocess.list2cmdline（Windows）/ shlex.join（POSIX），正确处理空格、中文及内嵌引号
+    # 修正：支持 native 模式，直接调用 fanse3g.exe 并转换参数
+    quote = subprocess.list2cmdline if windows else shlex.join
+    n = len(tokens)
+    if native_mode:
+        # 解析并转换参数: -i -> -D, -r -> -R, -o -> -O
+        # 保留其他参数
+        parts = [exe_path]
+        i = 0
+        while i < n:
+            t = tokens[i]
+            if t in _NATIVE_FLAG_MAP and i + 1 < n:
+                parts.append(_NATIVE_FLAG_MAP[t] + tokens[i + 1].strip('"'))
+                i += 2
+                continue
+            if t != '-y':  # fanse3g 不需要 -y
+                parts.append(t)
+            i += 1
+        return quote(parts)
+
+    # 常规 fanse run 模式：去掉路径参数上用户自带的引号，由 quote 统一处理
+    parts = [t.strip('"') if i and tokens[i - 1] in _NATIVE_FLAG_MAP else t for i, t in enumerate(tokens)]
+    return 'fanse run ' + quote(parts)
+
+
+def _wait_for_esc(timeout: float) -> bool:
+    """等待至多 timeout 秒，期间按下 ESC 返回 True
+    修正：由按键事件唤醒（Windows: WaitForSingleObject 等待控制台输入句柄；POSIX: select 等待 stdin），
+    不再以 0.1s 间隔轮询；stdin 非终端时退化为普通 sleep
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    try:
+        interactive = sys.stdin is not None and sys.stdin.isatty()
+    except Exception:
+        interactive = False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if not interactive:
+            time.sleep(remaining)
+            return False
+        if _HAS_MSVCRT:
+            kernel32 = ctypes.windll.kernel32
+            handle = msvcrt.get_osfhandle(sys.stdin.fileno())
+            if kernel32.WaitForSingleObject(handle, int(remaining * 1000)) != 0:  # 非 WAIT_OBJECT_0 即超时
+                return False
+            while msvcrt.kbhit():
+                if msvcrt.getch() == b'\x1b':  # ESC键
+                    return True
+            # 清掉按键抬起/鼠标等非字符事件，否则句柄保持有信号
+            kernel32.FlushConsoleInputBuffer(handle)
+        else:
+            readable, _, _ = select.select([sys.stdin], [], [], remaining)
+            if not readable:
+                return False
+            if b'\x1b' in os.read(sys.stdin.fileno(), 1024):
+                return True
+
+
+def _is_nonempty_file(path: str) -> bool:
+    # 单次 os.stat 同时得到存在性与大小，UNC 路径每次只需一次元数据往返
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and st.st_size > 0
+
+
+def _wait_for_nonempty(path: str, timeout: float, poll_interval: float = 0.5) -> bool:
+    """等待 path 成为非空普通文件，超时返回 False
+    修正：安装 watchdog 且父目录存在时，由目录变更事件唤醒后再 stat，
+    仅保留低频兜底检查（网络盘可能丢失通知）；未安装 watchdog 时按 poll_interval 轮询
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    if _is_nonempty_file(path):
+        return True
+    parent = os.path.dirname(os.path.abspath(path))
+    observer = None
+    changed = None
+    if _HAS_WATCHDOG and os.path.isdir(parent):
+        target = os.path.normcase(os.path.abspath(path))
+        changed = threading.Event()
+
+        class _Handler(_WatchdogHandler):
+            def on_any_event(self, event):
+                for attr in ('src_path', 'dest_path'):
+                    p = getattr(event, attr, None)
+                    if p and os.path.normcase(os.path.abspath(os.fsdecode(p))) == target:
+                        changed.set()
+
+        try:
+            observer = _WatchdogObserver()
+            observer.schedule(_Handler(), parent, recursive=False)
+            observer.start()
+            poll_interval = max(poll_interval, 5.0)
+        except Exception:
+            observer = None
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return _is_nonempty_file(path)
+            if observer is not None:
+                changed.wait(min(poll_interval, remaining))
+                changed.clear()
+            else:
+                time.sleep(min(poll_interval, remaining))
+            if _is_nonempty_file(path):
+                return True
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=1)
+
+
+class _RunCfg(NamedTuple):
+    """cluster run 的运行参数（由 argparse 结果一次性解析）"""
+    nodes: Optional[str]
+    jobs_file: Optional[str]
+    pick_n: int
+    wait_sec: int
+    auto_yes: bool
+    quiet: bool
+    log_dir: Optional[str]
+    hard_timeout: int
+    idle_timeout: int
+    heartbeat_sec: int
+    native_mode: bool
+    remainder: Tuple[str, ...]
+
+    @classmethod
+    def from_args(cls, args) -> '_RunCfg':
+        # 修正：优先使用未知参数集合，以完整保留 -i/-r/-E 等原run参数
+        remainder = list(getattr(args, '_unknown', None) or [])
+        remainder.extend(getattr(args, 'command', None) or [])
+        return cls(
+            nodes=getattr(args, 'nodes', None),
+            jobs_file=getattr(args, 'jobs', None),
+            pick_n=int(getattr(args, 'p', 0) or 0),
+            wait_sec=int(getattr(args, 'wait', 0) or 0),
+            auto_yes=bool(getattr(args, 'yes', False)),
+            quiet=bool(getattr(args, 'quiet', False)),
+            log_dir=getattr(args, 'log_dir', None),
+            # 运行稳定性参数
+            hard_timeout=int(getattr(args, 'timeout', 0) or 0),
+            idle_timeout=int(getattr(args, 'idle_timeout', 0) or 0),
+            heartbeat_sec=int(getattr(args, 'heartbeat', 0) or 0),
+            native_mode=bool(getattr(args, 'native', False)),
+            remainder=tuple(remainder),
+        )
+
+
+class _WorkStealingQueues:
+    """按节点分片的作业双端队列
+    修正：作业按轮询分配到各节点的本地队列，节点从本地队列头部取作业；本地队列为空时
+    随机选择仍有积压的节点，从其队列尾部一次批量窃取（至多一半），取代所有节点争用同一把队列锁
+    """
+
+    def __init__(self, jobs: Iterable[int], owners: List[str]):
+        self._queues: Dict[str, collections.deque] = {n: collections.deque() for n in owners}
+        self._locks: Dict[str, threading.Lock] = {n: threading.Lock() for n in owners}
+        for idx, job in enumerate(jobs):
+            self._queues[owners[idx % len(owners)]].append(job)
+
+    def get(self, owner: str) -> Optional[int]:
+        """为节点取下一个作业，全部队列为空时返回 None"""
+        with self._locks[owner]:
+            if self._queues[owner]:
+                return self._queues[owner].popleft()
+        return self._steal(owner)
+
+    def get_local_if(self, owner: str, pred: Callable[[int], bool]) -> Optional[int]:
+        """仅当本节点队列头部作业满足 pred 时取出（不窃取），不满足或队列为空时返回 None"""
+        with self._locks[owner]:
+            q = self._queues[owner]
+            if q and pred(q[0]):
+                return q.popleft()
+        return None
+
+    def _steal(self, owner: str) -> Optional[int]:
+        while True:
+            victims = [n for n, q in self._queues.items() if n != owner and q]
+            if not victims:
+                return None
+            victim = random.choice(victims)
+            # 修正：单次窃取量取 victim 积压的一半与全局公平份额 remaining/(2*节点数) 中的较小者，
+            # 多个节点同时空闲时不会被第一个窃取者一次拿走过多
+            share = max(1, self.qsize() // (2 * len(self._queues)))
+            with self._locks[victim]:
+                vq = self._queues[victim]
+                take = min((len(vq) + 1) // 2, share)
+                batch = [vq.pop() for _ in range(take)]
+            if not batch:
+                continue  # 选中后已被其他节点取空，重新选择
+            batch.reverse()
+            with self._locks[owner]:
+                self._queues[owner].extend(batch[1:])
+            return batch[0]
+
+    def qsize(self) -> int:
+        """剩余作业数（近似值，仅用于进度展示）"""
+        return sum(len(q) for q in self._queues.values())
+
+
+class _PrefixedLineWriter:
+    """远端输出的行缓冲：按换行或回车切分完整行，解码后为每行加前缀写出，不完整的行等待后续数据拼接
+    修正：逐行先按 UTF-8 解码，失败时按节点编码（Windows 节点为 GBK）解码；以回车结尾的进度行仍以回车写出，
+    控制台上原地刷新；传入 log 时同时写入日志文件（不加前缀，每段一行）
+    """
+
+    _SEP_RE = re.compile(rb'(\r\n|\r|\n)')
+
+    def __init__(self, tag: str, encoding: str = 'utf-8', log=None, echo: bool = True):
+        self.tag = tag
+        self.encoding = encoding
+        self.log = log
+        self.echo = echo
+        self.buf = bytearray()
+        self.after_cr = False  # 上一段以 \r 结束（PTY 输出的 \r\n 可能被 recv 截断在两块之间）
+
+    def _decode(self, line: bytes) -> str:
+        try:
+            return line.decode('utf-8')
+        except UnicodeDecodeError:
+            return line.decode(self.encoding, errors='replace')
+
+    def feed(self, raw: bytes) -> None:
+        self.buf += raw
+        end = max(self.buf.rfind(b'\n'), self.buf.rfind(b'\r'))
+        if end < 0:
+            return
+        parts = self._SEP_RE.split(bytes(self.buf[:end + 1]))
+        del self.buf[:end + 1]
+        shown, logged = [], []
+        for line, sep in zip(parts[0::2], parts[1::2]):
+            if not line and sep == b'\n' and self.after_cr:
+                shown.append('\n')  # 被拆开的 \r\n：补上换行，不再输出空行
+            else:
+                text = self._decode(line)
+                shown.append(self.tag + text + ('\r' if sep == b'\r' else '\n'))
+                logged.append(text + '\n')
+            self.after_cr = sep == b'\r'
+        self._write(''.join(shown), ''.join(logged))
+
+    def flush(self, final: bool = False) -> None:
+        if final and self.buf:
+            text = self._decode(bytes(self.buf))
+            self.buf.clear()
+            self._write(self.tag + text + '\n', text + '\n')
+        if self.echo:
+            sys.stdout.flush()
+
+    def _write(self, shown: str, logged: str) -> None:
+        if self.log is not None and logged:
+            self.log.write(logged)
+        if self.echo and shown:
+            sys.stdout.write(shown)
+
+
 @dataclass
 class ClusterNode:
     """集群节点配置"""
@@ -48,6 +465,7 @@ class ClusterNode:
     enabled: bool = True
     work_dir: Optional[str] = None  # 修正：预留工作目录字段，便于后续 -w 更新
     env_info: Optional[Dict] = None  # 环境检查缓存
+    os_type: Optional[str] = None  # 修正：首次探测到的系统类型（'windows'/'linux'），随 cluster.json 持久化，后续进程不再探测
 
 
 class OptimizedClusterManager:
@@ -57,32 +475,222 @@ class OptimizedClusterManager:
         self.config_dir = config_dir
         self.cluster_file = config_dir / "cluster.json"
         self.status_file = config_dir / "cluster_status.json"  # 修正：缓存最近一次检查结果供 list 离线展示
-        self.nodes: Dict[str, ClusterNode] = {}
+        self.status_file_gz = config_dir / "cluster_status.json.gz"  # 修正：大集群状态缓存压缩存储
+        self.known_hosts_file = config_dir / "known_hosts"  # 修正：节点主机密钥持久化，paramiko 与 OpenSSH 后端共用
+        self._known_hosts_lock = threading.Lock()
+        self._pkey_cache: Dict[Tuple[str, int], paramiko.PKey] = {}  # 修正：已解析的私钥，键为 (路径, 修改时间)
+        self._last_status_hash: Optional[str] = None  # 修正：最近一次写入的检查结果摘要，结果未变化时跳过写盘
+        self._last_status_file: Optional[Tuple[Path, int]] = None  # 修正：最近一次写入的状态缓存文件及其修改时间（ns）
+        self._last_status_map: Optional[Dict[str, Dict[str, any]]] = None  # 修正：最近一次检查结果（进程内复用）
+        self._last_status_json: Optional[bytes] = None
+        self._last_status_time: float = 0.0  # 修正：最近一次检查结果的时间戳，用于判断是否可直接复用
+        # 修正：nodes/settings 改为首次访问时才读取 cluster.json（见 _cluster_config），不需要节点表的子命令不再解析配置
+        self._config_mtime_ns: Optional[int] = None  # 修正：最近一次读取/写入时 cluster.json 的修改时间
+        self._last_config_hash: Optional[str] = None  # 修正：最近一次写入 cluster.json 的内容摘要
         self._connection_pool: Dict[str, paramiko.SSHClient] = {}
-        self._load_cluster_config()
+        self._sftp_pool: Dict[str, paramiko.SFTPClient] = {}  # 修正：池化连接上缓存的 SFTP 通道，随连接一起释放
+        self._sftp_active: set = set()  # 修正：正在上传的节点，空闲回收时跳过
+        self._open_channels: Dict[paramiko.Transport, int] = {}  # 修正：各池化连接上正在使用的会话通道数（见 _channel_in_use）
+        # 修正：连接池按节点加锁，避免并发时对同一节点重复建连
+        self._pool_lock = threading.Lock()
+        self._ssh_locks: Dict[str, threading.Lock] = {}
+        self._ssh_last_used: Dict[str, float] = {}  # 修正：池化连接最近一次取用时间，用于回收空闲连接
+        self._host_sem: Dict[str, threading.Semaphore] = {}  # 修正：按主机限制同时进行的 SSH 握手数
+        self._ssh_identity: Dict[str, Tuple] = {}  # 修正：池化连接建立时的 (主机, 端口, 用户)，节点配置变更后不再复用旧连接
+        atexit.register(self.close_all)
+        self._os_cache: Dict[str, str] = {}  # 修正：节点操作系统类型缓存（'windows'/'linux'），避免每次操作都远程探测
+        self._config_lock = threading.Lock()  # 修正：并行检查中记录系统类型时串行化配置保存
+        self._rtt_ewma: Dict[str, float] = {}  # 修正：节点 RTT（秒）的 EWMA，用于自适应命令超时
     
-    def _load_cluster_config(self):
-        """加载集群配置"""
-        if self.cluster_file.exists():
+    def _stat_config_mtime(self) -> Optional[int]:
+        try:
+            return self.cluster_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_cluster_config(self) -> Tuple[Dict[str, ClusterNode], Dict[str, any]]:
+        """加载集群配置，返回 (节点表, 集群设置)"""
+        nodes: Dict[str, ClusterNode] = {}
+        settings: Dict[str, any] = {}
+        self._config_mtime_ns = self._stat_config_mtime()
+        if self._config_mtime_ns is not None:
             try:
                 with open(self.cluster_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                    settings = data.get('settings', {}) or {}
                     for node_data in data.get('nodes', []):
                         node = ClusterNode(**node_data)
-                        self.nodes[node.name] = node
+                        nodes[node.name] = node
             except (json.JSONDecodeError, KeyError) as e:
                 print(f"⚠️ 配置文件损坏: {e}，将创建新的配置")
+        return nodes, settings
+
+    @functools.cached_property
+    def _cluster_config(self) -> Tuple[Dict[str, ClusterNode], Dict[str, any]]:
+        return self._load_cluster_config()
+
+    @functools.cached_property
+    def nodes(self) -> Dict[str, ClusterNode]:
+        """节点表（首次访问时解析 cluster.json，之后在进程内复用）"""
+        nodes = self._cluster_config[0]
+        # 修正：已持久化的系统类型直接进入进程内缓存
+        self._os_cache.update({name: node.os_type for name, node in nodes.items() if node.os_type})
+        return nodes
+
+    # 修正：`uname -s || ver` 首行以这些名称开头时为类 Unix 节点；MINGW64_NT/MSYS_NT/CYGWIN_NT 及 ver 输出均判为 Windows
+    UNIX_UNAME_PREFIXES = ('Linux', 'Darwin')
+
+    @classmethod
+    def _classify_os(cls, output: str) -> str:
+        """由 `uname -s || ver` 的输出判定系统类型（'linux'/'windows'），无输出时按 Windows 处理"""
+        first = next((line.strip() for line in output.splitlines() if line.strip()), '')
+        return 'linux' if first.startswith(cls.UNIX_UNAME_PREFIXES) else 'windows'
+
+    def _remember_os(self, node: ClusterNode, os_type: str) -> None:
+        """记录节点系统类型：写入进程内缓存，与已保存值不同时持久化到 cluster.json"""
+        self._os_cache[node.name] = os_type
+        if node.os_type == os_type:
+            return
+        node.os_type = os_type
+        if self.nodes.get(node.name) is node:
+            with self._config_lock:
+                self._save_cluster_config()
+
+    @functools.cached_property
+    def settings(self) -> Dict[str, any]:
+        """集群级设置（如 check_max_workers），随 cluster.json 保存"""
+        return self._cluster_config[1]
     
+    def reload(self, force: bool = False):
+        """重新从磁盘加载集群配置（外部修改 cluster.json 后刷新进程内缓存的管理器）
+        修正：文件修改时间未变化时不重复解析，force=True 强制重新加载
+        """
+        if not force and 'nodes' in self.__dict__ and self._stat_config_mtime() == self._config_mtime_ns:
+            return
+        for attr in ('_cluster_config', 'nodes', 'settings'):
+            self.__dict__.pop(attr, None)
+        self.invalidate()
+
     def _save_cluster_config(self):
         """保存集群配置"""
         try:
             data = {'nodes': [vars(node) for node in self.nodes.values()]}
+            if self.settings:
+                data['settings'] = self.settings
+            payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+            # 修正：内容与上次写入相同且文件未被外部修改时跳过写盘（批量导入、重复记录系统类型时避免整表重写）
+            digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+            if digest == self._last_config_hash and self._stat_config_mtime() == self._config_mtime_ns:
+                return
             self.config_dir.mkdir(parents=True, exist_ok=True)
-            with open(self.cluster_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # 修正：同目录临时文件 + os.replace 原子替换，中途失败不会留下半截的 cluster.json
+            with tempfile.NamedTemporaryFile('wb', dir=self.config_dir, prefix='.cluster.', delete=False) as tf:
+                try:
+                    tf.write(payload)
+                    tf.flush()
+                    os.fsync(tf.fileno())
+                except Exception:
+                    tf.close()
+                    os.unlink(tf.name)
+                    raise
+            os.replace(tf.name, self.cluster_file)
+            self._last_config_hash = digest
+            # 修正：进程内节点表即为最新配置，保存后只记录修改时间，无需重新解析
+            self._config_mtime_ns = self._stat_config_mtime()
         except Exception as e:
             print(f"❌ 保存配置失败: {e}")
 
+    # 修正：状态缓存超过该大小时以 gzip 存储
+    STATUS_GZIP_THRESHOLD = 16 * 1024
+
+    def _write_status_cache(self, results: Dict[str, Dict[str, any]]) -> None:
+        """原子写入状态缓存：同目录临时文件 + fsync + os.replace，避免 watch/list 读到半截 JSON
+        修正：检查结果与上次写入相同时跳过（watch 循环中避免重复序列化与 fsync）；紧凑格式输出
+        修正：结果只序列化一次，摘要、写盘与进程内 list 展示共用
+        修正：跳过写盘时仍刷新文件修改时间，其他进程据此判断快照新鲜度（见 recent_status）
+        """
+        self._last_status_map = results
+        self._last_status_time = time.time()
+        self._last_status_json = _json_dumps_bytes(results)
+        digest = hashlib.blake2b(self._last_status_json, digest_size=16).hexdigest()
+        if digest == self._last_status_hash and self._touch_status_cache():
+            return
+        payload = b'{"timestamp":' + json.dumps(time.time()).encode('ascii') + b',"results":' + self._last_status_json + b'}'
+        use_gzip = len(payload) > self.STATUS_GZIP_THRESHOLD
+        target = self.status_file_gz if use_gzip else self.status_file
+        stale = self.status_file if use_gzip else self.status_file_gz
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=self.config_dir, prefix='.cluster_status.', delete=False) as tf:
+            try:
+                if use_gzip:
+                    with gzip.GzipFile(fileobj=tf, mode='wb') as gz:
+                        gz.write(payload)
+                else:
+                    tf.write(payload)
+                tf.flush()
+                os.fsync(tf.fileno())
+            except Exception:
+                tf.close()
+                os.unlink(tf.name)
+                raise
+        os.replace(tf.name, target)
+        self._last_status_hash = digest
+        self._last_status_file = (target, target.stat().st_mtime_ns)
+        try:
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _touch_status_cache(self) -> bool:
+        """刷新本进程上次写入的状态缓存文件的修改时间；文件已被其他进程替换或不存在时返回 False（需重新写入）"""
+        if self._last_status_file is None:
+            return False
+        path, mtime_ns = self._last_status_file
+        try:
+            if path.stat().st_mtime_ns != mtime_ns:
+                return False
+            os.utime(path)
+            self._last_status_file = (path, path.stat().st_mtime_ns)
+            return True
+        except OSError:
+            return False
+
+    def _status_cache_mtime(self) -> Optional[float]:
+        """状态缓存文件（与 _read_status_cache 相同的优先顺序）的修改时间，不存在时返回 None"""
+        for path in (self.status_file_gz, self.status_file):
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                continue
+        return None
+
+    def _read_status_cache(self) -> Dict:
+        """读取状态缓存（透明支持 .gz），不存在或损坏时返回空字典"""
+        try:
+            if self.status_file_gz.exists():
+                with gzip.open(self.status_file_gz, 'rb') as f:
+                    return _json_loads(f.read())
+            with open(self.status_file, 'rb') as f:
+                return _json_loads(f.read())
+        except Exception:
+            return {}
+
+    # 修正：检查结果在该时长（秒）内视为新鲜，可直接复用而不重新探测全部节点
+    STATUS_REUSE_SEC = 5.0
+
+    def recent_status(self, max_age: Optional[float] = None) -> Optional[Dict[str, Dict[str, any]]]:
+        """返回不超过 max_age 秒的检查结果：优先进程内结果，其次状态缓存文件（如另一终端的 check --watch 写入）
+        修正：文件新鲜度按修改时间判断——结果未变化时写入方只刷新修改时间，内嵌的 timestamp 不再前进
+        """
+        max_age = self.STATUS_REUSE_SEC if max_age is None else max_age
+        now = time.time()
+        if self._last_status_map is not None and now - self._last_status_time <= max_age:
+            return self._last_status_map
+        mtime = self._status_cache_mtime()
+        if mtime is None or not 0 <= now - mtime <= max_age:
+            return None
+        return self._read_status_cache().get('results') or None
+
     def _get_connect_host(self, node: ClusterNode) -> str:
         """根据节点配置选择用于连接的主机地址
         修改说明：优先使用节点 IP 字段，其次使用 host 字段；
@@ -98,7 +706,7 @@ class OptimizedClusterManager:
             # 首选标准解析
             ip = socket.gethostbyname(host)
             # 过滤掉解析失败返回自身或非 IPv4 的情况（简单校验）
-            if re.match(r"^\d+\.\d+\.\d+\.\d+$", ip):
+            if _PAT_IPV4.match(ip):
                 return ip
         except Exception:
             pass
@@ -106,15 +714,27 @@ class OptimizedClusterManager:
         try:
             proc = subprocess.run(["nslookup", host], capture_output=True, text=True, timeout=3)
             out = proc.stdout
-            m = re.search(r"Address:\s*([0-9]{1,3}(?:\.[0-9]{1,3}){3})", out)
+            m = _PAT_NSLOOKUP_ADDR.search(out)
             if m:
                 return m.group(1)
         except Exception:
             pass
         return None
     
-    def _test_network_connectivity(self, host: str, port: int, timeout: int = 2) -> bool:
-        """优化的网络连通性测试"""
+    def _has_live_connection(self, node: ClusterNode) -> bool:
+        """连接池中是否已有该节点的活跃SSH连接"""
+        client = self._connection_pool.get(node.name)
+        if client is None:
+            return False
+        transport = client.get_transport()
+        return bool(transport and transport.is_active())
+
+    def _test_network_connectivity(self, host: str, port: int, timeout: int = 2, node: Optional[ClusterNode] = None, force: bool = False) -> bool:
+        """优化的网络连通性测试
+        修正：传入 node 且连接池中已有活跃连接时直接判定连通（活跃传输本身即证明可达）；force=True 强制探测
+        """
+        if not force and node is not None and self._has_live_connection(node):
+            return True
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                 sock.settimeout(timeout)
@@ -128,6 +748,9 @@ class OptimizedClusterManager:
         try:
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            # 修正：已记录的主机密钥作为只读密钥加载；首次连接的新密钥由 AutoAddPolicy 接收，连接成功后追加保存
+            if self.known_hosts_file.exists():
+                ssh.load_system_host_keys(str(self.known_hosts_file))
             
             connect_kwargs = {
                 'hostname': self._get_connect_host(node),  # 修改：优先使用 IP 进行连接，避免 Linux 下主机名解析失败
@@ -139,10 +762,11 @@ class OptimizedClusterManager:
             }
             
             # 认证配置
-            if node.key_path and os.path.exists(node.key_path):
+            # 修正：私钥按 (路径, 修改时间) 缓存，重连不再重复解析；密钥文件不存在时按未配置密钥处理
+            key_mtime = self._key_mtime(node.key_path) if node.key_path else None
+            if key_mtime is not None:
                 try:
-                    key = paramiko.RSAKey.from_private_key_file(node.key_path)
-                    connect_kwargs['pkey'] = key
+                    connect_kwargs['pkey'] = self._load_pkey(node.key_path, key_mtime)
                 except Exception as e:
                     print(f"❌ 密钥加载失败: {e}")
                     return None
@@ -152,29 +776,352 @@ class OptimizedClusterManager:
                 print("❌ 未提供认证信息")
                 return None
             
-            ssh.connect(**connect_kwargs)
+            # 修正：同一主机同时握手数受 HOST_CONNECT_LIMIT 限制，避免触发 sshd MaxStartups 随机丢弃连接
+            with self._host_semaphore(connect_kwargs['hostname']):
+                ssh.connect(**connect_kwargs)
+            if len(ssh.get_host_keys()):
+                self._save_host_keys(ssh.get_host_keys())
             return ssh
             
+        except paramiko.BadHostKeyException as e:
+            print(f"❌ 主机密钥与记录不符: {e}（若节点已重装，请删除 {self.known_hosts_file} 中对应条目）")
         except paramiko.AuthenticationException as e:
             print(f"❌ SSH认证失败: {e}")
         except paramiko.SSHException as e:
             print(f"❌ SSH连接错误: {e}")
+        except (socket.timeout, OSError) as e:
+            # 修正：端口拒绝/超时/不可达（含 paramiko 的 NoValidConnectionsError）按网络连接失败报告
+            print(f"❌ 网络连接失败: {e}")
         except Exception as e:
             print(f"❌ 连接创建失败: {e}")
         
         return None
     
-    def _execute_remote_command(self, ssh: paramiko.SSHClient, command: str, timeout: int = 10) -> Tuple[bool, str, str]:
-        """执行远程命令并返回结果"""
+    @staticmethod
+    def _key_mtime(key_path: str) -> Optional[int]:
+        try:
+            return os.stat(key_path).st_mtime_ns
+        except OSError:
+            return None
+
+    # 修正：私钥类型的尝试顺序（Ed25519 校验最快，RSA 为原有默认）
+    PKEY_CLASSES = ('Ed25519Key', 'RSAKey', 'ECDSAKey')
+
+    def _load_pkey(self, key_path: str, mtime_ns: int) -> paramiko.PKey:
+        """读取私钥文件（按路径与修改时间缓存，密钥文件轮换后自动重新读取）"""
+        cache_key = (key_path, mtime_ns)
+        pkey = self._pkey_cache.get(cache_key)
+        if pkey is not None:
+            return pkey
+        last_error: Optional[Exception] = None
+        for cls_name in self.PKEY_CLASSES:
+            key_cls = getattr(paramiko, cls_name, None)
+            if key_cls is None:
+                continue
+            try:
+                pkey = key_cls.from_private_key_file(key_path)
+                break
+            except paramiko.PasswordRequiredException:
+                raise
+            except paramiko.SSHException as e:
+                last_error = e
+        if pkey is None:
+            raise last_error or paramiko.SSHException(f"无法识别的私钥格式: {key_path}")
+        self._pkey_cache[cache_key] = pkey
+        return pkey
+
+    def _save_host_keys(self, new_keys) -> None:
+        """将新接收的主机密钥合并写入 known_hosts（并发建连时加锁，先读后写避免互相覆盖）"""
+        with self._known_hosts_lock:
+            try:
+                merged = paramiko.HostKeys()
+                if self.known_hosts_file.exists():
+                    merged.load(str(self.known_hosts_file))
+                for host, entries in new_keys.items():
+                    for key_type, key in entries.items():
+                        merged.add(host, key_type, key)
+                self.config_dir.mkdir(parents=True, exist_ok=True)
+                merged.save(str(self.known_hosts_file))
+            except Exception:
+                pass
+
+    def _lookup_host_keys(self, host_name: str):
+        """查询 known_hosts 中该主机已记录的密钥（无记录时返回 None）"""
+        if not self.known_hosts_file.exists():
+            return None
+        with self._known_hosts_lock:
+            try:
+                return paramiko.HostKeys(str(self.known_hosts_file)).lookup(host_name)
+            except Exception:
+                return None
+
+    def _save_asyncssh_host_key(self, host_name: str, server_key) -> None:
+        """将 asyncssh 连接收到的主机密钥转换为 paramiko 格式后保存"""
+        if server_key is None:
+            return
+        try:
+            line = server_key.export_public_key('openssh').decode().strip()
+            entry = paramiko.hostkeys.HostKeyEntry.from_line(f"{host_name} {line}")
+        except Exception:
+            return
+        if entry is not None and entry.key is not None:
+            self._save_host_keys({host_name: {entry.key.get_name(): entry.key}})
+
+    # 修正：远程命令超时自适应（基于节点 RTT 的 EWMA），无历史时使用默认值
+    DEFAULT_REMOTE_TIMEOUT = 10
+    MIN_REMOTE_TIMEOUT = 5
+    MAX_REMOTE_TIMEOUT = 60
+    RTT_EWMA_ALPHA = 0.2
+
+    def _record_rtt(self, node: ClusterNode, latency: float) -> None:
+        """更新节点 RTT（秒）的指数加权移动平均"""
+        prev = self._rtt_ewma.get(node.name)
+        self._rtt_ewma[node.name] = latency if prev is None else (1 - self.RTT_EWMA_ALPHA) * prev + self.RTT_EWMA_ALPHA * latency
+
+    def _adaptive_timeout(self, node: Optional[ClusterNode]) -> float:
+        """根据节点 RTT 推导命令超时：max(下限, 5*EWMA)，上限 MAX_REMOTE_TIMEOUT"""
+        ewma = self._rtt_ewma.get(node.name) if node is not None else None
+        if ewma is None:
+            return self.DEFAULT_REMOTE_TIMEOUT
+        return min(self.MAX_REMOTE_TIMEOUT, max(self.MIN_REMOTE_TIMEOUT, 5 * ewma))
+
+    # 修正：同一主机同时进行的 SSH 握手上限（sshd 默认 MaxStartups 10:30:100，多节点指向同一主机时也不会突发）
+    HOST_CONNECT_LIMIT = 2
+
+    def _host_semaphore(self, host: str) -> threading.Semaphore:
+        with self._pool_lock:
+            sem = self._host_sem.get(host)
+            if sem is None:
+                sem = self._host_sem[host] = threading.Semaphore(self.HOST_CONNECT_LIMIT)
+            return sem
+
+    # 修正：池化连接的 SSH keepalive 间隔（秒）
+    SSH_KEEPALIVE_SEC = 30
+    # 修正：池化连接空闲超过该时长（秒）且无打开的通道时回收
+    SSH_IDLE_TTL = 120
+
+    def _transport_busy(self, transport) -> bool:
+        """连接上是否仍有我们打开且未结束的会话通道（调用方持有 _pool_lock）
+        修正：按 _channel_in_use 登记的计数判断，不再读取 paramiko 私有的 transport._channels；缓存的空闲 SFTP 通道不计入
+        """
+        return self._open_channels.get(transport, 0) > 0
+
+    def _mark_channel(self, transport, delta: int) -> None:
+        """增减连接上正在使用的会话通道计数（计数归零时移除）"""
+        with self._pool_lock:
+            remaining = self._open_channels.get(transport, 0) + delta
+            if remaining > 0:
+                self._open_channels[transport] = remaining
+            else:
+                self._open_channels.pop(transport, None)
+
+    @contextlib.contextmanager
+    def _channel_in_use(self, ssh: paramiko.SSHClient):
+        """登记池化连接上正在使用的会话通道，期间空闲回收不会关闭该连接"""
+        transport = ssh.get_transport()
+        self._mark_channel(transport, 1)
+        try:
+            yield transport
+        finally:
+            self._mark_channel(transport, -1)
+
+    def _reap_idle_ssh(self) -> None:
+        """回收空闲超过 SSH_IDLE_TTL 且无活动通道的池化连接"""
+        now = time.time()
+        for name, last_used in list(self._ssh_last_used.items()):
+            if now - last_used < self.SSH_IDLE_TTL:
+                continue
+            client = self._connection_pool.get(name)
+            transport = client.get_transport() if client is not None else None
+            if name in self._sftp_active:
+                continue
+            if transport is not None and transport.is_active() and self._transport_busy(transport):
+                continue
+            self._drop_ssh(name)
+
+    def _get_ssh(self, node: ClusterNode, timeout: int = 3) -> Optional[paramiko.SSHClient]:
+        """获取节点的持久SSH连接：池中连接仍活跃则复用，否则重新建立并放入连接池
+        调用方不应关闭返回的连接，统一由 close_all()/_drop_ssh() 释放
+        """
+        with self._pool_lock:
+            lock = self._ssh_locks.setdefault(node.name, threading.Lock())
+            self._reap_idle_ssh()
+        identity = (self._get_connect_host(node), node.port, node.user)
+        with lock:
+            now = time.time()
+            idle = now - self._ssh_last_used.get(node.name, now)
+            self._ssh_last_used[node.name] = now
+            client = self._connection_pool.get(node.name)
+            if client is not None:
+                transport = client.get_transport()
+                if self._ssh_identity.get(node.name) == identity and transport and transport.is_active():
+                    # 修正：空闲超过一个心跳周期的连接先发送 SSH_MSG_IGNORE 试探，已断开的连接在此处即被发现并重建
+                    if idle < self.SSH_KEEPALIVE_SEC:
+                        return client
+                    try:
+                        transport.send_ignore()
+                        return client
+                    except Exception:
+                        pass
+                self._drop_sftp(node.name)
+                try:
+                    client.close()
+                except Exception:
+                    pass
+                self._connection_pool.pop(node.name, None)
+            client = self._create_ssh_connection(node, timeout=timeout)
+            if client is None:
+                return None
+            try:
+                client.get_transport().set_keepalive(self.SSH_KEEPALIVE_SEC)
+            except Exception:
+                pass
+            self._connection_pool[node.name] = client
+            self._ssh_identity[node.name] = identity
+            return client
+
+    def _drop_ssh(self, node_name: str) -> None:
+        """关闭并移出节点的池化连接（节点地址/认证变更或移除时调用）"""
+        self._drop_sftp(node_name)
+        client = self._connection_pool.pop(node_name, None)
+        self._ssh_last_used.pop(node_name, None)
+        self._ssh_identity.pop(node_name, None)
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def close_all(self) -> None:
+        """关闭连接池中的全部SSH连接（进程退出时自动调用）"""
+        for name in list(self._connection_pool):
+            self._drop_ssh(name)
+
+    # 修正：远程命令输出保留的头部上限与尾部长度（字节）；超出部分边读边丢弃，尾部保留以便匹配结束标记
+    REMOTE_OUTPUT_LIMIT = 64 * 1024
+    REMOTE_OUTPUT_TAIL = 4 * 1024
+
+    @classmethod
+    def _cap_output(cls, data: bytes, limit: int) -> bytes:
+        """对已读入的输出做与 _read_capped 相同的截断：保留前 limit 字节与最后 REMOTE_OUTPUT_TAIL 字节"""
+        if len(data) <= limit:
+            return data
+        tail = data[limit:][-cls.REMOTE_OUTPUT_TAIL:]
+        return data[:limit] + b'\n' + tail
+
+    @classmethod
+    def _read_capped(cls, stream, limit: int) -> bytes:
+        """分块读取通道输出：保留前 limit 字节与最后 REMOTE_OUTPUT_TAIL 字节，内存占用与输出总量无关"""
+        head = stream.read(limit)
+        if len(head) < limit:
+            return head
+        tail = b''
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            tail = (tail + chunk)[-cls.REMOTE_OUTPUT_TAIL:]
+        return head + b'\n' + tail if tail else head
+
+    @staticmethod
+    def _drain_channel(channel: paramiko.Channel) -> Tuple[bytes, bytes]:
+        """读取通道全部 stdout/stderr 直至命令结束（两路交替读空，以通道 fileno 的可读事件等待）"""
+        out_chunks, err_chunks = [], []
+        sel = selectors.DefaultSelector()
+        sel.register(channel.fileno(), selectors.EVENT_READ)
+        try:
+            while True:
+                while channel.recv_ready():
+                    chunk = channel.recv(65536)
+                    if not chunk:
+                        break
+                    out_chunks.append(chunk)
+                while channel.recv_stderr_ready():
+                    chunk = channel.recv_stderr(65536)
+                    if not chunk:
+                        break
+                    err_chunks.append(chunk)
+                if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+                sel.select(0.5)
+        finally:
+            sel.close()
+        return b''.join(out_chunks), b''.join(err_chunks)
+
+    def _execute_remote_command(self, ssh: paramiko.SSHClient, command: str, timeout: Optional[float] = None, node: Optional[ClusterNode] = None,
+                                max_output_bytes: Optional[int] = None, total_timeout: Optional[float] = None) -> Tuple[bool, str, str]:
+        """执行远程命令并返回结果
+        修正：timeout 保持通道读超时的含义（无输出超过该时长才失败），未指定时取默认值与节点 RTT 自适应值中的较大者；
+        total_timeout 为可选的总运行时长上限（探测类命令使用），超时后关闭通道并快速失败
+        修正：输出按 max_output_bytes（默认 REMOTE_OUTPUT_LIMIT）截断，先在字节上 strip 再解码；
+        stderr 仅在命令失败时读取（成功时调用方均不使用）
+        """
+        limit = max_output_bytes or self.REMOTE_OUTPUT_LIMIT
+        if timeout is None:
+            timeout = max(self.DEFAULT_REMOTE_TIMEOUT, self._adaptive_timeout(node))
+        argv = self._openssh_argv(node) if node is not None else None
+        if argv is not None:
+            # 修正：OpenSSH 进程无法区分读超时，以总时长上限代替（未指定 total_timeout 时取读超时），输出同样按 limit 截断
+            return self._execute_via_openssh(argv, command, total_timeout or timeout, limit)
         try:
-            stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
-            exit_status = stdout.channel.recv_exit_status()
-            output = stdout.read().decode('utf-8', errors='ignore').strip()
-            error = stderr.read().decode('utf-8', errors='ignore').strip()
-            return exit_status == 0, output, error
+            with self._channel_in_use(ssh):
+                stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
+                if total_timeout is not None and not stdout.channel.status_event.wait(total_timeout):
+                    stdout.channel.close()
+                    return False, "", f"timeout after {total_timeout:.1f}s"
+                output = self._read_capped(stdout, limit).strip().decode('utf-8', errors='ignore')
+                exit_status = stdout.channel.recv_exit_status()
+                error = ''
+                if exit_status != 0:
+                    error = self._read_capped(stderr, limit).strip().decode('utf-8', errors='ignore')
+                return exit_status == 0, output, error
         except Exception as e:
             return False, "", str(e)
     
+    # 修正：可选 OpenSSH ControlMaster 后端（settings.ssh_backend = "openssh"）：同一主机的命令跨进程复用一条主连接，
+    # 多次执行 fanse cluster check 等命令时不再重复密钥交换；仅用于非 Windows 控制端的密钥/agent 认证节点，SFTP 等仍走 paramiko
+    SSH_CONTROL_PERSIST = 600
+
+    def _openssh_argv(self, node: ClusterNode) -> Optional[List[str]]:
+        """返回经 OpenSSH 主连接执行命令的参数前缀，后端未启用或节点不适用时返回 None"""
+        if self.settings.get('ssh_backend') != 'openssh' or os.name == 'nt':
+            return None
+        if node.password and not node.key_path:
+            return None  # BatchMode 下无法输入密码
+        ssh_bin = shutil.which('ssh')
+        if not ssh_bin:
+            return None
+        mux_dir = self.config_dir / 'mux'
+        try:
+            mux_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        except OSError:
+            return None
+        argv = [
+            ssh_bin, '-o', 'BatchMode=yes', '-o', 'ConnectTimeout=3',
+            '-o', 'StrictHostKeyChecking=accept-new',
+            '-o', f'UserKnownHostsFile={self.known_hosts_file}',
+            '-o', 'ControlMaster=auto', '-o', f'ControlPath={mux_dir}/%C',
+            '-o', f'ControlPersist={self.SSH_CONTROL_PERSIST}',
+            '-p', str(node.port),
+        ]
+        if node.key_path:
+            argv += ['-i', node.key_path]
+        argv.append(f"{node.user}@{self._get_connect_host(node)}")
+        return argv
+
+    @classmethod
+    def _execute_via_openssh(cls, argv: List[str], command: str, timeout: float, limit: int) -> Tuple[bool, str, str]:
+        """经 OpenSSH 执行命令；timeout 为总时长上限，stdout/stderr 按 limit 截断"""
+        try:
+            proc = subprocess.run(argv + [command], capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False, "", f"timeout after {timeout:.1f}s"
+        except Exception as e:
+            return False, "", str(e)
+        return (proc.returncode == 0,
+                cls._cap_output(proc.stdout, limit).strip().decode('utf-8', errors='ignore'),
+                cls._cap_output(proc.stderr, limit).strip().decode('utf-8', errors='ignore'))
+
     def _is_windows_system(self, ssh: paramiko.SSHClient) -> bool:
         """检测远程系统是否为Windows"""
         # 尝试执行Windows和Linux命令来检测系统类型
@@ -183,12 +1130,62 @@ class OptimizedClusterManager:
             return True
         
         success, output, error = self._execute_remote_command(ssh, "uname -s")
-        if success and "Linux" in output:
+        if success and self._classify_os(output) == 'linux':
             return False
         
         # 默认假设为Windows（基于路径格式）
         return True
     
+    # 修正：cmd 与 sh 均可解析的预检命令：系统类型（uname/ver）+ fanse 是否在 PATH（where/command -v）
+    PREFLIGHT_COMMAND = '(uname -s || ver) && (where fanse || command -v fanse)'
+    # 修正：附带路径检测的预检命令；dir 在 cmd 与 coreutils 中均存在，ls -d 兜底，以标记行判定结果
+    PREFLIGHT_PATH_COMMAND = ('(uname -s || ver) && ((where fanse || command -v fanse) || echo __NOFANSE__)'
+                              ' && ((dir "{path}" || ls -d "{path}") && echo __PATH_OK__)')
+
+    def _probe_node_batched(self, node: ClusterNode, ssh: paramiko.SSHClient, path: Optional[str] = None) -> Dict[str, any]:
+        """单次远程执行完成节点预检，返回 {os, fansetools_ok, response_time(ms)}，指定 path 时另含 path_ok
+        修正：合并系统类型、fanse 可用性、路径存在性与往返耗时探测，替代多次顺序往返；结果中的系统类型写入缓存
+        """
+        command = self.PREFLIGHT_PATH_COMMAND.format(path=path) if path else self.PREFLIGHT_COMMAND
+        start = time.time()
+        success, output, _ = self._execute_remote_command(ssh, command, node=node,
+                                                          total_timeout=self._adaptive_timeout(node))
+        response_time = round((time.time() - start) * 1000, 2)
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        if not lines:
+            # 无法解析（如默认 shell 为 PowerShell），回退到逐条检测
+            os_type = 'windows' if self._is_windows_system(ssh) else 'linux'
+        else:
+            os_type = self._classify_os(lines[0])
+        self._remember_os(node, os_type)
+        if not path:
+            return {
+                'os': os_type,
+                'fansetools_ok': success and len(lines) > 1,
+                'response_time': response_time,
+            }
+        if lines:
+            path_ok = '__PATH_OK__' in output
+        else:
+            path_ok = (self._test_windows_path if os_type == 'windows' else self._test_linux_path)(ssh, path)
+        return {
+            'os': os_type,
+            'fansetools_ok': len(lines) > 1 and '__NOFANSE__' not in output,
+            'response_time': response_time,
+            'path_ok': path_ok,
+        }
+
+    def _get_os(self, node: ClusterNode, ssh: paramiko.SSHClient, refresh: bool = False) -> str:
+        """返回节点操作系统类型（'windows'/'linux'），首次探测后按节点名缓存"""
+        os_type = None if refresh else self._os_cache.get(node.name)
+        if os_type is None:
+            os_type = self._probe_node_batched(node, ssh)['os']
+        return os_type
+
+    def _is_windows_node(self, node: ClusterNode, ssh: paramiko.SSHClient) -> bool:
+        """节点是否为 Windows（使用缓存的系统类型）"""
+        return self._get_os(node, ssh) == 'windows'
+
     def _test_windows_path(self, ssh: paramiko.SSHClient, path: str) -> bool:
         """专门测试Windows路径存在性"""
         # 多种Windows路径验证方法
@@ -202,7 +1199,6 @@ class OptimizedClusterManager:
             success, output, error = self._execute_remote_command(ssh, command)
             if success and ("EXISTS" in output or "True" in output):
                 return True
-            time.sleep(0.5)  # 短暂延迟
         
         return False
     
@@ -227,20 +1223,12 @@ class OptimizedClusterManager:
             connect_host = self._get_connect_host(node)
             print(f"🔍 测试节点连接: {node.name} ({node.user}@{connect_host}:{node.port})")
         
-        # 1. 测试网络连通性
-        if verbose:
-            print("  📡 测试网络连通性...")
-        if not self._test_network_connectivity(self._get_connect_host(node), node.port):  # 修改：使用解析后的连接地址
-            if verbose:
-                print("  ❌ 网络连接失败")
-            return False
-        if verbose:
-            print("  ✅ 网络连通性正常")
-        
-        # 2. 建立SSH连接
+        # 1. 建立SSH连接
+        # 修正：不再单独做 TCP 端口探测，连接失败（拒绝/超时）由 _create_ssh_connection 报告；池中已有活跃会话时直接复用
         if verbose:
             print("  🔌 建立SSH连接...")
-        ssh = self._create_ssh_connection(node)
+        # 修正：复用连接池中的会话，add_node 的 SSH 步骤与此处共用同一次握手
+        ssh = self._get_ssh(node)
         if not ssh:
             if verbose:
                 print("  ❌ SSH连接失败")
@@ -249,36 +1237,36 @@ class OptimizedClusterManager:
             print("  ✅ SSH连接成功")
         
         try:
-            # 3. 检测操作系统类型
+            # 2. 检测操作系统类型
+            # 修正：系统类型与路径存在性在同一次远程执行中探测
             if verbose:
                 print("  💻 检测操作系统...")
-            is_windows = self._is_windows_system(ssh)
+            probe = self._probe_node_batched(node, ssh, path=node.fanse_path or None)
+            is_windows = probe['os'] == 'windows'
             if verbose:
                 print(f"  ✅ 检测为: {'Windows' if is_windows else 'Linux'}")
             
-            # 4. 验证路径存在性（修正：Windows/Linux 节点路径非必填，若提供则尝试验证）
+            # 3. 验证路径存在性（修正：Windows/Linux 节点路径非必填，若提供则尝试验证）
             if is_windows:
                 if node.fanse_path:
                     if verbose:
                         print(f"  📁 验证路径: {node.fanse_path}")
-                    path_ok = self._test_windows_path(ssh, node.fanse_path)
-                    if verbose:
-                        print("  ✅ 路径验证成功" if path_ok else "  ⚠️ 路径不可访问（可稍后更新）")
+                        print("  ✅ 路径验证成功" if probe['path_ok'] else "  ⚠️ 路径不可访问（可稍后更新）")
                 if verbose:
                     print("  ✅ Windows 节点连接通过")
                 return True
             else:
                 # Linux 节点：若未提供路径，直接认为连接成功；若提供路径，则尝试验证但失败不阻断
-                if node.fanse_path:
-                    if verbose:
-                        print(f"  📁 验证路径: {node.fanse_path}")
-                    _ = self._test_linux_path(ssh, node.fanse_path)
+                if node.fanse_path and verbose:
+                    print(f"  📁 验证路径: {node.fanse_path}")
                 if verbose:
                     print("  ✅ Linux 节点连接与环境检测通过")
                 return True
                 
-        finally:
-            ssh.close()
+        except Exception:
+            # 修正：会话异常时移出连接池，由池负责关闭
+            self._drop_ssh(node.name)
+            raise
     
     def add_node(self, name: str, host: str, user: str, fanse_path: Optional[str] = None, 
                  key_path: Optional[str] = None, password: Optional[str] = None, port: int = 22, ip: Optional[str] = None) -> bool:
@@ -302,28 +1290,30 @@ class OptimizedClusterManager:
         print("=" * 60)
         
         # 分步测试并提供详细反馈
-        steps = [
-            ("网络连通性", self._test_network_connectivity, (self._get_connect_host(node), port)),  # 修改：使用解析后的连接地址
-            ("SSH连接", lambda: bool(self._create_ssh_connection(node)), ()),
-            ("环境检测", self.test_node_connection, (node, False))
-        ]
-        
-        for step_name, test_func, test_args in steps:
-            print(f"🔍 测试{step_name}...", end=" ")
-            try:
-                if test_func(*test_args):
-                    print("✅")
-                else:
-                    print("❌")
-                    raise Exception(f"{step_name}测试失败")
-            except Exception as e:
-                print(f"❌ ({e})")
-                return False
+        # 修正：SSH 会话进入连接池，环境检测复用该会话（不再重复握手）；网络不可达由 SSH 连接步骤直接报告，省去单独的 TCP 探测
+        print("🔍 测试SSH连接...", end=" ")
+        if not self._get_ssh(node):
+            print("❌ (SSH连接测试失败)")
+            return False
+        print("✅")
+        print("🔍 测试环境检测...", end=" ")
+        try:
+            env_ok = self.test_node_connection(node, False)
+        except Exception as e:
+            print(f"❌ ({e})")
+            self._drop_ssh(name)
+            return False
+        if not env_ok:
+            print("❌ (环境检测测试失败)")
+            self._drop_ssh(name)
+            return False
+        print("✅")
         # 修正：添加阶段不再强制部署FANSe3，后续可通过 update 命令更新路径
         
         # 保存节点配置
         self.nodes[name] = node
         self._save_cluster_config()
+        self.reload(force=True)  # 修正：节点表变更写盘后失效进程内缓存，共享的管理器下次访问时按磁盘内容重新加载
         
         print("=" * 60)
         print(f"✅ 节点 '{name}' 添加成功!")
@@ -336,8 +1326,10 @@ class OptimizedClusterManager:
         print("=" * 60)
         return True
     
-    def _deploy_fanse_to_remote(self, node: ClusterNode, ssh: paramiko.SSHClient) -> bool:
-        """自动部署FANSe3到远程节点"""
+    def _deploy_fanse_to_remote(self, node: ClusterNode, ssh: paramiko.SSHClient, payload: Optional[bytes] = None) -> bool:
+        """自动部署FANSe3到远程节点
+        修正：payload 为已读入内存的可执行文件内容（多节点部署时共享），为空时从本地文件读取
+        """
         try:
             # 1. 查找本地FANSe3可执行文件
             local_fanse = self._find_local_fanse_executable()
@@ -345,86 +1337,210 @@ class OptimizedClusterManager:
                 print("  ❌❌ 未找到本地FANSe3可执行文件")
                 return False
                 
-            # 2. 通过SFTP上传文件
-            sftp = ssh.open_sftp()
-            remote_dir = os.path.dirname(node.fanse_path)
-            
-            # 3. 确保远程目录存在
-            self._ensure_remote_directory(sftp, remote_dir)
-            
-            # 4. 上传文件
-            sftp.put(str(local_fanse), node.fanse_path)
-            
-            # 5. 设置执行权限（Linux系统）
-            if not self._is_windows_system(ssh):
-                ssh.exec_command(f'chmod +x "{node.fanse_path}"')
+            # 修正：Linux 节点通过 exec 通道以 cat 管道推送，省去 SFTP 子系统初始化；Windows 节点仍使用 SFTP
+            if not self._is_windows_node(node, ssh):
+                return self._push_file_via_exec(ssh, local_fanse, node.fanse_path, executable=True, payload=payload)
+
+            # 2. 通过SFTP上传文件（修正：复用池化连接上缓存的 SFTP 通道，重复部署不再重新打开子系统）
+            sftp = self._get_sftp(node, ssh)
+            self._sftp_active.add(node.name)
+            try:
+                # 修正：Windows 路径按 / 统一后再取目录，否则在非 Windows 控制端上 dirname 得到空串
+                remote_dir = os.path.dirname(node.fanse_path.replace('\\', '/'))
                 
-            sftp.close()
+                # 3. 确保远程目录存在
+                self._ensure_remote_directory(sftp, remote_dir, ssh=ssh)
+                
+                # 4. 上传文件（修正：putfo 直接上传，confirm=False 省去 paramiko 内部的 stat，结束时仅做一次大小校验）
+                if payload is not None:
+                    size = len(payload)
+                    sftp.putfo(io.BytesIO(payload), node.fanse_path, file_size=size, confirm=False)
+                else:
+                    size = local_fanse.stat().st_size
+                    with open(local_fanse, 'rb') as f:
+                        sftp.putfo(f, node.fanse_path, file_size=size, confirm=False)
+                remote_size = sftp.stat(node.fanse_path).st_size
+                if remote_size != size:
+                    print(f"  ❌❌ 上传大小不一致: 本地 {size} 字节，远端 {remote_size} 字节")
+                    return False
+            except (paramiko.ChannelException, paramiko.SSHException, EOFError, socket.error):
+                self._drop_sftp(node.name)
+                raise
+            finally:
+                self._sftp_active.discard(node.name)
             return True
             
         except Exception as e:
             print(f"  ❌❌ 部署失败: {e}")
             return False
 
-    def _find_local_fanse_executable(self) -> Optional[Path]:
-        """查找本地FANSe3可执行文件"""
-        # 搜索常见位置
+    # 修正：exec 通道推送文件时使用的窗口与分块大小，减少停等
+    PUSH_WINDOW_SIZE = 2 * 1024 * 1024
+    PUSH_CHUNK_SIZE = 1 << 20
+    SFTP_MAX_PACKET_SIZE = 1 << 15
+
+    def _get_sftp(self, node: ClusterNode, ssh: paramiko.SSHClient) -> paramiko.SFTPClient:
+        """获取节点池化连接上的 SFTP 通道：同一传输上已打开且未关闭则复用，否则新开并缓存
+        SFTP 通道使用与 exec 推送相同的大窗口，高延迟链路上不再受默认窗口限制
+        """
+        transport = ssh.get_transport()
+        sftp = self._sftp_pool.get(node.name)
+        if sftp is not None:
+            channel = sftp.get_channel()
+            if channel is not None and not channel.closed and channel.get_transport() is transport:
+                return sftp
+            self._drop_sftp(node.name)
+        sftp = paramiko.SFTPClient.from_transport(transport, window_size=self.PUSH_WINDOW_SIZE,
+                                                  max_packet_size=self.SFTP_MAX_PACKET_SIZE)
+        self._sftp_pool[node.name] = sftp
+        return sftp
+
+    def _drop_sftp(self, node_name: str) -> None:
+        sftp = self._sftp_pool.pop(node_name, None)
+        if sftp is not None:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+
+    def _ensure_remote_directory(self, sftp: paramiko.SFTPClient, remote_dir: str, ssh: Optional[paramiko.SSHClient] = None) -> None:
+        """确保 Windows 远端目录存在
+        修正：给定 ssh 时以一次 cmd 往返（mkdir 自动创建中间目录）完成，替代逐级 stat/mkdir 的多次往返；
+        默认 shell 非 cmd 等情况下执行失败时回退到 SFTP 逐级创建
+        """
+        remote_dir = remote_dir.rstrip('/')
+        if not remote_dir or remote_dir.endswith(':'):
+            return
+        if ssh is not None:
+            win_dir = remote_dir.replace('/', '\\')
+            success, _, _ = self._execute_remote_command(ssh, f'if not exist "{win_dir}\\" mkdir "{win_dir}"')
+            if success:
+                return
+        self._ensure_remote_directory_sftp(sftp, remote_dir)
+
+    def _ensure_remote_directory_sftp(self, sftp: paramiko.SFTPClient, remote_dir: str) -> None:
+        """逐级确保远端目录存在（已存在的层级只做一次 stat）"""
+        remote_dir = remote_dir.rstrip('/')
+        if not remote_dir or remote_dir.endswith(':'):
+            return
+        try:
+            sftp.stat(remote_dir)
+            return
+        except IOError:
+            pass
+        self._ensure_remote_directory_sftp(sftp, os.path.dirname(remote_dir))
+        try:
+            sftp.mkdir(remote_dir)
+        except IOError:
+            pass
+
+    def _push_file_via_exec(self, ssh: paramiko.SSHClient, local_path: Path, remote_path: str, executable: bool = False, payload: Optional[bytes] = None) -> bool:
+        """通过 exec 通道（cat > path）推送单个文件到 Linux 节点（给定 payload 时直接发送内存内容）"""
+        remote_dir = os.path.dirname(remote_path)
+        cmd = f'cat > "{remote_path}"'
+        if remote_dir:
+            cmd = f'mkdir -p "{remote_dir}" && ' + cmd
+        if executable:
+            cmd += f' && chmod +x "{remote_path}"'
+        with self._channel_in_use(ssh) as transport:
+            channel = transport.open_session(window_size=self.PUSH_WINDOW_SIZE)
+            try:
+                channel.exec_command(cmd)
+                if payload is not None:
+                    for off in range(0, len(payload), self.PUSH_CHUNK_SIZE):
+                        channel.sendall(payload[off:off + self.PUSH_CHUNK_SIZE])
+                else:
+                    with open(local_path, 'rb') as f:
+                        while True:
+                            chunk = f.read(self.PUSH_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            channel.sendall(chunk)
+                channel.shutdown_write()
+                exit_status = channel.recv_exit_status()
+                if exit_status != 0:
+                    print(f"  ❌❌ 远端写入失败 (Code {exit_status})")
+                return exit_status == 0
+            finally:
+                channel.close()
+
+    # 修正：本地FANSe3可执行文件查找结果（键为当前目录），只缓存找到的路径，未找到时下次重新扫描
+    _local_fanse_cache: Dict[str, Path] = {}
+
+    @classmethod
+    def _scan_local_fanse_executable(cls, cwd: str) -> Optional[Path]:
+        """扫描常见位置查找本地FANSe3可执行文件（找到的路径按当前目录缓存）
+        修正：每个目录仅做一次 os.scandir，替代逐个候选文件名的 exists() 调用
+        """
+        cached = cls._local_fanse_cache.get(cwd)
+        if cached is not None:
+            return cached
         search_paths = [
-            Path.cwd(),
+            Path(cwd),
             Path.home() / 'fanse',
             Path.home() / 'FANSe3',
             Path('/opt/fanse'),
             Path('/usr/local/fanse')
         ]
-        
+        executables = ['FANSe3g.exe', 'FANSe3.exe', 'FANSe3g', 'FANSe3']
+        wanted = frozenset(executables)
         for path in search_paths:
-            if path.exists():
-                for executable in ['FANSe3g.exe', 'FANSe3.exe', 'FANSe3g', 'FANSe3']:
-                    exe_path = path / executable
-                    if exe_path.exists():
-                        return exe_path
+            try:
+                # 修正：先按文件名过滤再判断 is_file，当前目录为大数据目录时不对无关条目做类型判断
+                with os.scandir(path) as it:
+                    names = {entry.name for entry in it if entry.name in wanted and entry.is_file()}
+            except OSError:
+                continue
+            for executable in executables:
+                if executable in names:
+                    cls._local_fanse_cache[cwd] = path / executable
+                    return path / executable
         return None
+
+    def _find_local_fanse_executable(self) -> Optional[Path]:
+        """查找本地FANSe3可执行文件"""
+        return self._scan_local_fanse_executable(os.getcwd())
+
+    @classmethod
+    def invalidate(cls):
+        """清除本地FANSe3可执行文件查找缓存（安装软件、节点配置变更或替换可执行文件后调用）"""
+        cls._local_fanse_cache.clear()
     
     
-    def install_node_software(self, node: ClusterNode, install_conda: bool, install_fansetools: bool, pip_mirror: str) -> bool:
+    # 修正：cluster install 同时安装的节点数上限（安装以 pip/conda 网络下载为主，适合并发）
+    INSTALL_MAX_WORKERS = 16
+
+    def install_node_software(self, node: ClusterNode, install_conda: bool, install_fansetools: bool, pip_mirror: str, stream: bool = True) -> bool:
         """在节点上安装软件（Conda/Miniforge、git、fansetools）
         修正：读取本地 utils 安装脚本并在远端执行，统一Windows/Linux行为，避免复杂引号问题；并修复 Windows 安装器路径引号问题
+        修正：stream=False 时不分配PTY，结束后一次性读取并输出日志（无人值守场景更快）
         """
         print(f"🔧 正在节点 '{node.name}' 上执行安装任务...")
-        ssh = self._create_ssh_connection(node)
+        # 修正：安装通道复用连接池中的 SSH 会话（同一 Transport 上多路复用 exec_command）
+        ssh = self._get_ssh(node)
         if not ssh:
             print(f"❌ 无法连接到节点 '{node.name}'")
             return False
 
         try:
-            is_windows = self._is_windows_system(ssh)
+            is_windows = self._is_windows_node(node, ssh)
             utils_dir = Path(__file__).resolve().parent / 'utils'
             cmd = ""
 
             if is_windows:
                 # 修正：读取 PowerShell 安装脚本并附加调用参数
-                ps_path = utils_dir / 'install_win.ps1'
-                if not ps_path.exists():
-                    raise FileNotFoundError(str(ps_path))
-                with open(ps_path, 'r', encoding='utf-8') as f:
-                    script_body = f.read()
-                inv = [
+                script_body = _load_install_script(utils_dir / 'install_win.ps1')
+                inv = (
                     'Invoke-FansetoolsInstall',
                     f'-InstallConda:{"$true" if install_conda else "$false"}',
                     f'-InstallFansetools:{"$true" if install_fansetools else "$false"}',
                     f'-PipMirror "{pip_mirror}"'
-                ]
-                full_script = script_body + "\n" + " ".join(inv)
-                import base64
-                encoded_cmd = base64.b64encode(full_script.encode('utf-16le')).decode('utf-8')
+                )
+                encoded_cmd = _win_encoded(script_body, inv)
                 cmd = f'powershell -NoProfile -ExecutionPolicy Bypass -EncodedCommand {encoded_cmd}'
             else:
                 # 修正：读取 Bash 安装脚本并附加调用参数
-                sh_path = utils_dir / 'install_linux.sh'
-                if not sh_path.exists():
-                    raise FileNotFoundError(str(sh_path))
-                with open(sh_path, 'r', encoding='utf-8') as f:
-                    script_body = f.read()
+                script_body = _load_install_script(utils_dir / 'install_linux.sh')
                 inv = [
                     'fansetools_install',
                     f'--conda {"true" if install_conda else "false"}',
@@ -436,21 +1552,44 @@ class OptimizedClusterManager:
                 cmd = f'bash -c "{full_script_escaped}"'
 
             print(f"🚀 发送指令到 '{node.name}'...")
-            stdin, stdout, stderr = ssh.exec_command(cmd, get_pty=True)
-            for line in iter(stdout.readline, ""):
-                print(f"  [{node.name}] {line.strip()}")
-            exit_status = stdout.channel.recv_exit_status()
+            with self._channel_in_use(ssh):
+                if stream:
+                    stdin, stdout, stderr = ssh.exec_command(cmd, get_pty=True)
+                    # 修正：按 64KB 块读取并自行切分行，替代逐行阻塞 readline
+                    channel = stdout.channel
+                    pending = b''
+                    while True:
+                        chunk = channel.recv(65536)
+                        if not chunk:
+                            break
+                        pending += chunk
+                        *lines, pending = pending.split(b'\n')
+                        for line in lines:
+                            print(f"  [{node.name}] {line.decode('utf-8', errors='ignore').strip()}")
+                    if pending:
+                        print(f"  [{node.name}] {pending.decode('utf-8', errors='ignore').strip()}")
+                else:
+                    stdin, stdout, stderr = ssh.exec_command(cmd)
+                    # 修正：stdout 与 stderr 同时读取，避免任一方向写满窗口时互相等待
+                    out_raw, err_raw = self._drain_channel(stdout.channel)
+                    output = out_raw.decode('utf-8', errors='ignore')
+                    error = err_raw.decode('utf-8', errors='ignore')
+                    for line in output.splitlines():
+                        print(f"  [{node.name}] {line.strip()}")
+                    for line in error.splitlines():
+                        print(f"  [{node.name}] [STDERR] {line.strip()}")
+                exit_status = stdout.channel.recv_exit_status()
             if exit_status == 0:
+                self.invalidate()  # 修正：安装可能新增或替换了可执行文件，清除查找缓存
                 print(f"✅ 节点 '{node.name}' 任务成功")
                 return True
             else:
                 print(f"❌ 节点 '{node.name}' 任务失败 (Code {exit_status})")
                 return False
         except Exception as e:
-            print(f"❌ 安装异常: {e}")
+            print(f"❌ 节点 '{node.name}' ({self._get_connect_host(node)}) 安装异常: {e}")
+            self._drop_ssh(node.name)
             return False
-        finally:
-            ssh.close()
 
     def export_nodes(self, output_path: str) -> bool:
         """导出节点配置到文件"""
@@ -515,6 +1654,7 @@ class OptimizedClusterManager:
                 count += 1
             
             self._save_cluster_config()
+            self.reload(force=True)
             print(f"✅ 成功导入/更新 {count} 个节点")
             return True
         except Exception as e:
@@ -526,332 +1666,470 @@ class OptimizedClusterManager:
         if name not in self.nodes:
             raise ValueError(f"节点 '{name}' 不存在")
         del self.nodes[name]
+        self._drop_ssh(name)
+        self._os_cache.pop(name, None)
         self._save_cluster_config()
+        self.reload(force=True)
     
     def list_nodes(self) -> List[ClusterNode]:
         """列出所有节点"""
         return list(self.nodes.values())
     
-    def check_all_nodes_parallel(self, max_workers: int = 3, detail: bool = False) -> Dict[str, Dict[str, any]]:
+    # 修正：并行检查时相邻任务的启动间隔（秒），避免瞬时并发连接触发 sshd MaxStartups
+    CHECK_LAUNCH_STAGGER = 0.05
+
+    def _check_worker_count(self, max_workers: Optional[int] = None) -> int:
+        """并行检查线程数：显式参数 > cluster.json 中 settings.check_max_workers > min(节点数, CPU核数*4)"""
+        if not max_workers:
+            max_workers = self.settings.get('check_max_workers') or min(len(self.nodes), (os.cpu_count() or 4) * 4)
+        return max(1, int(max_workers))
+
+    @staticmethod
+    def _empty_node_info() -> Dict[str, any]:
+        """节点检查结果模板（所有字段默认 None，online 默认 False）"""
+        return {
+            'online': False,
+            'response_time': None,
+            'cpu_cores': None,
+            'cpu_usage': None,
+            'cpu_model': None,   # 修正：新增CPU型号
+            'cpu_freq_mhz': None,  # 修正：新增CPU当前频率
+            'memory_usage': None,
+            'disk_usage': None,
+            'load_avg': None,
+            'net_rx_mbps': None,
+            'net_tx_mbps': None,
+            'kernel_version': None,  # 修正：detail模式下新增Linux内核版本
+            # 修正：新增环境与路径检查结果，用于列表与筛选
+            'conda_ok': None,
+            'conda_version': None,
+            'fansetools_ok': None,
+            'fansetools_version': None,
+            'fanse_path_ok': None,
+            'temp_folder_ok': None
+        }
+
+    def _build_probe_commands(self, node: ClusterNode, is_windows: bool, detail: bool) -> Dict[str, str]:
+        """构建节点探测命令表 {字段键: 远程命令}
+        修正：探测命令与解析分离，由 _build_probe_script 合并为单次远程执行
+        """
+        # 修正：固定命令表与路径检测模板在模块级定义，此处只拷贝并填入节点路径
+        if is_windows:
+            cmds = dict(_WIN_PROBE_COMMANDS)
+            exist_fmt = _WIN_EXIST_FMT
+            detail_cmds = _WIN_DETAIL_COMMANDS
+        else:
+            cmds = dict(_LINUX_PROBE_COMMANDS)
+            exist_fmt = _LINUX_EXIST_FMT
+            detail_cmds = _LINUX_DETAIL_COMMANDS
+        if node.fanse_path:
+            cmds['fanse_path'] = exist_fmt.format(node.fanse_path)
+        if node.work_dir:
+            cmds['work_dir'] = exist_fmt.format(node.work_dir)
+        if detail:
+            cmds.update(detail_cmds)
+        return cmds
+
+    @staticmethod
+    def _parse_probe_outputs(is_windows: bool, outputs: Dict[str, Tuple[bool, str]], info: Dict[str, any]) -> None:
+        """解析探测命令输出并填充 info（单项解析失败不影响其他字段）"""
+        def get(key: str) -> Tuple[bool, str]:
+            return outputs.get(key, (False, ''))
+
+        def version_ok(success: bool, out: str, word: str) -> bool:
+            return success and (word in out or bool(_PAT_VERSION.search(out)))
+
+        def field(fn):
+            try:
+                fn()
+            except Exception:
+                pass
+
+        if is_windows:
+            def cores():
+                success, out = get('cpu_cores')
+                m_cores = _PAT_CORES.search(out) if success else None
+                if m_cores:
+                    info['cpu_cores'] = int(m_cores.group(1))
+
+            def usage():
+                success, out = get('cpu_usage')
+                m_load = _PAT_LOAD.search(out) if success else None
+                if m_load:
+                    info['cpu_usage'] = f"{m_load.group(1)}%"
+
+            def cpu_info():
+                # 修正：采集CPU型号与频率
+                success, out = get('cpu_info')
+                if success:
+                    m_name = _PAT_NAME.search(out)
+                    m_freq = _PAT_FREQ.search(out)
+                    if m_name:
+                        info['cpu_model'] = m_name.group(1).strip()
+                    if m_freq:
+                        info['cpu_freq_mhz'] = int(m_freq.group(1))
+
+            def memory():
+                success, out = get('memory')
+                if success:
+                    total = round(int(_PAT_TOTAL.search(out).group(1))/1e6, 1)
+                    free  = round(int(_PAT_FREE.search(out).group(1))/1e6, 1)
+                    used_percent = (total - free) / total * 100
+                    info['memory_usage'] = f"{(total - free):.1f}/{total:.1f} GB, {used_percent:.1f}%"
+
+            def disk():
+                success, out = get('disk')
+                if success:
+                    parts = out.split()
+                    free  = round(int(parts[1])/1e9, 1)
+                    total = round(int(parts[2])/1e9, 1)
+                    used_percent = (total - free) / total * 100
+                    info['disk_usage'] = f"C: {(total - free):.1f}/{total:.1f} GB, {used_percent:.1f}%"
+
+            def conda():
+                success, out = get('conda')
+                info['conda_ok'] = version_ok(success, out, 'conda')
+                if info['conda_ok']:
+                    info['conda_version'] = out.strip()
+
+            def net():
+                # Windows 无标准loadavg，负载均值置为'-'
+                if 'net' not in outputs:
+                    return
+                info['load_avg'] = '-'
+                success, out = get('net')
+                if success and _PROBE_SPLIT in out:
+                    out1, out2 = out.split(_PROBE_SPLIT, 1)
+                    r1 = sum(map(int, _PAT_BRX.findall(out1)))
+                    s1 = sum(map(int, _PAT_BTX.findall(out1)))
+                    r2 = sum(map(int, _PAT_BRX.findall(out2)))
+                    s2 = sum(map(int, _PAT_BTX.findall(out2)))
+                    rx_bps = max(0, r2 - r1)
+                    tx_bps = max(0, s2 - s1)
+                    info['net_rx_mbps'] = round(rx_bps * 8 / 1e6, 1)
+                    info['net_tx_mbps'] = round(tx_bps * 8 / 1e6, 1)
+
+            parsers = [cores, usage, cpu_info, memory, disk, conda, net]
+        else:
+            def cores():
+                success, out = get('cpu_cores')
+                if success and out.isdigit():
+                    info['cpu_cores'] = int(out)
+
+            def usage():
+                success, out = get('cpu_usage')
+                if success:
+                    info['cpu_usage'] = f"{float(out):.1f}%"
+
+            def cpu_info():
+                # 修正：采集CPU型号与频率（Linux）
+                success, out = get('cpu_model')
+                if not (success and out):
+                    success, out = get('cpu_model_fallback')
+                if success and out:
+                    info['cpu_model'] = out.strip()
+                # 频率（取平均MHz）
+                success, out = get('cpu_freq')
+                if success and out:
+                    info['cpu_freq_mhz'] = int(float(out))
+
+            def memory():
+                success, out = get('memory')
+                if success and out:
+                    info['memory_usage'] = out.strip()
+
+            def disk():
+                success, out = get('disk')
+                if success:
+                    info['disk_usage'] = f"/ {out.strip()}"
+
+            def conda():
+                success, out = get('conda')
+                if not version_ok(success, out, 'conda'):
+                    # 尝试直接运行
+                    success, out = get('conda_direct')
+                info['conda_ok'] = version_ok(success, out, 'conda')
+                if info['conda_ok']:
+                    info['conda_version'] = out.strip()
+
+            def net():
+                success, out = get('load_avg')
+                if success and out:
+                    info['load_avg'] = out.strip()
+                # 修正：Linux 内核版本（uname -r）
+                success, out = get('kernel')
+                if success and out:
+                    info['kernel_version'] = out.strip()
+                success, out = get('net')
+                if success and _PROBE_SPLIT in out:
+                    out1, out2 = out.split(_PROBE_SPLIT, 1)
+                    s1 = _parse_netdev(out1)
+                    s2 = _parse_netdev(out2)
+                    # 两次采样共有接口的收发增量（回环接口已在正则中排除）
+                    deltas = {iface: (s2[iface][0] - s1[iface][0], s2[iface][1] - s1[iface][1])
+                              for iface in s1.keys() & s2.keys()}
+                    # 修正：max() 单次遍历选出流量最大的接口
+                    best_iface = max(deltas.values(), key=sum, default=None)
+                    if best_iface:
+                        info['net_rx_mbps'] = round(best_iface[0] * 8 / 1e6, 1)
+                        info['net_tx_mbps'] = round(best_iface[1] * 8 / 1e6, 1)
+
+            parsers = [cores, usage, cpu_info, memory, disk, conda, net]
+
+        def fansetools():
+            success, out = get('fansetools')
+            info['fansetools_ok'] = version_ok(success, out, 'version')
+            if info['fansetools_ok']:
+                info['fansetools_version'] = out.strip()
+
+        def paths():
+            if 'fanse_path' in outputs:
+                success, out = get('fanse_path')
+                info['fanse_path_ok'] = success and 'EXISTS' in out
+            if 'work_dir' in outputs:
+                success, out = get('work_dir')
+                info['temp_folder_ok'] = success and 'EXISTS' in out
+
+        for fn in parsers + [fansetools, paths]:
+            field(fn)
+
+    # 修正：批量探测脚本中的分段与成功标记（不含 cmd/bash 特殊字符）
+    PROBE_BEGIN = '__FANSE_PROBE_BEGIN__'
+    PROBE_OK = '__FANSE_PROBE_OK__'
+
+    def _build_probe_script(self, commands: Dict[str, str], is_windows: bool) -> str:
+        """将探测命令表拼接为单条远程命令：每段以开始标记起头，命令成功时追加成功标记"""
+        parts = []
+        for key, cmd in commands.items():
+            if is_windows:
+                # cmd 中以括号分组，避免 if 等语句吞掉后续段；&& 仅绑定该段命令
+                parts.append(f'echo {self.PROBE_BEGIN}{key} & ({cmd}) && echo {self.PROBE_OK}')
+            else:
+                parts.append(f'echo {self.PROBE_BEGIN}{key}; {{ {cmd} ; }} 2>/dev/null && echo {self.PROBE_OK}')
+        return (' & ' if is_windows else '; ').join(parts)
+
+    def _split_probe_output(self, output: str) -> Dict[str, Tuple[bool, str]]:
+        """按开始标记切分批量探测输出，返回 {字段键: (成功, 输出)}"""
+        results: Dict[str, Tuple[bool, str]] = {}
+        for section in output.split(self.PROBE_BEGIN)[1:]:
+            key, _, body = section.partition('\n')
+            body = body.replace('\r', '').rstrip()
+            ok = body.endswith(self.PROBE_OK)
+            if ok:
+                body = body[:-len(self.PROBE_OK)]
+            results[key.strip()] = (ok, body.strip())
+        return results
+
+    def _probe_timeout(self, node: ClusterNode, commands: Dict[str, str]) -> float:
+        """批量探测在远端顺序执行，超时在自适应基准上按命令数追加余量"""
+        return self._adaptive_timeout(node) + 2 * len(commands)
+
+    def _run_probe_commands(self, ssh: paramiko.SSHClient, commands: Dict[str, str], node: ClusterNode, is_windows: bool) -> Dict[str, Tuple[bool, str]]:
+        """将全部探测合并为一次 exec_command 执行，省去每项探测的通道建立往返"""
+        script = self._build_probe_script(commands, is_windows)
+        _, out, _ = self._execute_remote_command(ssh, script, node=node, total_timeout=self._probe_timeout(node, commands))
+        return self._split_probe_output(out)
+
+    async def _collect_node_info_async(self, node: ClusterNode, detail: bool,
+                                       host_sem: Optional[asyncio.Semaphore] = None) -> Dict[str, any]:
+        """asyncssh 后端：单事件循环内完成连接与全部探测（仅在安装了 asyncssh 时使用）"""
+        info = self._empty_node_info()
+        host = self._get_connect_host(node)
+
+        # 1. 网络连通性与响应时间
+        start = time.time()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, node.port), timeout=2)
+            writer.close()
+        except Exception:
+            return info
+        latency = time.time() - start
+        info['response_time'] = round(latency * 1000, 2)  # ms
+        self._record_rtt(node, latency)
+
+        # 2. SSH连接
+        # 修正：与 paramiko 路径共用 known_hosts——已记录的主机按记录校验，首次连接的主机接收密钥后追加保存
+        known_name = host if node.port == 22 else f"[{host}]:{node.port}"
+        known = self._lookup_host_keys(known_name)
+        connect_kwargs = {'port': node.port, 'username': node.user,
+                          'known_hosts': str(self.known_hosts_file) if known else None}
+        if node.key_path and os.path.exists(node.key_path):
+            connect_kwargs['client_keys'] = [node.key_path]
+        elif node.password:
+            connect_kwargs['password'] = node.password
+        else:
+            return info
+        try:
+            if host_sem is not None:
+                # 修正：同一主机的握手按 HOST_CONNECT_LIMIT 排队，排队时间不计入连接超时
+                async with host_sem:
+                    conn = await asyncio.wait_for(asyncssh.connect(host, **connect_kwargs), timeout=3)
+            else:
+                conn = await asyncio.wait_for(asyncssh.connect(host, **connect_kwargs), timeout=3)
+        except Exception:
+            return info
+        info['online'] = True
+        if not known:
+            self._save_asyncssh_host_key(known_name, conn.get_server_host_key())
+
+        async def run(cmd: str, timeout: float) -> Tuple[bool, str]:
+            try:
+                result = await conn.run(cmd, check=False, timeout=timeout)
+                return result.exit_status == 0, str(result.stdout or '').strip()
+            except Exception:
+                return False, ''
+
+        try:
+            timeout = self._adaptive_timeout(node)
+            os_type = self._os_cache.get(node.name)
+            if os_type is None:
+                # 修正：系统类型由一条 cmd/sh 通用命令判定（uname 失败时回退 ver），不再顺序尝试两条命令
+                _, out = await run('uname -s || ver', timeout)
+                os_type = self._classify_os(out)
+                self._remember_os(node, os_type)
+            is_windows = os_type == 'windows'
+            commands = self._build_probe_commands(node, is_windows, detail)
+            _, out = await run(self._build_probe_script(commands, is_windows), self._probe_timeout(node, commands))
+            self._parse_probe_outputs(is_windows, self._split_probe_output(out), info)
+            # 更新节点缓存
+            node.env_info = info
+        except Exception:
+            # 静默忽略细节错误，保证主流程
+            pass
+        finally:
+            conn.close()
+        return info
+
+    async def _check_all_nodes_async(self, max_workers: int, detail: bool,
+                                     on_result: Optional[Callable[[str, Dict[str, any]], None]]) -> Dict[str, Dict[str, any]]:
+        """asyncssh 后端的并行检查：所有节点在同一事件循环中并发，连接数受 max_workers 约束"""
+        limit = asyncio.Semaphore(max_workers)
+        host_sems: Dict[str, asyncio.Semaphore] = {}
+        results: Dict[str, Dict[str, any]] = {}
+
+        async def one(idx: int, node: ClusterNode):
+            await asyncio.sleep(idx * self.CHECK_LAUNCH_STAGGER)
+            async with limit:
+                host = self._get_connect_host(node)
+                host_sem = host_sems.get(host)
+                if host_sem is None:
+                    host_sem = host_sems[host] = asyncio.Semaphore(self.HOST_CONNECT_LIMIT)
+                try:
+                    info = await self._collect_node_info_async(node, detail, host_sem)
+                except Exception:
+                    info = self._empty_node_info()
+            results[node.name] = info
+            if on_result:
+                try:
+                    on_result(node.name, info)
+                except Exception:
+                    pass
+
+        await asyncio.gather(*(one(idx, node) for idx, node in enumerate(self.nodes.values())))
+        return results
+
+    def check_all_nodes_parallel(self, max_workers: Optional[int] = None, detail: bool = False,
+                                 on_result: Optional[Callable[[str, Dict[str, any]], None]] = None) -> Dict[str, Dict[str, any]]:
         """并行检查所有节点状态，返回详细信息
         修正说明：此函数返回 {node_name: info_dict}，不再返回布尔值。
         适配调用方时需使用 info['online'] 判断在线状态。
+        修正：线程数默认随节点数扩展（见 _check_worker_count），不再固定为3
+        修正：on_result(name, info) 在每个节点完成时立即回调，慢节点不再阻塞快节点结果的展示
+        修正：单节点的全部探测合并为一次远程执行；若安装了 asyncssh 则改用单线程事件循环完成全部节点
         """
         def _collect_node_info(node: ClusterNode) -> Dict[str, any]:
             """收集单个节点的完整信息"""
-            info = {
-                'online': False,
-                'response_time': None,
-                'cpu_cores': None,
-                'cpu_usage': None,
-                'cpu_model': None,   # 修正：新增CPU型号
-                'cpu_freq_mhz': None,  # 修正：新增CPU当前频率
-                'memory_usage': None,
-                'disk_usage': None,
-                'load_avg': None,
-                'net_rx_mbps': None,
-                'net_tx_mbps': None,
-                'kernel_version': None,  # 修正：detail模式下新增Linux内核版本
-                # 修正：新增环境与路径检查结果，用于列表与筛选
-                'conda_ok': None,
-                'conda_version': None,
-                'fansetools_ok': None,
-                'fansetools_version': None,
-                'fanse_path_ok': None,
-                'temp_folder_ok': None
-            }
+            info = self._empty_node_info()
             
             # 1. 网络连通性与响应时间
+            # 修正：尚无 RTT 记录时即使已有池化连接也做一次真实 TCP 探测，避免把跳过探测的耗时（约 0ms）记为初始 RTT
+            has_rtt = node.name in self._rtt_ewma
+            pooled = has_rtt and self._has_live_connection(node)
             start = time.time()
             # 修改：优先使用 IP 进行连通性测试，避免 Linux 下主机名解析失败
-            if not self._test_network_connectivity(self._get_connect_host(node), node.port, timeout=2):
+            if not self._test_network_connectivity(self._get_connect_host(node), node.port, timeout=2, node=node, force=not has_rtt):
                 return info
-            info['response_time'] = round((time.time() - start) * 1000, 2)  # ms
+            if pooled:
+                # 修正：复用活跃连接时跳过了TCP探测，响应时间沿用历史 RTT
+                info['response_time'] = round(self._rtt_ewma[node.name] * 1000, 2)
+            else:
+                latency = time.time() - start
+                info['response_time'] = round(latency * 1000, 2)  # ms
+                self._record_rtt(node, latency)
             
-            # 2. SSH连接
+            # 2. SSH连接（修正：复用连接池中的持久连接，watch 循环不再每轮握手）
             # 修改：创建 SSH 连接时优先使用 IP
-            ssh = self._create_ssh_connection(node, timeout=3)
-            if not ssh:
-                return info
+            if self._openssh_argv(node) is not None:
+                # 修正：OpenSSH 后端下命令经 ControlMaster 主连接执行，不建立 paramiko 连接；系统类型探测兼作连接验证
+                ssh = None
+                if node.name not in self._os_cache:
+                    _, out, _ = self._execute_remote_command(None, 'uname -s || ver', node=node,
+                                                            total_timeout=self._adaptive_timeout(node))
+                    if not out:
+                        return info
+                    self._remember_os(node, self._classify_os(out))
+            else:
+                ssh = self._get_ssh(node, timeout=3)
+                if not ssh:
+                    return info
             info['online'] = True
             
             try:
-                is_windows = self._is_windows_system(ssh)
-                
-                # 3. CPU核数
-                if is_windows:
-                    cmd = 'wmic cpu get NumberOfCores /value'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and 'NumberOfCores=' in out:
-                        info['cpu_cores'] = int(out.split('NumberOfCores=')[1].strip())
-                else:
-                    cmd = 'nproc'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and out.isdigit():
-                        info['cpu_cores'] = int(out)
-                
-                # 4. CPU使用率
-                if is_windows:
-                    cmd = 'wmic cpu get loadpercentage /value'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and 'LoadPercentage=' in out:
-                        info['cpu_usage'] = f"{out.split('LoadPercentage=')[1].strip()}%"
-                    
-                    # 修正：采集CPU型号与频率
-                    cmd = 'wmic cpu get Name,CurrentClockSpeed /value'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success:
-                        m_name = re.search(r'Name=(.+)', out)
-                        m_freq = re.search(r'CurrentClockSpeed=(\d+)', out)
-                        if m_name:
-                            info['cpu_model'] = m_name.group(1).strip()
-                        if m_freq:
-                            info['cpu_freq_mhz'] = int(m_freq.group(1))
-                else:
-                    cmd = "top -bn1 | grep 'Cpu(s)' | awk '{print $2}' | cut -d'%' -f1"
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success:
-                        info['cpu_usage'] = f"{float(out):.1f}%"
-                    
-                    # 修正：采集CPU型号与频率（Linux）
-                    # 型号
-                    cmd = "lscpu | sed -n 's/Model name:\\s*//p'"
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and out:
-                        info['cpu_model'] = out.strip()
-                    else:
-                        cmd = "awk -F: '/model name/ {print $2; exit}' /proc/cpuinfo"
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and out:
-                            info['cpu_model'] = out.strip()
-                    
-                    # 频率（取平均MHz）
-                    cmd = "awk -F: '/cpu MHz/ {sum+=$2; cnt++} END {if(cnt>0) printf \"%.0f\", sum/cnt}' /proc/cpuinfo"
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and out:
-                        try:
-                            info['cpu_freq_mhz'] = int(float(out))
-                        except:
-                            pass
-                
-                # 5. 内存使用率
-                if is_windows:
-                    cmd = 'wmic OS get TotalVisibleMemorySize,FreePhysicalMemory /value'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success:
-                        total = round(int(re.search(r'TotalVisibleMemorySize=(\d+)', out).group(1))/1e6, 1)
-                        free  = round(int(re.search(r'FreePhysicalMemory=(\d+)', out).group(1))/1e6, 1)
-                        used_percent = (total - free) / total * 100
-                        info['memory_usage'] = f"{(total - free):.1f}/{total:.1f} GB, {used_percent:.1f}%"
-                else:
-                    
-                    # 修正：显示已用/总量（GB）和百分比
-                    cmd = "free -b | awk '/Mem:/ {printf \"%.1f/%.1f GB, %.1f%%\", $3/1e9, $2/1e9, ($3/$2)*100}'"
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success and out:
-                        info['memory_usage'] = out.strip()
-                
-                # 6. 本地硬盘使用情况（取根分区）
-                if is_windows:
-                    cmd = 'wmic logicaldisk get size,freespace,caption | findstr "^C:"'
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success:
-                        parts = out.split()
-                        free  = round(int(parts[1])/1e9, 1)
-                        total = round(int(parts[2])/1e9, 1)
-                        used_percent = (total - free) / total * 100
-                        info['disk_usage'] = f"C: {(total - free):.1f}/{total:.1f} GB, {used_percent:.1f}%"
-                else:
-                    # 修正：显示已用/总量与百分比
-                    cmd = "df -B1 / | tail -1 | awk '{printf \"%.1f/%.1f GB, %s\", $3/1e9, $2/1e9, $5}'"
-                    success, out, _ = self._execute_remote_command(ssh, cmd)
-                    if success:
-                        info['disk_usage'] = f"/ {out.strip()}"
-
-                # 修正：环境与路径检查（Conda/Fansetools/FANSe路径/工作目录）
-                try:
-                    if is_windows:
-                        # Conda 检查
-                        cmd = 'conda --version'
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and ('conda' in out or re.search(r'\d+\.\d+\.\d+', out)):
-                            info['conda_ok'] = True
-                            info['conda_version'] = out.strip()
-                        else:
-                            info['conda_ok'] = False
-
-                        # Fansetools 检查
-                        cmd = 'fanse --version'
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and ('version' in out or re.search(r'\d+\.\d+\.\d+', out)):
-                            info['fansetools_ok'] = True
-                            info['fansetools_version'] = out.strip()
-                        else:
-                            info['fansetools_ok'] = False
-                        
-                        # Fanse Path 检查
-                        if node.fanse_path:
-                            path_ok = self._test_windows_path(ssh, node.fanse_path)
-                            info['fanse_path_ok'] = path_ok
-                        
-                        # Temp Folder (Work Dir) 检查
-                        if node.work_dir:
-                            path_ok = self._test_windows_path(ssh, node.work_dir)
-                            info['temp_folder_ok'] = path_ok
-
-                    else:
-                        # Linux
-                        # Conda 检查
-                        cmd = 'source ~/.bashrc && conda --version'
-                        success, out, _ = self._execute_remote_command(ssh, f'bash -c "{cmd}"')
-                        if success and ('conda' in out or re.search(r'\d+\.\d+\.\d+', out)):
-                            info['conda_ok'] = True
-                            info['conda_version'] = out.strip()
-                        else:
-                             # 尝试直接运行
-                            cmd = 'conda --version'
-                            success, out, _ = self._execute_remote_command(ssh, cmd)
-                            if success and ('conda' in out or re.search(r'\d+\.\d+\.\d+', out)):
-                                info['conda_ok'] = True
-                                info['conda_version'] = out.strip()
-                            else:
-                                info['conda_ok'] = False
-
-                        # Fansetools 检查
-                        cmd = 'fanse --version'
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and ('version' in out or re.search(r'\d+\.\d+\.\d+', out)):
-                            info['fansetools_ok'] = True
-                            info['fansetools_version'] = out.strip()
-                        else:
-                            info['fansetools_ok'] = False
-                        
-                        # Fanse Path 检查
-                        if node.fanse_path:
-                            path_ok = self._test_linux_path(ssh, node.fanse_path)
-                            info['fanse_path_ok'] = path_ok
-                        
-                        # Temp Folder (Work Dir) 检查
-                        if node.work_dir:
-                            path_ok = self._test_linux_path(ssh, node.work_dir)
-                            info['temp_folder_ok'] = path_ok
-
-                except Exception as e:
-                    pass
-                
+                is_windows = self._is_windows_node(node, ssh)
+                # 3. 硬件/负载/环境/路径探测（detail模式附加负载均值与网络带宽）
+                commands = self._build_probe_commands(node, is_windows, detail)
+                outputs = self._run_probe_commands(ssh, commands, node, is_windows)
+                if ssh is None and not outputs:
+                    # OpenSSH 后端：无任何分段输出即连接失败
+                    info['online'] = False
+                    return info
+                self._parse_probe_outputs(is_windows, outputs, info)
                 # 更新节点缓存
                 node.env_info = info
-
-
-
-                # 7. 负载均值 & 网络带宽（detail模式）
-                if detail:
-                    if is_windows:
-                        # Windows 无标准loadavg，网络带宽尝试获取，每秒采样一次
-                        # 负载均值使用CPU百分比近似或置为'-'
-                        info['load_avg'] = '-'
-                        cmd = 'wmic path Win32_PerfFormattedData_Tcpip_NetworkInterface get BytesReceivedPersec,BytesSentPersec /value'
-                        success1, out1, _ = self._execute_remote_command(ssh, cmd)
-                        time.sleep(1)
-                        success2, out2, _ = self._execute_remote_command(ssh, cmd)
-                        if success1 and success2:
-                            try:
-                                r1 = sum(int(x) for x in re.findall(r'BytesReceivedPersec=(\d+)', out1))
-                                s1 = sum(int(x) for x in re.findall(r'BytesSentPersec=(\d+)', out1))
-                                r2 = sum(int(x) for x in re.findall(r'BytesReceivedPersec=(\d+)', out2))
-                                s2 = sum(int(x) for x in re.findall(r'BytesSentPersec=(\d+)', out2))
-                                rx_bps = max(0, r2 - r1)
-                                tx_bps = max(0, s2 - s1)
-                                info['net_rx_mbps'] = round(rx_bps * 8 / 1e6, 1)
-                                info['net_tx_mbps'] = round(tx_bps * 8 / 1e6, 1)
-                            except:
-                                pass
-                    else:
-                        # Linux 负载均值
-                        cmd = "cat /proc/loadavg | awk '{printf \"%s,%s,%s\", $1,$2,$3}'"
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and out:
-                            info['load_avg'] = out.strip()
-                        # 修正：Linux 内核版本（uname -r）
-                        cmd = 'uname -r'
-                        success, out, _ = self._execute_remote_command(ssh, cmd)
-                        if success and out:
-                            info['kernel_version'] = out.strip()
-                        # Linux 网络带宽，采样两次 /proc/net/dev
-                        success, out1, _ = self._execute_remote_command(ssh, 'cat /proc/net/dev')
-                        time.sleep(1)
-                        success2, out2, _ = self._execute_remote_command(ssh, 'cat /proc/net/dev')
-                        if success and success2:
-                            def parse_netdev(text):
-                                stats = {}
-                                for line in text.splitlines():
-                                    if ':' in line:
-                                        name, data = line.split(':', 1)
-                                        name = name.strip()
-                                        parts = [p for p in data.strip().split() if p]
-                                        if len(parts) >= 10:
-                                            rx = int(parts[0])
-                                            tx = int(parts[8])
-                                            stats[name] = (rx, tx)
-                                return stats
-                            s1 = parse_netdev(out1)
-                            s2 = parse_netdev(out2)
-                            best_iface = None
-                            best_delta = -1
-                            for iface in s1:
-                                if iface in s2:
-                                    drx = s2[iface][0] - s1[iface][0]
-                                    dtx = s2[iface][1] - s1[iface][1]
-                                    delta = drx + dtx
-                                    if delta > best_delta and not iface.startswith(('lo',)):
-                                        best_delta = delta
-                                        best_iface = (drx, dtx)
-                            if best_iface:
-                                info['net_rx_mbps'] = round(best_iface[0] * 8 / 1e6, 1)
-                                info['net_tx_mbps'] = round(best_iface[1] * 8 / 1e6, 1)
-                        
             except Exception as e:
                 # 静默忽略细节错误，保证主流程
                 pass
-            finally:
-                ssh.close()
             
             return info
         
-        # 并行收集
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_node = {
-                executor.submit(_collect_node_info, node): node.name
-                for node in self.nodes.values()
-            }
-            
+        worker_count = self._check_worker_count(max_workers)
+        # 修正：显式选择 OpenSSH 后端时走线程池路径，以便复用 ControlMaster 主连接
+        if _HAS_ASYNCSSH and self.nodes and self.settings.get('ssh_backend') != 'openssh':
+            results = asyncio.run(self._check_all_nodes_async(worker_count, detail, on_result))
+        else:
+            # 并行收集（修正：并发上限由工作函数内的信号量控制，而非线程池大小）
+            limit = threading.Semaphore(worker_count)
+
+            def _bounded_collect(node: ClusterNode) -> Dict[str, any]:
+                with limit:
+                    return _collect_node_info(node)
+
             results = {}
-            for future in as_completed(future_to_node):
-                node_name = future_to_node[future]
-                try:
-                    results[node_name] = future.result()
-                except Exception:
-                    results[node_name] = {
-                        'online': False,
-                        'response_time': None,
-                        'cpu_cores': None,
-                        'cpu_usage': None,
-                        'memory_usage': None,
-                        'disk_usage': None
-                    }
+            with ThreadPoolExecutor(max_workers=max(1, len(self.nodes))) as executor:
+                future_to_node = {}
+                for idx, node in enumerate(self.nodes.values()):
+                    if idx:
+                        time.sleep(self.CHECK_LAUNCH_STAGGER)
+                    future_to_node[executor.submit(_bounded_collect, node)] = node.name
+
+                for future in as_completed(future_to_node):
+                    node_name = future_to_node[future]
+                    try:
+                        results[node_name] = future.result()
+                    except Exception:
+                        results[node_name] = self._empty_node_info()
+                    if on_result:
+                        try:
+                            on_result(node_name, results[node_name])
+                        except Exception:
+                            pass
             
-            # 修正：将最近一次检查结果写入本地缓存，供 list 离线展示
-            try:
-                cache = {
-                    'timestamp': time.time(),
-                    'results': results
-                }
-                self.config_dir.mkdir(parents=True, exist_ok=True)
-                with open(self.status_file, 'w', encoding='utf-8') as f:
-                    json.dump(cache, f, ensure_ascii=False, indent=2)
-            except Exception:
-                pass
-            return results
+        # 修正：将最近一次检查结果写入本地缓存，供 list 离线展示
+        try:
+            self._write_status_cache(results)
+        except Exception:
+            pass
+        return results
 
     # 在OptimizedClusterManager中添加以下方法
     def execute_with_monitoring(self, node_name: str, command: str) -> bool:
@@ -861,25 +2139,90 @@ class OptimizedClusterManager:
     def deploy_to_node(self, node_name: str) -> bool:
         """部署FANSe3到指定节点"""
         node = self.nodes.get(node_name)
-        ssh = self._create_ssh_connection(node)
+        ssh = self._get_ssh(node)
+        if not ssh:
+            return False
         return self._deploy_fanse_to_remote(node, ssh)
 
-    def monitor_node_execution(self, node_name: str, command: str, quiet: bool = False, log_file: Optional[str] = None, prefix: Optional[str] = None, idle_timeout: Optional[int] = None, hard_timeout: Optional[int] = None, heartbeat_sec: int = 0, stop_event: Optional[any] = None):
+    def query_remote_file_size(self, node_name: str, path: str) -> Optional[int]:
+        """在 Windows 节点上查询文件大小（字节）；节点默认 shell 不是 cmd、文件不存在或查询失败时返回 None"""
+        node = self.nodes.get(node_name)
+        ssh = self._get_ssh(node) if node else None
+        if not ssh:
+            return None
+        success, output, _ = self._execute_remote_command(ssh, _OUTSIZE_QUERY_FMT.format(path), node=node,
+                                                          total_timeout=self._adaptive_timeout(node))
+        lines = output.splitlines()
+        if not success or not lines or not lines[-1].strip().isdigit():
+            return None
+        return int(lines[-1].strip())
+
+    # 修正：并行部署的默认并发上限（上传受本地出口带宽限制，并发过高无收益）
+    DEPLOY_MAX_WORKERS = 4
+
+    def deploy_to_all(self, node_names: Optional[List[str]] = None, max_workers: Optional[int] = None) -> Dict[str, bool]:
+        """并行部署FANSe3到多个节点（默认全部节点）
+        修正：本地可执行文件只读取一次，各节点共享同一份内容；并发数由 settings.deploy_max_workers 或 DEPLOY_MAX_WORKERS 限定
+        """
+        names = list(node_names) if node_names else list(self.nodes.keys())
+        if not names:
+            return {}
+        local_fanse = self._find_local_fanse_executable()
+        if not local_fanse:
+            print("  ❌❌ 未找到本地FANSe3可执行文件")
+            return {name: False for name in names}
+        payload = local_fanse.read_bytes()
+
+        def _deploy(name: str) -> bool:
+            node = self.nodes.get(name)
+            if not node:
+                print(f"  ❌ 节点不存在: {name}")
+                return False
+            ssh = self._get_ssh(node)
+            if not ssh:
+                return False
+            return self._deploy_fanse_to_remote(node, ssh, payload=payload)
+
+        workers = max_workers or self.settings.get('deploy_max_workers') or self.DEPLOY_MAX_WORKERS
+        results: Dict[str, bool] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(names)))) as executor:
+            futures = {executor.submit(_deploy, name): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = bool(future.result())
+                except Exception as e:
+                    print(f"  ❌❌ {name} 部署失败: {e}")
+                    results[name] = False
+                print(f"  {'✅' if results[name] else '❌'} {name} 部署{'完成' if results[name] else '失败'}", flush=True)
+        return results
+
+    # 修正：monitor_node_execution 单次等待通道可读的最长时间（秒）
+    MONITOR_MAX_WAIT = 1.0
+    # 修正：单次 recv 读取上限提升到 64KB，输出密集时每次唤醒即可取空通道缓冲
+    MONITOR_RECV_SIZE = 65536
+
+    def monitor_node_execution(self, node_name: str, command: str, quiet: bool = False, log_file: Optional[str] = None, prefix: Optional[str] = None, idle_timeout: Optional[int] = None, hard_timeout: Optional[int] = None, heartbeat_sec: int = 0, stop_event: Optional[any] = None, pty: bool = True):
         """实时监控远程节点执行（支持静默、日志、心跳与超时）
         修改说明：
         - 增加 idle_timeout：长时间无输出判定假死并主动结束
         - 增加 hard_timeout：总时长限制，超时后主动结束
         - 增加 heartbeat_sec：启用SSH keepalive，避免长连接被断开
         - 增加 stop_event：控制端触发中止时立即结束远端执行
+        - 增加 pty：是否分配伪终端（默认分配：远端程序在 PTY 下按行输出，回车刷新的进度行实时可见，idle_timeout 不会误判；
+          pty=False 时 stdout/stderr 分离，但 Windows 上 FANSe3 的输出会进入块缓冲）
         """
         node = self.nodes.get(node_name)
         if not node:
             raise ValueError(f"节点不存在: {node_name}")
         
-        ssh = self._create_ssh_connection(node)
+        ssh = self._get_ssh(node)
         if not ssh:
             return False
         
+        channel = None
+        sel = None
+        lf = None
         try:
             # 创建交互式会话
             transport = ssh.get_transport()
@@ -890,19 +2233,30 @@ class OptimizedClusterManager:
             except Exception:
                 pass
             channel = transport.open_session()
+            self._mark_channel(transport, 1)
             
-            # 设置伪终端以获得实时输出
-            channel.get_pty()
+            # 修正：伪终端可按需关闭（pty=False），默认仍分配以获得实时输出
+            if pty:
+                channel.get_pty()
             channel.exec_command(command)
+            # 修正：读取均由 recv_ready/select 驱动，通道设为非阻塞
+            channel.settimeout(0.0)
             
             # 实时读取输出（修正：稳健解码，避免UTF-8解码错误；支持静默、写日志、超时与心跳）
-            lf = None
             if log_file:
                 try:
                     os.makedirs(os.path.dirname(log_file), exist_ok=True)
                     lf = open(log_file, 'a', encoding='utf-8', errors='ignore')
                 except Exception:
                     lf = None
+            # 修正：以通道 fileno 的可读事件替代固定 sleep(0.1) 轮询，空闲时阻塞等待数据
+            sel = selectors.DefaultSelector()
+            sel.register(channel.fileno(), selectors.EVENT_READ)
+            # 修正：远端输出按行缓冲后批量写出，每次唤醒只 flush 一次；按整行解码，跨 recv 截断的多字节字符得以完整保留
+            # 修正：Windows 节点的输出按 GBK 回退解码（控制台与日志一致）
+            encoding = 'gbk' if self._os_cache.get(node_name, node.os_type) == 'windows' else 'utf-8'
+            out_writer = _PrefixedLineWriter(f"{prefix} " if prefix else "", encoding, log=lf, echo=not quiet)
+            err_writer = _PrefixedLineWriter(f"{prefix} [STDERR] " if prefix else "[STDERR] ", encoding, log=lf, echo=not quiet)
             start_time = time.time()
             last_activity = start_time
             while True:
@@ -919,43 +2273,25 @@ class OptimizedClusterManager:
                     except Exception:
                         pass
                     return False
-                if channel.recv_ready():
-                    raw = channel.recv(4096)
-                    try:
-                        data = raw.decode('utf-8', errors='ignore')
-                    except Exception:
-                        try:
-                            data = raw.decode('gbk', errors='ignore')
-                        except Exception:
-                            data = ''
-                    if data:
-                        last_activity = time.time()
-                        if lf:
-                            lf.write(data)
-                        if not quiet:
-                            if prefix:
-                                print(f"{prefix} {data}", end='', flush=True)
-                            else:
-                                print(data, end='', flush=True)
-                if channel.recv_stderr_ready():
-                    raw_err = channel.recv_stderr(4096)
-                    try:
-                        data_err = raw_err.decode('utf-8', errors='ignore')
-                    except Exception:
-                        try:
-                            data_err = raw_err.decode('gbk', errors='ignore')
-                        except Exception:
-                            data_err = ''
-                    if data_err:
-                        last_activity = time.time()
-                        if lf:
-                            lf.write(data_err)
-                        if not quiet:
-                            if prefix:
-                                print(f"{prefix} [STDERR] {data_err}", end='', flush=True)
-                            else:
-                                print(f"[STDERR] {data_err}", end='', flush=True)
-                if channel.exit_status_ready():
+                # 修正：每次唤醒把已缓冲的 stdout/stderr 全部读空，一批输出只对应一次 select 与一次 flush
+                got = False
+                while channel.recv_ready():
+                    raw = channel.recv(self.MONITOR_RECV_SIZE)
+                    if not raw:
+                        break
+                    got = True
+                    out_writer.feed(raw)
+                while channel.recv_stderr_ready():
+                    raw_err = channel.recv_stderr(self.MONITOR_RECV_SIZE)
+                    if not raw_err:
+                        break
+                    got = True
+                    err_writer.feed(raw_err)
+                if got:
+                    last_activity = time.time()
+                    out_writer.flush()
+                    err_writer.flush()
+                if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
                     break
                 # 修正：假死与超时检测
                 now = time.time()
@@ -983,29 +2319,45 @@ class OptimizedClusterManager:
                     except Exception:
                         pass
                     return False
-                time.sleep(0.1)
-            if lf:
-                try:
-                    lf.close()
-                except Exception:
-                    pass
+                # 等待时长取空闲/总时长剩余与 1 秒的最小值，保证超时与 stop_event 的及时响应
+                wait = self.MONITOR_MAX_WAIT
+                if hard_timeout and hard_timeout > 0:
+                    wait = min(wait, hard_timeout - (now - start_time))
+                if idle_timeout and idle_timeout > 0:
+                    wait = min(wait, idle_timeout - (now - last_activity))
+                sel.select(max(0.0, wait))
             
+            out_writer.flush(final=True)
+            err_writer.flush(final=True)
             exit_status = channel.recv_exit_status()
             return exit_status == 0
             
         finally:
-            ssh.close()
+            if sel is not None:
+                sel.close()
+            if lf:
+                try:
+                    lf.close()
+                except Exception:
+                    pass
+            # 修正：仅关闭本次会话通道，SSH连接保留在连接池中复用
+            if channel is not None:
+                try:
+                    channel.close()
+                except Exception:
+                    pass
+                self._mark_channel(transport, -1)
 
     # 修正：新增远程进程终止（Windows 节点）
     def kill_remote_fanse_processes(self, node_name: str) -> bool:
         node = self.nodes.get(node_name)
         if not node:
             return False
-        ssh = self._create_ssh_connection(node)
+        ssh = self._get_ssh(node)
         if not ssh:
             return False
         try:
-            is_windows = self._is_windows_system(ssh)
+            is_windows = self._is_windows_node(node, ssh)
             if is_windows:
                 cmds = [
                     'taskkill /F /IM FANSe3g.exe /T',
@@ -1020,8 +2372,12 @@ class OptimizedClusterManager:
                 return True
         except Exception:
             return False
-        finally:
-            ssh.close()
+
+
+@functools.lru_cache(maxsize=4)
+def get_manager(config_dir: Path) -> OptimizedClusterManager:
+    """获取进程内单例的集群管理器（按配置目录缓存），避免各子命令重复读取并解析 cluster.json"""
+    return OptimizedClusterManager(config_dir)
 
 
 # 优化后的cluster_command函数
@@ -1033,7 +2389,7 @@ def cluster_command(args):
         show_cluster_help(args)
         return 0
 
-    cluster_mgr = OptimizedClusterManager(get_config_dir())
+    cluster_mgr = get_manager(get_config_dir())
     
     try:
         if args.cluster_command == 'config':
@@ -1091,7 +2447,14 @@ def cluster_command(args):
                 node.enabled = False; changed.append('enabled=FALSE')
             if getattr(args, 'work_dir', None):
                 node.work_dir = args.work_dir; changed.append('work_dir')
+            # 修正：地址/认证可能已变更，丢弃旧的池化连接
+            cluster_mgr._drop_ssh(name)
+            cluster_mgr._os_cache.pop(name, None)
+            if 'host' in changed or 'ip' in changed:
+                node.os_type = None  # 修正：地址变更后可能是另一台机器，重新探测系统类型
             cluster_mgr._save_cluster_config()
+            cluster_mgr.reload(force=True)
+            node = cluster_mgr.nodes.get(name, node)
             print(f"✅ 节点 '{name}' 已更新: {', '.join(changed) if changed else '无变更'}")
             if getattr(args, 'test', False):
                 print(f"🔍 变更后测试节点 '{name}'...")
@@ -1113,13 +2476,11 @@ def cluster_command(args):
                 
             print("🏢 集群节点列表:")
             # 离线读取缓存
-            status_map = {}
-            try:
-                with open(cluster_mgr.status_file, 'r', encoding='utf-8') as f:
-                    cache = json.load(f)
-                    status_map = cache.get('results', {}) or {}
-            except Exception:
-                status_map = {}
+            # 修正：同一进程内已有检查结果时直接复用，避免重新读取并解析缓存文件
+            if cluster_mgr._last_status_map is not None:
+                status_map = cluster_mgr._last_status_map
+            else:
+                status_map = cluster_mgr._read_status_cache().get('results', {}) or {}
 
             if getattr(args, 'table', False):
                 headers = ['Node_name','Online','Resp(ms)','CPU_usage','Mem_usage','Disk_usage','Address','Path','Auth']
@@ -1141,18 +2502,17 @@ def cluster_command(args):
                         address += f" (name: {node.host})"
                     path = node.fanse_path if node.fanse_path else '-'
                     auth = '密钥' if node.key_path else '密码'
-                    row = [
-                        f"{node.name:<10}",
-                        f"{'在线' if is_online else '离线':<10}",
-                        f"{(str(rt) if rt is not None else '-'):<10}",
-                        f"{(str(cores) if cores is not None else '-'):<10}",
-                        f"{(cpu if cpu is not None else '-'):<10}",
-                        f"{(mem if mem is not None else '-'):<10}",
-                        f"{address:<24}",
-                        f"{path:<24}",
-                        f"{auth:<8}"
-                    ]
-                    print(" ".join(row))
+                    print(_ROW_FMT_LIST.format(
+                        node.name,
+                        '在线' if is_online else '离线',
+                        str(rt) if rt is not None else '-',
+                        str(cores) if cores is not None else '-',
+                        str(cpu) if cpu is not None else '-',
+                        str(mem) if mem is not None else '-',
+                        address,
+                        path,
+                        auth
+                    ))
                 print("-" * 120)
             else:
                 print("-" * 80)
@@ -1186,9 +2546,36 @@ def cluster_command(args):
             iterations = getattr(args, 'count', 0) or 0
             run_forever = interval > 0 and iterations == 0
             loop_count = iterations if iterations > 0 else 1
+
+            def _print_partial(name: str, info: Dict[str, any]):
+                rt = info.get('response_time')
+                print(f"  {'✅' if info.get('online') else '❌'} {name} 检查完成 ({rt if rt is not None else '-'} ms)", flush=True)
+
+            def _collect(on_result: Callable[[str, Dict[str, any]], None] = _print_partial) -> Tuple[Dict[str, Dict], float]:
+                t0 = time.time()
+                result = cluster_mgr.check_all_nodes_parallel(detail=getattr(args, 'detail', False), on_result=on_result)
+                return result, time.time() - t0
+
+            # 修正：预取线程中不直接打印，只记录各节点的完成事件，取用结果时由主线程按顺序输出
+            prefetched_partials: List[Tuple[str, Dict[str, any]]] = []
+
+            def _record_partial(name: str, info: Dict[str, any]):
+                prefetched_partials.append((name, info))
+
+            # 修正：watch 模式在等待间隔末段提前发起下一轮采集，采集与等待重叠，采集耗时小于间隔时刷新无额外延迟
+            prefetch_pool = ThreadPoolExecutor(max_workers=1)
+            pending = None
+            collect_time = 0.0
             try:
                 while True:
-                    status_map = cluster_mgr.check_all_nodes_parallel(detail=getattr(args, 'detail', False))
+                    if pending is None:
+                        status_map, collect_time = _collect()
+                    else:
+                        status_map, collect_time = pending.result()
+                        pending = None
+                        for name, info in prefetched_partials:
+                            _print_partial(name, info)
+                        prefetched_partials.clear()
                     if not status_map:
                         print("📭 集群中暂无节点")
                         return
@@ -1198,10 +2585,9 @@ def cluster_command(args):
 
                     # 行1：核心硬件与负载信息
                     headers1 = ['Node_name','Online','Resp(ms)','CPU_usage','Mem_usage','Disk_usage','CPU型号','频率(MHz)']
-                    widths1 = [16,8,10,10,30,30,32,12]
-                    sep_len1 = sum(widths1) + len(widths1) - 1
+                    sep_len1 = sum(_CHECK_WIDTHS1) + len(_CHECK_WIDTHS1) - 1
                     print("-" * sep_len1)
-                    print(" ".join([h.ljust(w) for h, w in zip(headers1, widths1)]))
+                    print(" ".join([h.ljust(w) for h, w in zip(headers1, _CHECK_WIDTHS1)]))
                     print("-" * sep_len1)
 
 
@@ -1217,24 +2603,23 @@ def cluster_command(args):
                         model = info.get('cpu_model') or '-'
                         freq = info.get('cpu_freq_mhz')
                         freq_str = str(freq) if freq is not None else '-'
-                        row1 = [
+                        print(_ROW_FMT1.format(
                             str(name),
                             '在线' if is_online else '离线',
                             str(rt) if rt is not None else '-',
-                            cpu if cpu is not None else '-',
-                            mem if mem is not None else '-',
-                            disk if disk is not None else '-',
-                            model,
+                            str(cpu) if cpu is not None else '-',
+                            str(mem) if mem is not None else '-',
+                            str(disk) if disk is not None else '-',
+                            str(model),
                             freq_str
-                        ]
-                        print(" ".join([str(v)[:widths1[i]].ljust(widths1[i]) for i, v in enumerate(row1)]))
+                        ))
 
                     # 行2：环境与路径检查 + 可选网络信息（同时显示路径与检查结果）
                     headers2 = ['Node_name','Conda','Fansetools','Fanse_Path','Fanse_Path(ck)','TempFolder(-w)','TempFolder(ck)']
-                    widths2 = [16,16,16,28,12,28,12]
+                    widths2, row_fmt2 = _CHECK_WIDTHS2, _ROW_FMT2
                     if getattr(args, 'detail', False):
                         headers2 += ['Kernel','LoadAvg','Net RX','Net TX']
-                        widths2 += [20,16,10,10]
+                        widths2, row_fmt2 = _CHECK_WIDTHS2_DETAIL, _ROW_FMT2_DETAIL
                     sep_len2 = sum(widths2) + len(widths2) - 1
                     print("-" * sep_len2)
                     print(" ".join([h.ljust(w) for h, w in zip(headers2, widths2)]))
@@ -1258,13 +2643,13 @@ def cluster_command(args):
                         row2 = [str(name), c_str, f_str, fanse_path_str, p_ck, temp_folder_str, t_ck]
                         if getattr(args, 'detail', False):
                             row2 += [
-                                info.get('kernel_version') or '-',
-                                info.get('load_avg') or '-',
+                                str(info.get('kernel_version') or '-'),
+                                str(info.get('load_avg') or '-'),
                                 str(info.get('net_rx_mbps')) if info.get('net_rx_mbps') is not None else '-',
                                 str(info.get('net_tx_mbps')) if info.get('net_tx_mbps') is not None else '-'
                             ]
 
-                        print(" ".join([str(v)[:widths2[i]].ljust(widths2[i]) for i, v in enumerate(row2)]))
+                        print(row_fmt2.format(*row2))
 
                     print("-" * sep_len2)
 
@@ -1278,21 +2663,21 @@ def cluster_command(args):
                             loop_count -= 1
                             if loop_count <= 0:
                                 break
-                        # 修正：支持Windows下ESC立即终止watch
-                        slept = 0.0
-                        step = 0.1
-                        while slept < interval:
-                            if _HAS_MSVCRT and msvcrt.kbhit():
-                                ch = msvcrt.getch()
-                                if ch in (b'\x1b',):  # ESC键
-                                    print("🔴 监控已终止（ESC）")
-                                    return
-                            time.sleep(step)
-                            slept += step
+                        # 修正：支持ESC立即终止watch；等待剩余时间不足一次采集耗时时提前发起下一轮采集
+                        lead = min(interval, collect_time)
+                        if _wait_for_esc(interval - lead):
+                            print("🔴 监控已终止（ESC）")
+                            return
+                        pending = prefetch_pool.submit(_collect, _record_partial)
+                        if _wait_for_esc(lead):
+                            print("🔴 监控已终止（ESC）")
+                            return
                     else:
                         break
             except KeyboardInterrupt:
                 pass
+            finally:
+                prefetch_pool.shutdown(wait=False)
             # # 修正：支持 --watch 实时刷新
             # interval = max(1, min(5, getattr(args, 'watch', 0) or 0))
             # iterations = getattr(args, 'count', 0) or 0
@@ -1370,83 +2755,31 @@ def cluster_command(args):
                 
         elif args.cluster_command == 'run':
             # 修正：支持直接传 run 参数；支持 -n/--nodes 和 -p 自动选择
-            node_list = getattr(args, 'nodes', None)
-            jobs_file = getattr(args, 'jobs', None)
-            pick_n = int(getattr(args, 'p', 0) or 0)
-            wait_sec = int(getattr(args, 'wait', 0) or 0)
-            auto_yes = bool(getattr(args, 'yes', False))
-            quiet = bool(getattr(args, 'quiet', False))
-            log_dir = getattr(args, 'log_dir', None)
-            # 修正：读取运行稳定性参数
-            hard_timeout = int(getattr(args, 'timeout', 0) or 0)
-            idle_timeout = int(getattr(args, 'idle_timeout', 0) or 0)
-            heartbeat_sec = int(getattr(args, 'heartbeat', 0) or 0)
-            native_mode = bool(getattr(args, 'native', False))
-            # 修正：优先使用未知参数集合，以完整保留 -i/-r/-E 等原run参数
-            remainder = []
-            if hasattr(args, '_unknown') and args._unknown:
-                remainder.extend(list(args._unknown))
-            if getattr(args, 'command', []):
-                remainder.extend(list(getattr(args, 'command')))
-
-            def _build_remote_cmd(tokens: List[str], node_name: str) -> str:
-                # 修正：将原run参数组装为远程命令，默认前缀 'fanse run '
-                # 修正：为 -i/-r/-o 的参数值加引号，避免中文/空格路径被拆分
-                # 修正：支持 native 模式，直接调用 fanse3g.exe 并转换参数
-                
+            # 修正：run 参数在入口一次性解析为 _RunCfg，后续统一使用局部变量
+            cfg = _RunCfg.from_args(args)
+            (node_list, jobs_file, pick_n, wait_sec, auto_yes, quiet, log_dir,
+             hard_timeout, idle_timeout, heartbeat_sec, native_mode, remainder) = cfg
+            remainder = list(remainder)
+
+            # 修正：节点相关的命令参数（可执行路径、是否 Windows 引号规则）在选定节点后一次性解析，
+            # 逐作业组装时只查表，不再重复读取节点配置与 OS 缓存
+            node_cmd_ctx: Dict[str, Tuple[str, bool]] = {}
+
+            def _node_cmd_ctx(node_name: str) -> Tuple[str, bool]:
+                exe_path = "fanse3g.exe"
                 if native_mode:
                     node = cluster_mgr.nodes.get(node_name)
-                    exe_path = node.fanse_path if node and node.fanse_path else "fanse3g.exe"
-                    
-                    # 解析并转换参数: -i -> -D, -r -> -R, -o -> -O
-                    # 保留其他参数
-                    cmd_parts = [f'"{exe_path}"'] if ' ' in exe_path else [exe_path]
-                    
-                    i = 0
-                    while i < len(tokens):
-                        t = tokens[i]
-                        if t == '-i':
-                            if i + 1 < len(tokens):
-                                val = tokens[i+1].strip('"')
-                                cmd_parts.append(f'-D"{val}"')
-                                i += 2
-                                continue
-                        elif t == '-r':
-                            if i + 1 < len(tokens):
-                                val = tokens[i+1].strip('"')
-                                cmd_parts.append(f'-R"{val}"')
-                                i += 2
-                                continue
-                        elif t == '-o':
-                            if i + 1 < len(tokens):
-                                val = tokens[i+1].strip('"')
-                                cmd_parts.append(f'-O"{val}"')
-                                i += 2
-                                continue
-                        elif t == '-y': # fanse3g 不需要 -y
-                            i += 1
-                            continue
-                        else:
-                            cmd_parts.append(t)
-                            i += 1
-                    return " ".join(cmd_parts)
-                
-                # 常规 fanse run 模式
-                safe_tokens: List[str] = []
-                i = 0
-                while i < len(tokens):
-                    t = tokens[i]
-                    safe_tokens.append(t)
-                    if t in ('-i', '-r', '-o') and (i + 1) < len(tokens):
-                        v = tokens[i + 1]
-                        if not (v.startswith('"') and v.endswith('"')):
-                            v = f'"{v}"'
-                        safe_tokens.append(v)
-                        i += 2
-                        continue
-                    i += 1
-                prefix = ['fanse', 'run']
-                return " ".join(prefix + safe_tokens)
+                    if node and node.fanse_path:
+                        exe_path = node.fanse_path
+                return exe_path, cluster_mgr._os_cache.get(node_name) != 'linux'
+
+            def _build_remote_cmd(tokens: List[str], node_name: str) -> str:
+                # 修正：组装结果按 (参数, 模式, 可执行路径) 缓存，多节点/多作业相同命令不再重复拼接
+                ctx = node_cmd_ctx.get(node_name)
+                if ctx is None:
+                    ctx = node_cmd_ctx[node_name] = _node_cmd_ctx(node_name)
+                exe_path, windows = ctx
+                return _build_remote_cmd_cached(tuple(tokens), native_mode, exe_path, windows)
 
             # 修正：新增本地输出校验工具，确保作业仅在远端进程退出且输出文件非空后判定完成
             def _extract_output_path(tokens: List[str]) -> Optional[str]:
@@ -1460,23 +2793,9 @@ def cluster_command(args):
                 return None
 
             def _validate_output_nonempty(out_path: str, wait_sec: int = 30, poll_interval: float = 0.5) -> bool:
-                # 修正：轮询校验输出文件是否存在且大小>0；用于UNC网络盘写入的最终一致性等待
-                deadline = time.time() + max(0, wait_sec)
-                p = out_path.strip('"')
-                while True:
-                    try:
-                        if os.path.isfile(p):
-                            try:
-                                if os.path.getsize(p) > 0:
-                                    return True
-                            except Exception:
-                                pass
-                        # 若为目录或尚未创建文件，则继续等待直到超时
-                    except Exception:
-                        pass
-                    if time.time() >= deadline:
-                        return False
-                    time.sleep(poll_interval)
+                # 修正：校验输出文件是否存在且大小>0；用于UNC网络盘写入的最终一致性等待
+                # 修正：等待逻辑移至 _wait_for_nonempty，可用时由文件变更事件唤醒，避免多作业并发轮询
+                return _wait_for_nonempty(out_path.strip('"'), wait_sec, poll_interval)
 
             # 选择节点集合：指定 -n 或者按响应时间选择 -p 台
             selected_nodes: List[str] = []
@@ -1485,11 +2804,15 @@ def cluster_command(args):
             elif pick_n > 0:
                 # 修正：支持等待节点就绪并选择最快N台；非原生模式需确认已安装 fansetools
                 deadline = time.time() + max(0, wait_sec)
+                # 修正：首轮若已有新鲜的检查结果（本进程或 watch 写入的缓存）则直接复用，不重复探测全部节点；
+                # 等待重试时始终重新探测
+                status_map = cluster_mgr.recent_status()
                 while True:
-                    status_map = cluster_mgr.check_all_nodes_parallel()
+                    if status_map is None:
+                        status_map = cluster_mgr.check_all_nodes_parallel()
                     candidates = []
                     for name, info in status_map.items():
-                        if not info.get('online'):
+                        if name not in cluster_mgr.nodes or not info.get('online'):
                             continue
                         rt = info.get('response_time')
                         if not isinstance(rt, (int, float)):
@@ -1503,20 +2826,11 @@ def cluster_command(args):
                     if selected_nodes:
                         break
                     if wait_sec > 0 and time.time() < deadline:
-                        # 支持ESC终止等待
-                        slept = 0.0
-                        step = 0.1
-                        while slept < 2.0:
-                            if _HAS_MSVCRT and msvcrt.kbhit():
-                                ch = msvcrt.getch()
-                                if ch in (b'\x1b',):
-                                    print("🔴 已终止等待（ESC）")
-                                    selected_nodes = []
-                                    break
-                            time.sleep(step)
-                            slept += step
-                        if selected_nodes:
+                        # 支持ESC终止等待（修正：等待时长不超过剩余等待期限，到期即停止而非多睡一个周期）
+                        if _wait_for_esc(min(2.0, deadline - time.time())):
+                            print("🔴 已终止等待（ESC）")
                             break
+                        status_map = None
                         continue
                     break
             else:
@@ -1528,22 +2842,37 @@ def cluster_command(args):
 
             # 修正：运行 fanse run 时仅分发到 Windows 节点，自动跳过 Linux 节点
             # 这样避免远端无 fanse.exe 的 Linux 系统导致执行失败
+            # 修正：系统类型探测并行执行并复用连接池，后续状态汇总与作业执行不再重复握手
+            # 修正：每节点一次预检（系统类型 + 响应时间），汇总直接使用预检结果，不再额外全量检查
+            # 修正：-p 选点时刚完成的状态检查已包含响应时间且系统类型已写入 _os_cache，直接复用，不再逐节点再探测一轮
+            probed = status_map if pick_n > 0 and not node_list else {}
+
+            def _preflight(name: str) -> Optional[Dict[str, any]]:
+                info = probed.get(name)
+                os_type = cluster_mgr._os_cache.get(name)
+                if info and info.get('online') and os_type:
+                    return {'os': os_type, 'fansetools_ok': info.get('fansetools_ok'),
+                            'response_time': info.get('response_time')}
+                node_obj = cluster_mgr.nodes.get(name)
+                ssh = cluster_mgr._get_ssh(node_obj) if node_obj else None
+                if not ssh:
+                    return None
+                try:
+                    return cluster_mgr._probe_node_batched(node_obj, ssh)
+                except Exception:
+                    return None
+
             win_nodes: List[str] = []
             skipped_nodes: List[str] = []
+            preflight: Dict[str, Dict[str, any]] = {}
             try:
-                for name in selected_nodes:
-                    node_obj = cluster_mgr.nodes.get(name)
-                    ssh = cluster_mgr._create_ssh_connection(node_obj)
-                    if not ssh:
-                        skipped_nodes.append(name)
-                        continue
-                    try:
-                        if cluster_mgr._is_windows_system(ssh):
+                with ThreadPoolExecutor(max_workers=max(1, min(32, len(selected_nodes)))) as executor:
+                    for name, probe in zip(selected_nodes, executor.map(_preflight, selected_nodes)):
+                        if probe and probe['os'] == 'windows':
                             win_nodes.append(name)
+                            preflight[name] = probe
                         else:
                             skipped_nodes.append(name)
-                    finally:
-                        ssh.close()
             except KeyboardInterrupt:
                 print("\n🔴 已取消节点筛选，退出运行")
                 return 1
@@ -1553,19 +2882,15 @@ def cluster_command(args):
             if skipped_nodes:
                 print(f"⚠️ 已跳过非Windows或不可连接节点: {', '.join(skipped_nodes)}")
             selected_nodes = win_nodes
+            node_cmd_ctx.update((n, _node_cmd_ctx(n)) for n in selected_nodes)
 
             # 修正：输出可连接Windows节点列表与响应速度，便于快速确认
-            try:
-                status_map_print = cluster_mgr.check_all_nodes_parallel()
-                summary = []
-                for n in selected_nodes:
-                    info = status_map_print.get(n, {})
-                    rt = info.get('response_time')
-                    summary.append(f"{n}:{(str(rt)+'ms') if rt is not None else '-'}")
-                if summary:
-                    print(f"✅ 可连接Windows节点: {' | '.join(summary)}")
-            except Exception:
-                pass
+            summary = []
+            for n in selected_nodes:
+                rt = preflight.get(n, {}).get('response_time')
+                summary.append(f"{n}:{(str(rt)+'ms') if rt is not None else '-'}")
+            if summary:
+                print(f"✅ 可连接Windows节点: {' | '.join(summary)}")
 
             # 准备作业列表：优先使用 --jobs，其次解析 -i 模式
             jobs: List[List[str]] = []
@@ -1614,220 +2939,306 @@ def cluster_command(args):
                         print(f"📭 未解析到匹配的输入文件: {pattern}")
                         return 1
                     # 以每个文件生成一条作业，将 -i 参数替换为具体文件
+                    # 修正：公共前缀/输出目录/-y 只计算一次，逐文件仅做字符串拼接，避免每个作业重复 index/extend
                     base = tokens[:i_idx] + tokens[i_idx+2:]
-                    for f in files:
-                        jt = base + ['-i', f]
+                    if o_val:
                         # 修正：-o 为目录时，按输入文件名生成唯一输出文件，避免目录解析错误
-                        if o_val:
-                            try:
-                                out_dir = o_val.strip('"')
-                                file_base = os.path.basename(f.strip('"'))
-                                out_file = os.path.join(out_dir, f"{file_base}.fanse3")
-                                try:
-                                    oi = jt.index('-o')
-                                    if oi + 1 < len(jt):
-                                        jt[oi + 1] = out_file
-                                    else:
-                                        jt.extend(['-o', out_file])
-                                except ValueError:
-                                    jt.extend(['-o', out_file])
-                            except Exception:
-                                pass
-                        # 修正：为 fanse run 自动添加 -y，确保非交互
-                        if '-y' not in jt:
-                            jt.append('-y')
-                        jobs.append(jt)
+                        try:
+                            oi = base.index('-o')
+                            base = base[:oi] + base[oi+2:]
+                        except ValueError:
+                            pass
+                        out_prefix = os.path.join(o_val.strip('"'), '')
+                    base_t = tuple(base)
+                    # 修正：为 fanse run 自动添加 -y，确保非交互
+                    tail = () if '-y' in base_t else ('-y',)
+                    basename = os.path.basename
+                    if o_val:
+                        jobs = [[*base_t, '-i', f, '-o', f"{out_prefix}{basename(f.strip(chr(34)))}.fanse3", *tail]
+                                for f in files]
+                    else:
+                        jobs = [[*base_t, '-i', f, *tail] for f in files]
                 else:
                     # 无 -i 模式，作为单作业直接运行
                     # 修正：最少参数校验 -i 缺失
                     print("❌ 缺少必要参数: -i <输入文件或通配符>")
                     return 1
 
+            # 修正：作业列表构建完成后统一补齐 -y（--jobs 文件行可能缺省），工作线程内不再逐作业扫描
+            jobs = [jt if '-y' in jt else jt + ['-y'] for jt in jobs]
+
             # 分发并并发执行（新增：动态任务队列，支持抢占式调度）
-            job_queue = queue.Queue()
-            for j in jobs:
-                job_queue.put(j)
+            # 修正：按节点分片的队列 + 空闲节点窃取，替代所有节点共用一个 queue.Queue
+            # 修正：队列中只传递作业序号，作业参数与元数据按序号查表
+            job_queue = _WorkStealingQueues(range(len(jobs)), selected_nodes)
             print(f"🚀 将 {len(jobs)} 个作业放入动态队列，由 {len(selected_nodes)} 个节点抢占执行：{', '.join(selected_nodes)}")
 
             # 进度条初始化（tqdm），若不可用则回退为简单计数
             pbar = None
             progress_failed = 0
-            try:
-                from tqdm import tqdm  # 仅在需要时导入
-                pbar = tqdm(total=len(jobs), desc="cluster run 进度", unit="job")
-            except Exception:
-                pbar = None
+            if tqdm is not None:
+                try:
+                    pbar = tqdm(total=len(jobs), desc="cluster run 进度", unit="job")
+                except Exception:
+                    pbar = None
+
+            # 修正：Python gzip 回退路径的读写块大小（4 MiB），减少大文件解压的循环次数
+            DECOMPRESS_COPY_BUFSIZE = 4 << 20
 
-            import threading
-            lock = threading.Lock()
+            def _decompress_gz(n: str, input_path: Path, out_path: Path) -> bool:
+                # 解压逻辑：优先 pigz，失败回退到 gzip
+                decompression_success = False
+
+                # 1. 尝试 pigz
+                pigz_path = shutil.which('pigz')
+                if not pigz_path:
+                    # 尝试查找 bin 目录下的 pigz
+                    try:
+                        bin_pigz = Path(__file__).parent / "bin" / "windows" / "pigz.exe"
+                        if bin_pigz.exists():
+                            pigz_path = str(bin_pigz)
+                    except:
+                        pass
+
+                # 修正：pigz 直接写入输出文件描述符（数据不经过 Python）；去掉 fsync，
+                # 远端节点只需文件关闭后可见，无需等待落盘
+                if pigz_path:
+                    try:
+                        with open(out_path, 'wb') as f_out:
+                            subprocess.run([pigz_path, '-d', '-c', str(input_path)], 
+                                         stdout=f_out, 
+                                         check=True)
+                        decompression_success = True
+                    except Exception as e:
+                        print(f"[{n}] ⚠️ pigz 解压失败，尝试使用 Python gzip: {e}")
+                        # 如果失败，删除可能不完整的文件
+                        if out_path.exists():
+                            try:
+                                os.remove(out_path)
+                            except:
+                                pass
+
+                # 2. 回退到 Python gzip
+                if not decompression_success:
+                    try:
+                        with gzip.open(input_path, 'rb') as f_in:
+                            with open(out_path, 'wb') as f_out:
+                                shutil.copyfileobj(f_in, f_out, DECOMPRESS_COPY_BUFSIZE)
+                        decompression_success = True
+                    except Exception as e:
+                        print(f"[{n}] ❌ Python gzip 解压也失败: {e}")
+                return decompression_success
+
+            # 修正：GZ 解压结果按 (路径, mtime, 大小) 缓存到输入目录下的 .fansecache，
+            # 多个作业（如同一输入配不同参考序列）共享一次解压；并发请求同一输入时按键加锁串行
+            # 修正：缓存文件名在进程间相同，每个运行以 <key>.*.ref 引用文件登记使用；清理时只删除自己的引用，
+            # 最后一个引用者才删除缓存文件，避免删掉其他 cluster run 的远端作业仍在读取的 FASTQ
+            decomp_cache: Dict[str, Path] = {}
+            decomp_refs: Dict[str, Path] = {}
+            decomp_locks: Dict[str, threading.Lock] = {}
+            decomp_locks_guard = threading.Lock()
+            DECOMP_LOCK_STALE_SEC = 60
+
+            @contextlib.contextmanager
+            def _cache_entry_lock(cache_dir: Path, key: str):
+                # 跨进程互斥：以 O_CREAT|O_EXCL 创建 <key>.lock，只保护引用登记、结果发布与删除这类短操作；
+                # 持有者异常退出遗留的锁超过 DECOMP_LOCK_STALE_SEC 后视为失效
+                lock_path = cache_dir / f"{key}.lock"
+                while True:
+                    try:
+                        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                        break
+                    except FileExistsError:
+                        try:
+                            if time.time() - lock_path.stat().st_mtime > DECOMP_LOCK_STALE_SEC:
+                                os.remove(lock_path)
+                                continue
+                        except FileNotFoundError:
+                            continue
+                        time.sleep(0.1)
+                try:
+                    yield
+                finally:
+                    try:
+                        os.remove(lock_path)
+                    except OSError:
+                        pass
+
+            def _decompress_cached(n: str, input_path: Path) -> Optional[Path]:
+                st = input_path.stat()
+                key = hashlib.sha1(f"{input_path.resolve()}:{st.st_mtime_ns}:{st.st_size}".encode('utf-8')).hexdigest()
+                with decomp_locks_guard:
+                    key_lock = decomp_locks.setdefault(key, threading.Lock())
+                with key_lock:
+                    cached = decomp_cache.get(key)
+                    if cached is not None and cached.exists():
+                        return cached
+                    # 缓存目录与输入同目录（确保远端节点可通过UNC路径访问）
+                    cache_dir = input_path.parent / '.fansecache'
+                    cache_dir.mkdir(exist_ok=True)
+                    cached = cache_dir / f"{key}.fastq"
+                    with _cache_entry_lock(cache_dir, key):
+                        if key not in decomp_refs:
+                            fd, ref_name = tempfile.mkstemp(prefix=f"{key}.", suffix='.ref', dir=str(cache_dir))
+                            os.close(fd)
+                            decomp_refs[key] = Path(ref_name)
+                        reuse = cached.exists() and cached.stat().st_size > 0
+                    if reuse:
+                        # 其他运行已完成同一输入的解压，直接复用
+                        decomp_cache[key] = cached
+                        return cached
+                    # 修正：临时文件由 mkstemp 原子创建，名称随机，多个并发运行（不同进程）解压同一输入时不会互相覆盖
+                    fd, part_name = tempfile.mkstemp(prefix=f"{key}.{n}.", suffix='.part', dir=str(cache_dir))
+                    os.close(fd)
+                    part = Path(part_name)
+                    if not quiet:
+                        print(f"[{n}] ⏳ 正在解压 GZ 文件: {input_path.name} ...")
+                    # 修正：解压在独立的本地解压线程池中执行，并发解压数受 CPU 核数限制
+                    if not decomp_pool.submit(_decompress_gz, n, input_path, part).result():
+                        try:
+                            os.remove(part)
+                        except OSError:
+                            pass
+                        return None
+                    with _cache_entry_lock(cache_dir, key):
+                        if cached.exists() and cached.stat().st_size > 0:
+                            os.remove(part)  # 其他运行已先发布结果，保留其文件（可能正被远端读取）
+                        else:
+                            os.replace(part, cached)
+                    decomp_cache[key] = cached
+                    return cached
+
+            def _native_input(jt: List[str]) -> Tuple[int, Optional[str]]:
+                # 返回 native 作业输入参数值的下标与去引号后的路径
+                for flag in ('-i', '-D'):
+                    if flag in jt:
+                        idx = jt.index(flag) + 1
+                        if idx < len(jt):
+                            return idx - 1, jt[idx].strip('"')
+                        break
+                return -1, None
+
+            # 修正：作业元数据在分发前一次性预计算为并列数组（输入参数下标/输入路径/GZ 后缀/日志名/输出路径），
+            # 工作线程按作业序号直接查表，热路径中不再 index 扫描参数列表；GZ 文件是否存在仍在执行时检查
+            job_input_pos: List[int] = []
+            job_inputs: List[Optional[str]] = []
+            for jt in jobs:
+                pos, inp = _native_input(jt)
+                job_input_pos.append(pos)
+                job_inputs.append(inp)
+            job_is_gz = [bool(native_mode and inp and inp.lower().endswith('.gz')) for inp in job_inputs]
+            job_log_bases = [os.path.basename(inp) if inp else None for inp in job_inputs]
+            job_out_paths = [_extract_output_path(jt) for jt in jobs]
+
+            # 修正：预解压线程池，限制同时预取的解压数量（防止磁盘与内存被预取占满）
+            MAX_PREFETCH_DECOMP = 2
+            prefetch_pool = ThreadPoolExecutor(max_workers=MAX_PREFETCH_DECOMP)
+
+            # 修正：作业完成事件经无锁队列交给单一进度线程处理（进度条/计数/失败提示），
+            # 节点线程不再争用同一把进度锁
+            progress_events = queue.SimpleQueue()
+
+            def _progress_worker():
+                nonlocal progress_failed
+                while True:
+                    event = progress_events.get()
+                    if event is None:
+                        return
+                    n, ok, remote_cmd = event
+                    if pbar:
+                        pbar.update(1)
+                    else:
+                        print(f"✅ [{n}] 完成 1 项（剩余 {job_queue.qsize()}）")
+                    if not ok:
+                        progress_failed += 1
+                        if remote_cmd:
+                            print(f"❌ 节点 {n} 执行失败: {remote_cmd}")
+                        else:
+                            print(f"❌ 节点 {n} 作业预处理失败")
+
+            progress_thread = threading.Thread(target=_progress_worker, daemon=True)
+            progress_thread.start()
 
             futures = []
-            import threading
             stop_event = threading.Event()
+            # 修正：节点线程只负责 SSH 编排；本地 GZ 解压交给独立线程池（上限 min(CPU核数, 4)），
+            # 避免多个节点同时解压抢占本机 CPU 而拖慢其他节点的远端调度
+            decomp_pool = ThreadPoolExecutor(max_workers=max(1, min(os.cpu_count() or 1, 4)))
             try:
                 with ThreadPoolExecutor(max_workers=len(selected_nodes)) as executor:
                     for node in selected_nodes:
                         def run_node_jobs(n=node):
-                            nonlocal pbar, progress_failed
+                            next_i = job_queue.get(n)
+                            next_decomp = None
                             while True:
                                 if stop_event.is_set():
                                     return False
-                                try:
-                                    jt = job_queue.get(block=False)
-                                except queue.Empty:
+                                i = next_i
+                                if i is None:
                                     break
+                                jt = jobs[i]
+                                decomp_future, next_decomp = next_decomp, None
                                 
-                                # 修正：为 fanse run 自动添加 -y（双保险）
-                                if not native_mode and '-y' not in jt:
-                                    jt.append('-y')
-
                                 ok = True
-                                temp_decompressed_file = None
                                 remote_cmd = ""
-                                job_input = None
+                                job_input = job_inputs[i]
                                 
                                 # 修正：Native模式下GZ文件自动解压（本地Python解压，更可靠）
                                 try:
-                                    if native_mode:
-                                        input_idx = -1
-                                        try:
-                                            if '-i' in jt:
-                                                input_idx = jt.index('-i')
-                                            elif '-D' in jt:
-                                                input_idx = jt.index('-D')
-                                        except ValueError:
-                                            pass
-                                        
-                                        if input_idx != -1 and input_idx + 1 < len(jt):
-                                            raw_input = jt[input_idx + 1].strip('"')
-                                            job_input = raw_input # 记录原始输入
-                                            
-                                            if raw_input.lower().endswith('.gz') and os.path.exists(raw_input):
+                                    if native_mode and job_input is not None:
+                                        raw_input = job_input # 记录原始输入
+
+                                        if job_is_gz[i] and os.path.exists(raw_input):
+                                            # 修正：同一 GZ 输入在本次运行中只解压一次，后续作业直接复用；已预取时直接取结果
+                                            if decomp_future is not None:
+                                                decompressed = decomp_future.result()
+                                            else:
+                                                decompressed = _decompress_cached(n, Path(raw_input))
+                                            if decompressed:
+                                                jt[job_input_pos[i] + 1] = f'"{decompressed}"'
                                                 if not quiet:
-                                                    print(f"[{n}] ⏳ 正在解压 GZ 文件: {os.path.basename(raw_input)} ...")
-                                                
-                                                input_path = Path(raw_input)
-                                                # 尝试在同目录创建临时文件（确保远端节点可通过UNC路径访问）
-                                                temp_dir = input_path.parent
-                                                base_name = input_path.stem
-                                                ts = int(time.time() * 1000)
-                                                temp_name = f"{base_name}_{ts}_{n}.fastq"
-                                                temp_decompressed_file = temp_dir / temp_name
-                                                
-                                                # 解压逻辑：优先 pigz，失败回退到 gzip
-                                                decompression_success = False
-                                                
-                                                # 1. 尝试 pigz
-                                                pigz_path = shutil.which('pigz')
-                                                if not pigz_path:
-                                                    # 尝试查找 bin 目录下的 pigz
-                                                    try:
-                                                        bin_pigz = Path(__file__).parent / "bin" / "windows" / "pigz.exe"
-                                                        if bin_pigz.exists():
-                                                            pigz_path = str(bin_pigz)
-                                                    except:
-                                                        pass
-
-                                                if pigz_path:
-                                                    try:
-                                                        with open(temp_decompressed_file, 'wb') as f_out:
-                                                            subprocess.run([pigz_path, '-d', '-c', str(input_path)], 
-                                                                         stdout=f_out, 
-                                                                         check=True)
-                                                            f_out.flush()
-                                                            os.fsync(f_out.fileno())
-                                                        decompression_success = True
-                                                    except Exception as e:
-                                                        print(f"[{n}] ⚠️ pigz 解压失败，尝试使用 Python gzip: {e}")
-                                                        # 如果失败，删除可能不完整的文件
-                                                        if temp_decompressed_file.exists():
-                                                            try:
-                                                                os.remove(temp_decompressed_file)
-                                                            except:
-                                                                pass
-                                                
-                                                # 2. 回退到 Python gzip
-                                                if not decompression_success:
-                                                    try:
-                                                        with gzip.open(input_path, 'rb') as f_in:
-                                                            with open(temp_decompressed_file, 'wb') as f_out:
-                                                                shutil.copyfileobj(f_in, f_out)
-                                                                f_out.flush()
-                                                                os.fsync(f_out.fileno())
-                                                        decompression_success = True
-                                                    except Exception as e:
-                                                        print(f"[{n}] ❌ Python gzip 解压也失败: {e}")
-                                                
-                                                if decompression_success:
-                                                    jt[input_idx + 1] = f'"{temp_decompressed_file}"'
-                                                    if not quiet:
-                                                        print(f"[{n}] ✅ 解压完成: {temp_name}")
-                                                else:
-                                                    ok = False
+                                                    print(f"[{n}] ✅ 解压完成: {decompressed.name}")
+                                            else:
+                                                ok = False
                                 except Exception as e:
                                     print(f"[{n}] ❌ 准备作业失败(解压): {e}")
                                     ok = False
 
-                                try: # 使用 try...finally 确保清理
+                                # 修正：仅当本节点队列中的下一个作业需要 GZ 预解压时才提前领取并在后台解压，本地解压与远端执行重叠；
+                                # 其余情况在当前作业完成后再领取，未开始的作业始终留在队列中可被空闲节点窃取
+                                next_i = job_queue.get_local_if(n, job_is_gz.__getitem__)
+                                if next_i is not None and os.path.exists(job_inputs[next_i]):
+                                    next_decomp = prefetch_pool.submit(_decompress_cached, n, Path(job_inputs[next_i]))
+
+                                if ok:
+                                    remote_cmd = _build_remote_cmd(jt, n)
+                                    out_path = job_out_paths[i]
+                                    print(f"[{n}] 🚀 执行: {remote_cmd}")
+                                    
+                                    # 修正：输出管理：前缀与日志文件
+                                    log_file = None
+                                    if log_dir and job_input:
+                                        log_file = os.path.join(log_dir, f"{n}_{job_log_bases[i]}_{int(time.time())}.log")
+                                    
+                                    ok = cluster_mgr.monitor_node_execution(n, remote_cmd, quiet=quiet, log_file=log_file, prefix=f"[{n}]", idle_timeout=idle_timeout or None, hard_timeout=hard_timeout or None, heartbeat_sec=heartbeat_sec, stop_event=stop_event)
+                                    
                                     if ok:
-                                        remote_cmd = _build_remote_cmd(jt, n)
-                                        print(f"[{n}] 🚀 执行: {remote_cmd}")
-                                        
-                                        # 修正：输出管理：前缀与日志文件
-                                        if not job_input:
-                                            try:
-                                                ii = jt.index('-i')
-                                                if ii + 1 < len(jt):
-                                                    job_input = jt[ii + 1].strip('"')
-                                            except Exception:
-                                                pass
-                                        log_file = None
-                                        if log_dir and job_input:
-                                            try:
-                                                base = os.path.basename(job_input)
-                                                ts = int(time.time())
-                                                log_file = os.path.join(log_dir, f"{n}_{base}_{ts}.log")
-                                            except Exception:
-                                                log_file = None
-                                        
-                                        ok = cluster_mgr.monitor_node_execution(n, remote_cmd, quiet=quiet, log_file=log_file, prefix=f"[{n}]", idle_timeout=idle_timeout or None, hard_timeout=hard_timeout or None, heartbeat_sec=heartbeat_sec, stop_event=stop_event)
-                                        
-                                        if ok:
-                                            out_path = _extract_output_path(jt)
-                                            if out_path:
-                                                wait_after = idle_timeout if (isinstance(idle_timeout, int) and idle_timeout > 0) else 30
-                                                valid = _validate_output_nonempty(out_path, wait_sec=wait_after)
-                                                if not valid:
-                                                    ok = False
-                                                    if not quiet:
-                                                        print(f"[{n}] ⚠️ 输出文件不存在或大小为0，判定作业失败: {out_path}")
-
-                                    with lock:
-                                        if pbar:
-                                            pbar.update(1)
-                                        else:
-                                            print(f"✅ [{n}] 完成 1 项（剩余 {job_queue.qsize()}）")
-                                        if not ok:
-                                            progress_failed += 1
-                                            if remote_cmd:
-                                                print(f"❌ 节点 {n} 执行失败: {remote_cmd}")
-                                            else:
-                                                print(f"❌ 节点 {n} 作业预处理失败")
-                                finally:
-                                    # 清理临时解压文件 (确保在任何情况下都尝试清理)
-                                    if temp_decompressed_file and os.path.exists(temp_decompressed_file):
-                                        try:
-                                            os.remove(temp_decompressed_file)
-                                            if not quiet:
-                                                pass # print(f"[{n}] 🧹 已清理临时文件")
-                                        except Exception as e:
-                                            print(f"[{n}] ⚠️ 无法清理临时文件 {temp_decompressed_file}: {e}")
-
-
-                                job_queue.task_done()
-                                
+                                        # 修正：Windows 节点先在远端查询输出大小，非空时直接判定成功；查询失败或为 0 时回退本地等待校验
+                                        remote_size = cluster_mgr.query_remote_file_size(n, out_path) if (out_path and node_cmd_ctx[n][1]) else None
+                                        if out_path and not (remote_size and remote_size > 0):
+                                            wait_after = idle_timeout if (isinstance(idle_timeout, int) and idle_timeout > 0) else 30
+                                            valid = _validate_output_nonempty(out_path, wait_sec=wait_after)
+                                            if not valid:
+                                                ok = False
+                                                if not quiet:
+                                                    print(f"[{n}] ⚠️ 输出文件不存在或大小为0，判定作业失败: {out_path}")
+
+                                progress_events.put((n, ok, remote_cmd))
+
                                 if stop_event.is_set():
                                     return False
+                                if next_i is None:
+                                    next_i = job_queue.get(n)
                             return True
                         futures.append(executor.submit(run_node_jobs))
                     all_ok = True
@@ -1849,6 +3260,31 @@ def cluster_command(args):
                 print("🛑 远程作业已发送终止信号（Windows节点 taskkill）")
                 return 1
             finally:
+                progress_events.put(None)
+                progress_thread.join()
+                # 修正：停止时节点线程会丢弃已提交的预解压；先取消未开始的预取并等待进行中的解压结束
+                # （预取依赖解压线程池，须先关闭预取线程池），清理时缓存字典不再被并发修改，也不会遗留刚写完的 FASTQ
+                prefetch_pool.shutdown(wait=True, cancel_futures=True)
+                decomp_pool.shutdown(wait=True, cancel_futures=True)
+                # 清理本次运行产生的解压缓存（确保在任何情况下都尝试清理）
+                # 修正：先撤销本运行的引用，仅当没有其他运行仍引用该缓存项时才删除 FASTQ
+                for key, ref in list(decomp_refs.items()):
+                    cache_dir = ref.parent
+                    cached = cache_dir / f"{key}.fastq"
+                    try:
+                        with _cache_entry_lock(cache_dir, key):
+                            os.remove(ref)
+                            if not any(cache_dir.glob(f"{key}.*.ref")):
+                                try:
+                                    os.remove(cached)
+                                except FileNotFoundError:
+                                    pass
+                    except Exception as e:
+                        print(f"⚠️ 无法清理临时文件 {cached}: {e}")
+                    try:
+                        cache_dir.rmdir()
+                    except OSError:
+                        pass
                 if pbar:
                     pbar.close()
                 if progress_failed:
@@ -1887,21 +3323,46 @@ def cluster_command(args):
                 return 1
             
             print(f"📦 准备在 {len(target_nodes)} 个节点上安装软件...")
+            print("-" * 60)
             success_count = 0
-            for node in target_nodes:
-                print("-" * 60)
-                if cluster_mgr.install_node_software(
-                    node, 
-                    install_conda=args.conda, 
-                    install_fansetools=args.fansetools, 
-                    pip_mirror=args.pip_mirror
-                ):
-                    success_count += 1
+            # 修正：各节点并行安装（输出行均带 [节点名] 前缀，交错输出仍可区分），总耗时取决于最慢节点
+            workers = max(1, min(cluster_mgr.INSTALL_MAX_WORKERS, len(target_nodes)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        cluster_mgr.install_node_software,
+                        node,
+                        install_conda=args.conda,
+                        install_fansetools=args.fansetools,
+                        pip_mirror=args.pip_mirror,
+                        stream=not getattr(args, 'no_stream', False)
+                    ): node
+                    for node in target_nodes
+                }
+                for future in as_completed(futures):
+                    try:
+                        if future.result():
+                            success_count += 1
+                    except Exception as e:
+                        failed = futures[future]
+                        print(f"❌ 节点 '{failed.name}' ({cluster_mgr._get_connect_host(failed)}) 安装异常: {e}")
             
             print("-" * 60)
             print(f"✅ 安装完成: {success_count}/{len(target_nodes)} 成功")
             return 0 if success_count == len(target_nodes) else 1
 
+        elif args.cluster_command == 'deploy':
+            names = None
+            if args.nodes and args.nodes.lower() != 'all':
+                names = [n.strip() for n in args.nodes.split(',') if n.strip()]
+            results = cluster_mgr.deploy_to_all(names, max_workers=args.jobs)
+            if not results:
+                print("❌ 未指定有效节点")
+                return 1
+            success_count = sum(results.values())
+            print(f"✅ 部署完成: {success_count}/{len(results)} 成功")
+            return 0 if success_count == len(results) else 1
+
         else:
             print("❌ 未知的子命令")
             return 1
@@ -2139,15 +3600,23 @@ FANSe3 集群管理工具
     install_parser.add_argument('--conda', action='store_true', help='安装 Miniconda')
     install_parser.add_argument('--fansetools', action='store_true', help='安装 fansetools')
     install_parser.add_argument('--pip-mirror', help='指定 pip 镜像源', default='https://pypi.tuna.tsinghua.edu.cn/simple')
+    install_parser.add_argument('--no-stream', action='store_true', help='不实时显示远端输出（不分配PTY），安装结束后一次性输出日志')
+
+    # 部署命令（修正：原定义位于 return 之后从未注册，现接入并行部署 deploy_to_all）
+    deploy_parser = cluster_subparsers.add_parser('deploy',
+        help='部署FANSe3到节点',
+        description='将本地FANSe3可执行文件并行上传到指定节点（本地文件只读取一次）',
+        formatter_class=CustomHelpFormatter,
+    )
+    add_rich_epilog(deploy_parser, '[bold]示例:[/bold] fanse cluster deploy -n node1,node2')
+    deploy_parser.add_argument('-n', '--nodes', help='节点名称（单个或逗号分隔多个，缺省或 all 表示所有）')
+    deploy_parser.add_argument('-j', '--jobs', type=int, default=None,
+                               help='同时部署的节点数（默认取 settings.deploy_max_workers，未设置时为 4）')
 
     return cluster_parser
     
     # 在add_cluster_subparser中添加新命令
-    deploy_parser = cluster_subparsers.add_parser('deploy',   # pyright: ignore[reportUnreachable]
-        help='部署FANSe3到节点')
-    deploy_parser.add_argument('name', help='节点名称')
-
-    monitor_parser = cluster_subparsers.add_parser('monitor', 
+    monitor_parser = cluster_subparsers.add_parser('monitor',   # pyright: ignore[reportUnreachable]
         help='实时监控节点')
     monitor_parser.add_argument('name', help='节点名称')
     monitor_parser.add_argument('--command', help='要执行的命令')
@@ -2170,5 +3639,6 @@ if __name__ != "__main__":
         'add_cluster_subparser', 
         'cluster_command',
         'show_cluster_help',
-        'get_config_dir'
+        'get_config_dir',
+        'get_manager'
     ]
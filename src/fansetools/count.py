@@ -15,23 +15,29 @@ fansetools count 组件 - 用于处理fanse3文件的read计数
 
 import argparse
 from .utils.rich_help import CustomHelpFormatter
-from collections import Counter, defaultdict, deque
-from itertools import chain  # 修正：用于生成器级展开multi2all，避免构建巨大的中间列表
+from collections import Counter, deque
 from fansetools.quant import add_quant_columns, build_length_maps  # 新增：引入统一的定量计算函数
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import multiprocessing as mp
+from multiprocessing import shared_memory
+import pickle
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, TimeRemainingColumn, SpinnerColumn
 from rich.console import Console, Group
 from rich.layout import Layout
 from rich.columns import Columns
 from rich.live import Live
 import os
+import glob
+import stat
+import hashlib
 import math
+from contextlib import nullcontext
 from pathlib import Path
 import sys
 import time
 import warnings
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from tqdm.contrib.concurrent import process_map
@@ -40,13 +46,18 @@ from fansetools.gxf2refflat_plus import (
     convert_gxf_to_refflat,
     load_annotation_to_dataframe,
 )
-from fansetools.parser import FANSeRecord, fanse_parser, fanse_parser_high_performance
+from fansetools.parser import FANSeRecord, fanse_parser, fanse_ref_field_counts
 # 新增：Rust 加速解析适配层（存在时优先使用）
 try:
     from fansetools.fastcount_py import rust_fastcount_available, parse_and_count_rust
 except Exception:
     rust_fastcount_available = lambda: False
     parse_and_count_rust = None
+# 修正：可选 pyarrow，用于以 Arrow IPC 格式在共享内存中发布注释表的字符串列
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 # 修正：新增定量模块引入，用于在唯一文件中追加 TPM/RPKM 列
 try:
     from fansetools.quant import add_quant_columns, build_length_maps
@@ -63,18 +74,134 @@ except Exception:
 
 # %% ParallelFanseCounter
 
+# 修正：支持的 fanse 输入扩展名（双端解析时用于判断 paired_end 文件）
+FANSE_EXTS = frozenset({'.fanse3', '.fanse', '.fanse3.zip', '.fanse3.gz'})
+
 # Global variable for worker process annotation cache
 _worker_annotation_df = None
+_worker_annotation_shm = []  # 修正：工作进程挂载的共享内存句柄，需与注释表同生命周期
+
+
+def publish_annotation_to_shm(annotation_df):
+    """将注释表发布到共享内存，返回 (spec, 共享内存句柄列表)
+    - 数值列：复制到各自的共享内存段，工作进程以只读 ndarray 视图零拷贝挂载，不经过序列化
+    - 其余列（字符串等无法共享的对象列）与索引：仍需序列化——安装 pyarrow 时写为 Arrow IPC，否则 pickle——
+      序列化结果放入一段共享内存，每个工作进程反序列化一次并各持一份副本（Arrow 读取端按列整块转换，并对重复的基因名等字符串去重）
+    spec 只包含段名与形状，随任务传递的开销与注释表大小无关；主进程负责在结束后 close()+unlink() 全部句柄
+    """
+    handles = []
+
+    def _alloc(nbytes):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        handles.append(shm)
+        return shm
+
+    try:
+        columns = []
+        other_cols = []
+        for col in annotation_df.columns:
+            series = annotation_df[col]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+                arr = np.ascontiguousarray(series.to_numpy())
+                shm = _alloc(arr.nbytes)
+                np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[:] = arr
+                columns.append((col, shm.name, arr.dtype.str, arr.shape))
+            else:
+                columns.append((col, None, None, None))
+                other_cols.append(col)
+        payload, fmt = _serialize_annotation_columns(annotation_df[other_cols])
+        shm = _alloc(len(payload))
+        shm.buf[:len(payload)] = payload
+        spec = {'columns': columns, 'other': (shm.name, len(payload), fmt)}
+    except Exception:
+        release_annotation_shm(handles, unlink=True)
+        raise
+    return spec, handles
+
+
+def attach_annotation_from_shm(spec):
+    """在工作进程中挂载 publish_annotation_to_shm 发布的注释表，返回 (DataFrame, 需保持存活的共享内存句柄)
+    数值列为共享内存上的只读视图（不复制、不反序列化）；字符串列与索引需从共享内存反序列化（Arrow IPC 或 pickle），
+    每个工作进程持有各自的副本
+    """
+    name, size, fmt = spec['other']
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        with shm.buf[:size] as view:
+            other_df = _deserialize_annotation_columns(view, fmt)
+    finally:
+        shm.close()
+    handles = []
+    data = {}
+    for col, shm_name, dtype, shape in spec['columns']:
+        if shm_name is None:
+            data[col] = other_df[col]
+            continue
+        shm = shared_memory.SharedMemory(name=shm_name)
+        handles.append(shm)
+        arr = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False  # 各进程共享同一份数据，禁止原地修改
+        data[col] = arr
+    return pd.DataFrame(data, index=other_df.index, copy=False), handles
+
+
+def _serialize_annotation_columns(df):
+    """序列化注释表的非数值列与索引，返回 (bytes-like, 格式名)；Arrow 无法表示的列（如混合类型）回退 pickle"""
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return memoryview(sink.getvalue()).cast('B'), 'arrow'
+        except (pa.ArrowException, TypeError, ValueError):
+            pass
+    return pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), 'pickle'
+
+
+def _deserialize_annotation_columns(view, fmt):
+    """_serialize_annotation_columns 的逆操作；返回的 DataFrame 不再引用 view"""
+    if fmt == 'arrow':
+        # 先复制出共享内存：Arrow 转换结果可能零拷贝引用输入缓冲区，会阻止调用方 close() 共享内存段
+        table = pa.ipc.open_stream(pa.py_buffer(bytes(view))).read_all()
+        return _arrow_table_to_pandas(table)
+    return pickle.loads(view)
+
+
+def _arrow_table_to_pandas(table):
+    """Arrow 表转回 DataFrame：重复字符串去重；对象列中的 Arrow 空值还原为 NaN（与 read_csv 读取注释时一致）"""
+    # 工作进程可能由 fork 创建，不使用 Arrow 线程池
+    df = table.to_pandas(deduplicate_objects=True, use_threads=False)
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object and series.isna().any():
+            df[col] = series.where(series.notna(), np.nan)
+    return df
+
+
+def release_annotation_shm(handles, unlink=False):
+    """关闭共享内存句柄；unlink=True 时同时删除共享内存段（仅发布方调用）"""
+    for shm in handles:
+        try:
+            shm.close()
+            if unlink:
+                shm.unlink()
+        except Exception:
+            pass
+
 
 def process_single_file_task(task):
     """处理单个文件（独立函数，避免pickling问题）"""
-    global _worker_annotation_df
+    global _worker_annotation_df, _worker_annotation_shm
     # Notify start
     if task.get('queue') and task.get('task_index') is not None:
         try:
              task['queue'].put((task['task_index'], f"[yellow]启动: {task['file_stem']}", None, 0, None))
         except: pass    
     try:
+        # 修正：主进程已发布注释表时从共享内存挂载（每个工作进程一次），不再各自重新解析 gxf
+        if task.get('annotation_shm') and _worker_annotation_df is None:
+            _worker_annotation_df, _worker_annotation_shm = attach_annotation_from_shm(task['annotation_shm'])
         # Load annotation data if needed and not cached
         if task['gxf_file'] and _worker_annotation_df is None:
             # Reconstruct minimal args for load_annotation_data
@@ -116,8 +243,15 @@ class ParallelFanseCounter:
         if self.verbose:
             self.console.print(f"初始化并行处理器: {self.max_workers} 个进程")
 
-    def process_files_parallel(self, file_list, output_base_dir, gxf_file=None, level='gene', paired_end=None, annotation_df=None, length_mode_gene=None, length_mode_isoform='txLength', verbose=False, batch_size=None, quant='none', engine='auto', export_format='rsem', export_count_type='Final_EM'):
-        """并行处理多个文件（仅显示正在运行的任务）"""
+    @staticmethod
+    def uses_threads(engine='auto'):
+        """Rust 引擎可用且被选用时以线程并行（解析在 Rust 侧释放 GIL），否则使用进程池"""
+        return engine in ('auto', 'rust') and rust_fastcount_available() and parse_and_count_rust is not None
+
+    def process_files_parallel(self, file_list, output_base_dir, gxf_file=None, level='gene', paired_end=None, annotation_df=None, length_mode_gene=None, length_mode_isoform='txLength', verbose=False, batch_size=None, quant='none', engine='auto', export_format='rsem', export_count_type='Final_EM', annotation_shm=None):
+        """并行处理多个文件（仅显示正在运行的任务）
+        修正：annotation_shm 为 publish_annotation_to_shm 返回的 spec，工作进程据此挂载共享注释表
+        """
         if verbose:
             self.console.print(f" 开始并行处理 {len(file_list)} 个文件，使用 {self.max_workers} 个进程")
 
@@ -140,11 +274,11 @@ class ParallelFanseCounter:
                 'quant': quant,
                 'engine': engine,
                 'format': export_format,
-                'count_type': export_count_type
+                'count_type': export_count_type,
+                'annotation_shm': annotation_shm
             }
             tasks.append(task)
 
-        pending = deque(tasks)
         results = []
         slots = min(self.max_workers, len(tasks))
 
@@ -170,51 +304,69 @@ class ParallelFanseCounter:
 
         render_group = Group(overall, *rows)
 
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_slot = {}
-            current_task_by_slot = {}
-
-            def submit_next(slot_idx):
-                if pending:
-                    t = pending.popleft()
-                    current_task_by_slot[slot_idx] = t
-                    # 使用独立函数 process_single_file_task 替代实例方法，避免 pickle 问题
-                    f = executor.submit(process_single_file_task, t)
-                    future_to_slot[f] = slot_idx
-                    prog_list[slot_idx].update(task_id_list[slot_idx], description=f"[cyan]{t['file_stem']}", total=None, completed=0)
-                    return True
-                return False
-
-            with Live(render_group, refresh_per_second=10):
-                for s in range(slots):
-                    submit_next(s)
-
-                while future_to_slot:
-                    for future in as_completed(list(future_to_slot.keys())):
-                        slot_idx = future_to_slot.pop(future)
-                        t = current_task_by_slot.get(slot_idx)
-                        try:
-                            result = future.result()
-                            results.append((t['input_file'], True, result))
+        # 修正：Rust 引擎下改用线程池，免去进程创建、任务 pickle 与注释表的跨进程传递，线程直接共用已加载的 annotation_df
+        use_threads = self.uses_threads(engine)
+        executor_cls = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+        with executor_cls(max_workers=self.max_workers) as executor:
+            # 修正：一次性提交全部任务，由执行器内部排队；主线程只消费单个 as_completed 迭代器，
+            # 不再在每次完成时重建 future 列表（原逻辑为 O(pending²) 调度开销）
+            if use_threads:
+                futures = {executor.submit(self._process_single_file, t, annotation_df): t for t in tasks}
+            else:
+                # 使用独立函数 process_single_file_task 替代实例方法，避免 pickle 问题
+                futures = {executor.submit(process_single_file_task, t): t for t in tasks}
+
+            # 修正：进度槽位从空闲池中回收复用；执行器按提交顺序出队，故按同样顺序把等待中的任务挂到空闲槽位上
+            free_slots = deque(range(slots))
+            waiting = deque(futures)
+            slot_by_future = {}
+
+            def show_waiting():
+                while free_slots and waiting:
+                    f = waiting.popleft()
+                    slot_idx = free_slots.popleft()
+                    slot_by_future[f] = slot_idx
+                    prog_list[slot_idx].update(task_id_list[slot_idx], description=f"[cyan]{futures[f]['file_stem']}", total=None, completed=0)
+
+            # 修正：非 verbose（常见情形）时不启用 rich Live——其以 10fps 在主线程重绘全部槽位进度条，
+            # 与 future 完成处理争用；此时只显示单个 tqdm 文件级进度条
+            file_bar = None if verbose else tqdm(total=len(tasks), unit='file')
+            with Live(render_group, refresh_per_second=10) if verbose else nullcontext():
+                show_waiting()
+
+                for future in as_completed(futures):
+                    t = futures[future]
+                    slot_idx = slot_by_future.pop(future, None)
+                    if slot_idx is None:
+                        # 修正：尚未挂到槽位就已完成的任务，直接从等待队列移除
+                        waiting.remove(future)
+                    try:
+                        result = future.result()
+                        results.append((t['input_file'], True, result))
+                        if slot_idx is not None:
                             prog_list[slot_idx].update(task_id_list[slot_idx], total=1, completed=1, description=f"[green]完成: {t['file_stem']}")
-                        except Exception as e:
-                            results.append((t['input_file'], False, str(e)))
+                    except Exception as e:
+                        results.append((t['input_file'], False, str(e)))
+                        if slot_idx is not None:
                             prog_list[slot_idx].update(task_id_list[slot_idx], total=1, completed=1, description=f"[red]失败: {t['file_stem']}")
-                            self.console.print(f"[bold red]任务失败 {t['file_stem']}: {str(e)}[/bold red]") 
-                        finally:
-                            overall.update(overall_task, advance=1)
+                        self.console.print(f"[bold red]任务失败 {t['file_stem']}: {str(e)}[/bold red]") 
+                    finally:
+                        overall.update(overall_task, advance=1)
+                        if file_bar is not None:
+                            file_bar.update(1)
 
-                        submit_next(slot_idx)
+                    if slot_idx is not None:
+                        free_slots.append(slot_idx)
+                    show_waiting()
+
+            if file_bar is not None:
+                file_bar.close()
 
         return results
 
     def _process_single_file(self, task, annotation_df=None):
-        """处理单个文件（工作进程函数）"""
+        """处理单个文件（线程池模式下的工作函数，直接共用主进程已加载的 annotation_df）"""
         try:
-            # 在工作进程中重新加载注释数据（如果需要）
-            if task['gxf_file'] and annotation_df is None:
-                # 这里可以添加在工作进程中加载注释的逻辑
-                pass
 
             counter = FanseCounter(
                 input_file=task['input_file'],
@@ -339,23 +491,35 @@ def count_main_parallel(args):
         console.print("=" * 60)
 
         start_time = time.time()
-        results = parallel_counter.process_files_parallel(
-            file_list=files_to_process,
-            output_base_dir=output_dir,
-            gxf_file=args.gxf,
-            level=args.level,
-            # paired_end=args.paired_end,
-            annotation_df=annotation_df,
-            length_mode_gene=getattr(args, 'len_gene', getattr(args, 'len', 'genelongesttxLength')),
-            length_mode_isoform=getattr(args, 'len_isoform', 'txLength'),
-            verbose=getattr(args, 'verbose', False),
-            batch_size=getattr(args, 'batch_size', None),
-            # 修正：并行路径中传递定量方法选择
-            quant=getattr(args, 'quant', 'none'),
-            engine=getattr(args, 'engine', 'auto'),
-            export_format=getattr(args, 'format', 'salmon'),
-            export_count_type=getattr(args, 'count_type', 'Final_EM')
-        )
+        # 修正：注释表发布到共享内存，工作进程零拷贝挂载数值列，避免每个进程重新解析 gxf 并各自持有一份副本
+        shm_spec, shm_handles = None, []
+        if annotation_df is not None and not parallel_counter.uses_threads(getattr(args, 'engine', 'auto')):
+            try:
+                shm_spec, shm_handles = publish_annotation_to_shm(annotation_df)
+            except Exception as e:
+                if getattr(args, 'verbose', False):
+                    console.print(f"[yellow]共享内存发布注释失败，工作进程将各自加载: {e}[/yellow]")
+        try:
+            results = parallel_counter.process_files_parallel(
+                file_list=files_to_process,
+                output_base_dir=output_dir,
+                gxf_file=args.gxf,
+                level=args.level,
+                # paired_end=args.paired_end,
+                annotation_df=annotation_df,
+                length_mode_gene=getattr(args, 'len_gene', getattr(args, 'len', 'genelongesttxLength')),
+                length_mode_isoform=getattr(args, 'len_isoform', 'txLength'),
+                verbose=getattr(args, 'verbose', False),
+                batch_size=getattr(args, 'batch_size', None),
+                # 修正：并行路径中传递定量方法选择
+                quant=getattr(args, 'quant', 'none'),
+                engine=getattr(args, 'engine', 'auto'),
+                export_format=getattr(args, 'format', 'salmon'),
+                export_count_type=getattr(args, 'count_type', 'Final_EM'),
+                annotation_shm=shm_spec
+            )
+        finally:
+            release_annotation_shm(shm_handles, unlink=True)
 
         duration = time.time() - start_time
 
@@ -520,6 +684,8 @@ def count_main_serial(args, progress=None, task_id=None):
 
 def count_main(args, progress=None, task_id=None):
     """主入口函数，根据参数选择并行或串行"""
+    if getattr(args, 'batch_size', None) is not None:
+        print("警告: --batch-size 已弃用，解析阶段按数据块扫描，该参数不再生效")
     if not getattr(args, 'input', None) and getattr(args, 'read1', None):
         args.input = args.read1
     if getattr(args, 'read2', None) and not getattr(args, 'paired_end', None):
@@ -690,7 +856,7 @@ class FanseCounter:
         self.length_mode_gene = length_mode_gene if length_mode_gene else (length_mode or 'genelongesttxLength')
         self.length_mode_isoform = length_mode_isoform or 'txLength'
         self.length_mode = self.length_mode_gene
-        # 新增：批处理大小（用于解析阶段批量更新计数），None表示使用默认策略
+        # 修正：批处理大小已弃用（解析阶段改为按数据块扫描，不再使用），仅为兼容旧调用保留
         self.batch_size = batch_size
         # 新增：定量方法（none/tpm/rpkm/both）
         self.quant = quant if quant in ('none','tpm','rpkm','both') else 'none'
@@ -742,7 +908,9 @@ class FanseCounter:
         # 兼容旧键名：确保 isoform_multi 指向 isoform_multi_to_isoform
         # self.counts_data[f'{self.isoform_prefix}multi'] = self.counts_data[f'{self.isoform_prefix}multi_to_isoform']
         self.summary_stats = {}
-        self.multi_mapping_info = defaultdict(list)
+        # 修正：解析阶段按比对组合聚合计数、不保留 read 名，多映射信息不再逐条累积；
+        # 保留空 dict 供 _generate_multi_mapping_file 判断（为空时不生成文件），不再为每个计数器分配 defaultdict
+        self.multi_mapping_info = {}
 
     def judge_sequence_mode(self):
         """判断测序模式（单端/双端）"""
@@ -759,13 +927,49 @@ class FanseCounter:
 # %% parser
     def parse_fanse_file_optimized_final(self, position=0):
         """综合优化版本"""
-        # 选择解析器：默认强制使用高性能 Python 解析器；如启用 Rust 则优先走 Rust 路径
-        fanse_parser_selected = fanse_parser_high_performance
+        # 解析方式：Rust 引擎可用时优先；否则使用字节级块扫描（fanse_ref_field_counts）
+        # 修正：单端/双端在调用时即已确定，这里只分派一次；单端（绝大多数调用）不再构建候选文件列表与逐文件循环
+        if self.paired_end:
+            return self._parse_paired_end(position)
+        return self._parse_single_end(position)
 
+    def _parse_single_end(self, position=0):
+        """单端解析：只处理 input_file"""
+        start_time, counts_data, counters = self._begin_parse()
+        total_count = 0
+        fanse_file = self.input_file
+        if fanse_file.exists():
+            total_count = self._count_with_rust([fanse_file], counters)
+            if total_count is None:
+                total_count = self._count_file_python(fanse_file, counters, position)
+        elif self.engine == 'rust' and self.verbose:
+            print("Rust fastcount engine not available, using Python parser")
+        return self._finish_parse(start_time, counts_data, total_count)
+
+    def _parse_paired_end(self, position=0):
+        """双端解析：input_file 与 paired_end（扩展名为 fanse 格式时）合并计数"""
+        start_time, counts_data, counters = self._begin_parse()
+        candidate_files = [self.input_file]
+        #判断是否是双端fanse文件，如果是，判断是否有对应的双端文件，如果有，加入到candidate_files中
+        pe_path = Path(self.paired_end)
+        if pe_path.suffix in FANSE_EXTS:
+            candidate_files.append(pe_path)
+        candidate_files = [f for f in candidate_files if f.exists()]
+
+        # 修正：Rust 引擎可用时（auto 默认即优先）一次调用解析全部候选文件，结果字典直接批量并入计数器，不再进入逐文件的 Python 解析循环
+        total_count = self._count_with_rust(candidate_files, counters) if candidate_files else None
+        if total_count is None:
+            if not candidate_files and self.engine == 'rust' and self.verbose:
+                print("Rust fastcount engine not available, using Python parser")
+            total_count = 0
+            for position, fanse_file in enumerate(candidate_files):
+                total_count += self._count_file_python(fanse_file, counters, position)
+        return self._finish_parse(start_time, counts_data, total_count)
+
+    def _begin_parse(self):
+        """初始化解析阶段的 isoform 计数结构，返回 (开始时间, counts_data, 五个待写入计数器)"""
         if self.verbose:
             self.console.print(f'Parsing {self.input_file.name}')
-            # 修正：输出所选解析器与批处理大小，便于定位性能问题
-            self.console.print(f"Parser: {'high_performance' if fanse_parser_selected is fanse_parser_high_performance else 'standard'}")
         start_time = time.time()
 
         # 预初始化数据结构，针对isoform。默认所有reads都比对到isoform,后续再根据这个，multi_to_isoform判断是否属于gene
@@ -787,128 +991,17 @@ class FanseCounter:
         # 兼容旧键名，确保 isoform_multi 可用
         # counts_data[f'{self.isoform_prefix}multi'] = counts_data[f'{self.isoform_prefix}multi_to_isoform']
 
-        total_count = 0
-        # 修正：移除重复的 batch_size 赋值，统一使用实例属性 self.batch_size
-        # 调整默认批大小至 2_000_000，减少函数调用与哈希开销，提高吞吐
-        # 可通过 CLI --batch-size 覆盖以适配不同机器与数据规模
-        batch_size = int(self.batch_size) if self.batch_size else 2_000_000
-        if self.verbose:
-            self.console.print(f"Using batch size: {batch_size}")
-        # 修正：根据批大小动态设置进度更新步长，减少频繁刷新带来的开销
-        # 大批量时放宽刷新频率，小批量保持默认
-        update_interval = max(10_000, batch_size // 4)
-
-        # 3. 本地变量缓存，消除属性查找
-        raw      = counts_data[f'{self.isoform_prefix}raw']
-        multi    = counts_data[f'{self.isoform_prefix}multi_to_isoform']
-        unique   = counts_data[f'{self.isoform_prefix}unique_to_isoform']
-        firstID  = counts_data[f'{self.isoform_prefix}firstID']
-        multi2all= counts_data[f'{self.isoform_prefix}multi2all']
-
-        FANSE_EXTS = {'.fanse3','.fanse','.fanse3.zip', '.fanse3.gz'}
-        candidate_files = [self.input_file]
-        
-        #判断是否是双端fanse文件，如果是，判断是否有对应的双端文件，如果有，加入到candidate_files中
-        if self.paired_end:
-            pe_path = Path(self.paired_end)
-            if pe_path.suffix in FANSE_EXTS:
-                candidate_files.append(pe_path)
-        # 遍历所有候选文件
-        for position, fanse_file in enumerate(candidate_files):
-            if self.progress and self.task_id:
-                self.progress.update(self.task_id, description=f"[cyan]Parsing {fanse_file.name}...")
-            
-            # 获取文件大小用于统计进度条总数
-            file_size = fanse_file.stat().st_size
-            processed_bytes = 0
-            
-            # 如果是第一个文件，或者不是断点续传，则重置进度条
-            if self.progress and self.task_id:
-                self.progress.update(self.task_id, total=file_size)
-                self.progress.update(self.task_id, completed=0)
-
-            if self.progress and self.task_id:
-                self.progress.update(self.task_id, description=f"Parsing {fanse_file.name}")
-            # 如果有进度条，则更新任务描述
-            if self.progress and self.task_id is not None:
-                self.progress.update(self.task_id, description=f"[cyan]Processing {fanse_file.name}[/cyan]")
-            if not fanse_file.exists():
-                continue
-
-            # 优先尝试 Rust 引擎（若启用且可用），一次性解析并返回计数；失败则回退Python
-            if self.engine in ('rust','auto') and rust_fastcount_available() and parse_and_count_rust:
-                try:
-                    if self.verbose:
-                        print("Using Rust fastcount engine")
-                    res = parse_and_count_rust([str(fanse_file)])
-                    # 将 Rust 返回的字典写入预初始化的计数器
-                    raw.update(res.get('raw', {}))
-                    firstID.update(res.get('firstID', {}))
-                    unique.update(res.get('unique_to_isoform', {}))
-                    multi.update(res.get('multi_to_isoform', {}))
-                    multi2all.update(res.get('multi2all', {}))
-                    total_count += sum(res.get('raw', {}).values())
-                    continue  # 当前文件已完成，处理下一个候选文件
-                except Exception as e:
-                    if self.verbose:
-                        print(f"Rust engine error, fallback to Python: {e}")
-
-            try:
-                batch = []
-                # last_update = 0
-
-                # file_size = fanse_file.stat().st_size
-                # estimated_records = max(1, file_size // 527)
-                # 智能估算记录数
-                sample_size = 10_000  # 从fanse文件开头提取的fanse记录数目，用来估算总reads数
-                estimated_records = self.calculate_file_record_estimate(
-                    fanse_file, sample_size)
-                if self.progress and self.task_id:
-                    self.progress.update(self.task_id, total=estimated_records, completed=0)
-
-                use_tqdm = not (self.progress and self.task_id)
-                pbar = None
-                if use_tqdm:
-                    pbar = tqdm(total=estimated_records, unit='reads', mininterval=5, unit_scale=True, position=position, leave=False)
-
-                # 保持与批大小一致的刷新步长，避免过于频繁刷新导致渲染开销
-                update_counter = 0
-
-                for i, record in enumerate(fanse_parser_selected(str(fanse_file))):
-                    if record.ref_names:
-                        total_count += 1
-
-                        batch.append(record)
-                        if len(batch) >= batch_size:
-                            self._fast_batch_process(batch, raw, multi, unique, firstID, multi2all)
-                            batch = []
-
-                        update_counter += 1
-                        if update_counter >= update_interval:
-                            if pbar:
-                                pbar.update(update_counter)
-                            if self.progress and self.task_id:
-                                self.progress.update(self.task_id, advance=update_counter)
-                            update_counter = 0
-                    else:
-                        update_counter += 1
-
-                if update_counter > 0:
-                    if pbar:
-                        pbar.update(update_counter)
-                    if self.progress and self.task_id:
-                        self.progress.update(self.task_id, advance=update_counter)
-
-                if pbar:
-                    pbar.close()
-
-                if batch:
-                    self._fast_batch_process(batch, raw, multi, unique, firstID, multi2all)
-
-            except Exception as e:
-                print(f"Error: {e}")
-                continue
+        # 3. 本地变量缓存，消除属性查找；顺序与 _fast_batch_process 的参数一致
+        counters = (
+            counts_data[f'{self.isoform_prefix}raw'],
+            counts_data[f'{self.isoform_prefix}multi_to_isoform'],
+            counts_data[f'{self.isoform_prefix}unique_to_isoform'],
+            counts_data[f'{self.isoform_prefix}firstID'],
+            counts_data[f'{self.isoform_prefix}multi2all'],
+        )
+        return start_time, counts_data, counters
 
+    def _finish_parse(self, start_time, counts_data, total_count):
         duration = time.time() - start_time
         if self.verbose:
             print(
@@ -916,14 +1009,84 @@ class FanseCounter:
 
         return counts_data, total_count
 
+    def _count_with_rust(self, files, counters):
+        """用 Rust 引擎一次解析全部文件并并入计数器，返回记录总数；引擎不可用或出错时返回 None（调用方回退 Python）"""
+        if not (self.engine in ('rust','auto') and rust_fastcount_available() and parse_and_count_rust):
+            if self.engine == 'rust' and self.verbose:
+                print("Rust fastcount engine not available, using Python parser")
+            return None
+        raw, multi, unique, firstID, multi2all = counters
+        try:
+            if self.verbose:
+                print("Using Rust fastcount engine")
+            if self.progress and self.task_id:
+                self.progress.update(self.task_id, description=f"[cyan]Parsing {', '.join(f.name for f in files)} (rust)")
+            res = parse_and_count_rust([str(f) for f in files])
+            # 修正：Rust 返回的五个字典各自持有独立的键字符串；并入前统一驻留，
+            # 使各计数器共享同一 ID 对象（与 Python 解析路径一致），后续跨计数器/注释映射查找走身份比较快路径
+            intern = sys.intern
+            for counter, key in ((raw, 'raw'), (firstID, 'firstID'), (unique, 'unique_to_isoform'),
+                                 (multi, 'multi_to_isoform'), (multi2all, 'multi2all')):
+                counter.update({intern(k) if type(k) is str else k: v for k, v in res.get(key, {}).items()})
+            return sum(raw.values())
+        except Exception as e:
+            for c in counters:
+                c.clear()
+            if self.verbose:
+                print(f"Rust engine error, fallback to Python: {e}")
+            return None
+
+    def _count_file_python(self, fanse_file, counters, position=0):
+        """用字节级块扫描解析单个文件并并入计数器，返回该文件的记录数"""
+        # 获取文件大小用于统计进度条总数；有进度条时重置并更新任务描述
+        file_size = fanse_file.stat().st_size
+        if self.progress and self.task_id:
+            self.progress.update(self.task_id, total=file_size, completed=0,
+                                 description=f"[cyan]Processing {fanse_file.name}[/cyan]")
+
+        n_records = 0
+        try:
+            # 修正：字节级块扫描（未压缩文件 mmap）只提取比对ID字段并以 bytes 计数，不再逐条构建 FANSeRecord；
+            # 进度按已读取的输入字节数显示，省去为估算记录数而对整个文件的预解析
+            use_tqdm = not (self.progress and self.task_id)
+            pbar = None
+            if use_tqdm:
+                pbar = tqdm(total=file_size, unit='B', unit_scale=True, mininterval=5, position=position, leave=False)
+            last_pos = 0
+
+            def _on_progress(consumed):
+                nonlocal last_pos
+                if pbar:
+                    pbar.update(consumed - last_pos)
+                if self.progress and self.task_id:
+                    self.progress.update(self.task_id, completed=consumed)
+                last_pos = consumed
+
+            ref_counts, n_records = fanse_ref_field_counts(str(fanse_file), on_progress=_on_progress)
+            if pbar:
+                pbar.close()
+
+            # 只对不同的比对组合解码一次，转换为与解析器一致的（驻留后的）ID元组
+            # 修正：中间聚合用普通 dict + dict.get，避免 Counter 对每个新键调用 Python 层的 __missing__
+            fused = {}
+            fused_get = fused.get
+            for ref_field, n in ref_counts.items():
+                ids = tuple(sys.intern(x) for x in ref_field.decode('utf-8', errors='ignore').split(','))
+                fused[ids] = fused_get(ids, 0) + n
+            self._fast_batch_process(fused, *counters)
+
+        except Exception as e:
+            print(f"Error: {e}")
+        return n_records
+
     def _fast_batch_process(self, batch, raw, multi, unique, firstID, multi2all):
         """
         批量处理FANSe记录，按比对状态更新各类计数器。
         
         参数
         ----
-        batch : list[FANSeRecord]
-            待处理的一批记录。
+        batch : list[tuple[str, ...]] | dict
+            待处理的一批记录的比对ID元组（FANSeRecord.ref_names），或已聚合的 {比对ID元组: reads数}（dict 或 Counter）。
         raw : collections.Counter
             原始计数器：记录所有reads（无论唯一/多重比对）的首次比对ID或拼接ID。
         multi : collections.Counter
@@ -935,147 +1098,29 @@ class FanseCounter:
         multi2all : collections.Counter
             多重比对展开计数器：将多重比对reads的拼接ID拆开后，分别累加到每个转录本。
         """
-        # 优化：批量聚合更新，减少每条记录多次 Counter.update 的方法调用开销
-        # 将原“每记录5次update”改为“每批每类型1次update”，显著降低Python调用与哈希查找开销
-        raw_ids_to_add = []
-        first_ids_to_add = []
-        unique_ids_to_add = []
-        multi_joined_to_add = []
-        multi2all_ids_to_add = []
-
-        for record in batch:
-            ids = record.ref_names          # 当前read比对到的所有转录本ID列表
-            is_multi = record.is_multi      # 是否为多重比对（True=多重，False=唯一）
+        # 修正：融合计数——每条记录只按其比对ID元组做一次哈希计数（Counter 的 C 实现），
+        # 再按“不同比对组合”分发到五类计数器；同一组合的大量reads不再分别写入 3~5 个计数器
+        # 注意：multi2all 不去重，组合内重复出现的转录本按出现次数累计
+        # 修正：不再用注释中的全部转录本ID以 0 预填计数器——这里每个计数器只按“不同比对组合”写入一次，
+        # 扩容次数与 reads 数无关；而 0 值键会进入 TPM 计算、基因聚合与导出（多出全 0 行），改变输出
+        # 修正：计数器仍为 Counter（导出与后续阶段依赖其接口），但热循环中改用绑定好的 dict.get 累加：
+        # Counter 的 += 在键缺失时会调用 Python 层的 __missing__，而 dict.get / __setitem__ 均为 C 实现
+        fused = batch if isinstance(batch, dict) else Counter(batch)
+        firstID_get, raw_get, unique_get = firstID.get, raw.get, unique.get
+        multi_get, multi2all_get = multi.get, multi2all.get
+        for ids, n in fused.items():
             first_id = ids[0]               # 取首个比对ID作为代表
-
-            if not is_multi:
+            firstID[first_id] = firstID_get(first_id, 0) + n
+            if len(ids) == 1:
                 # 唯一比对分支
-                raw_ids_to_add.append(first_id)
-                first_ids_to_add.append(first_id)
-                unique_ids_to_add.append(first_id)
-            else:
-                # 多重比对分支
-                # 修正：统一组合键类型为 tuple，内部统一使用元组以减少重复字符串拼接与哈希重分配；导出阶段再格式化为逗号分隔字符串
-                joined_tuple = tuple(ids)
-                raw_ids_to_add.append(joined_tuple)
-                first_ids_to_add.append(first_id)
-                multi_joined_to_add.append(joined_tuple)
-                # 展开到每个转录本
-                # 注意：这里不去重，保留重复以准确累计每条reads对应的每个转录本
-                multi2all_ids_to_add.extend(ids)
-
-        if raw_ids_to_add:
-            raw.update(raw_ids_to_add)
-        if first_ids_to_add:
-            firstID.update(first_ids_to_add)
-        if unique_ids_to_add:
-            unique.update(unique_ids_to_add)
-        if multi_joined_to_add:
-            multi.update(multi_joined_to_add)
-        if multi2all_ids_to_add:
-            multi2all.update(multi2all_ids_to_add)
-
-        # # 修正：使用生成器进行Counter.update，避免构建巨大中间列表导致的内存压力与GC抖动
-        # # 说明：保持“每批每类型1次update”的策略，同时用生成器表达式与chain展开multi2all
-        # raw.update(
-        #     (
-        #         (record.ref_names[0] if not record.is_multi else tuple(record.ref_names))
-        #         for record in batch
-        #     )
-        # )
-        # firstID.update((record.ref_names[0] for record in batch))
-        # unique.update((record.ref_names[0] for record in batch if not record.is_multi))
-        # multi.update((tuple(record.ref_names) for record in batch if record.is_multi))
-        # # 将多重比对展开到每个转录本ID：使用chain避免一次性构建巨大的列表
-        # multi2all.update(
-        #     chain.from_iterable((record.ref_names for record in batch if record.is_multi))
-        # )
-
-
-    def calculate_average_record_size(self, file_path, sample_size=100_000):
-        """
-        通过采样计算fanse3文件的平均记录大小
-
-        参数:
-            file_path: 文件路径
-            sample_size: 采样记录数（默认100,000条）
-
-        返回:
-            平均每条记录的字节数
-        """
-        if self.verbose:
-            print(f"采样计算平均记录大小，采样数: {sample_size}")
-
-        try:
-            total_bytes = 0
-            record_count = 0
-
-            # 使用fanse_parser进行采样
-            for i, record in enumerate(fanse_parser(str(file_path))):
-                if i >= sample_size:
-                    break
-
-                # 估算当前记录的大小（基于记录内容的字符串长度）
-                record_size = len(str(record))  # 基本估算
-                total_bytes += record_size
-                record_count += 1
-
-            if record_count > 0:
-                avg_size = total_bytes / record_count
-                if self.verbose:
-                    print(f"采样完成: {record_count} 条记录，平均大小: {avg_size:.1f} 字节")
-                return avg_size
+                raw[first_id] = raw_get(first_id, 0) + n
+                unique[first_id] = unique_get(first_id, 0) + n
             else:
-                if self.verbose:
-                    self.console.print("警告: 无法采样记录，使用默认值500")
-                return 500
-
-        except Exception as e:
-            if self.verbose:
-                self.console.print(f"采样失败: {e}，使用默认值500")
-            return 500
-
-    def calculate_file_record_estimate(self, file_path, sample_size=100_000):
-        """
-        综合估算文件中的记录数量
-
-        参数:
-            file_path: 文件路径
-            sample_size: 采样大小
-
-        返回:
-            估计的记录数量
-        """
-        if not file_path.exists():
-            return 0
-
-        # 获取文件大小
-        file_size = file_path.stat().st_size
-
-        # 如果是小文件，直接解析计数
-        if file_size < 100 * 1024 * 1024:
-            if self.verbose:
-                self.console.print("小文件，直接计数...")
-            try:
-                record_count = sum(
-                    1 for _ in fanse_parser(str(file_path)))
-                if self.verbose:
-                    self.console.print(f"直接计数完成: {record_count} 条记录")
-                return record_count
-            except:
-                pass
-        else:
-            # 对于大文件，使用采样估算
-            avg_size = self.calculate_average_record_size(
-                file_path, sample_size)*0.8  # 经验乘以0.8，人为增大一点估算的reads总数，反而比较符合实际，也是估算
-            estimated_records = max(1, int(file_size / avg_size))
-
-        if self.verbose:
-            self.console.print(f"文件大小: {file_size/1_000_000_000:.2f} GB ")
-            self.console.print(f"平均记录大小: {avg_size:.0f} 字节")
-            self.console.print(f"估计Fanse记录数: {estimated_records/1_000_000:.2f} M")
-
-        return estimated_records
+                # 多重比对分支：组合键保持 tuple，导出阶段再格式化为逗号分隔字符串
+                raw[ids] = raw_get(ids, 0) + n
+                multi[ids] = multi_get(ids, 0) + n
+                for tx in ids:
+                    multi2all[tx] = multi2all_get(tx, 0) + n
 
 
 # %% generate counts
@@ -1140,27 +1185,40 @@ class FanseCounter:
         if self.verbose:
             self.console.print(f"开始处理 {total_events} 个{prefix}多映射事件...")
 
+        # 修正：内联平均分配与 TPM 比例分配（原 _distribute_equal / _allocate_multi_reads_by_tpm_rescued 的逐事件逻辑），
+        # 省去每个多映射事件的两次方法调用与两个中间 dict；运算顺序与原实现一致，浮点结果与键顺序不变
+        tpm_get = tpm_values.get
         for ids_key, event_count in counts_data[multi_key].items():
             try:
-                ids = ids_key.split(',') if isinstance(ids_key, str) else list(ids_key)
+                ids = ids_key.split(',') if isinstance(ids_key, str) else ids_key
+                if not ids:
+                    multi_em_cannot_allocate_tpm_counter[ids_key] += event_count
+                    continue
+                # 组合内重复的ID只计一次（与原 dict 推导式语义相同），保持首次出现的顺序
+                distinct_ids = dict.fromkeys(ids) if len(ids) > 1 else ids
 
                 # multi_equal: 平均分配
-                equal_alloc = self._distribute_equal(ids, event_count)
-                for id_val, cnt in equal_alloc.items():
-                    multi_equal_counter[id_val] += cnt
+                share = event_count / float(len(ids))
+                for id_val in distinct_ids:
+                    multi_equal_counter[id_val] += share
 
                 # multi_EM: 按具有unique reads 的  isoform  或者 gene  的 TPM比例分配 multi-reads
-                allocation = self._allocate_multi_reads_by_tpm_rescued(
-                    ids, tpm_values)
-                
-                if allocation:
-                    # 如果可以分配TPM，按比例分配
-                    for id_val, share_ratio in allocation.items():
-                        multi_em_counter[id_val] += event_count * share_ratio
+                if len(ids) == 1:
+                    multi_em_counter[ids[0]] += event_count * 1.0
                 else:
-                    # 无法分配的情况，我们不采取按照相等比例分配的办法，而是采取不分配的方案。确保没有UNIQUE 的reads 不参与继续分配，以保持严谨性
-                    # 这些reads会被分配到multi_EM_cannot_allocate_tpm_counter中
-                    multi_em_cannot_allocate_tpm_counter.update({ids_key: event_count})
+                    valid = [(tid, tpm) for tid in distinct_ids if (tpm := tpm_get(tid, 0)) > 0]
+                    if valid:
+                        # 总TPM按原始组合（含重复ID）累加，与原实现一致
+                        if len(distinct_ids) == len(ids):
+                            total_tpm = sum(tpm for _, tpm in valid)
+                        else:
+                            total_tpm = sum(tpm_values[tid] for tid in ids if tpm_get(tid, 0) > 0)
+                        for tid, tpm in valid:
+                            multi_em_counter[tid] += event_count * (tpm / total_tpm)
+                    else:
+                        # 无法分配的情况，我们不采取按照相等比例分配的办法，而是采取不分配的方案。确保没有UNIQUE 的reads 不参与继续分配，以保持严谨性
+                        # 这些reads会被分配到multi_EM_cannot_allocate_tpm_counter中
+                        multi_em_cannot_allocate_tpm_counter[ids_key] += event_count
                 if self.verbose:
                     processed_events += 1
                     if processed_events % 10000 == 0:
@@ -1257,13 +1315,6 @@ class FanseCounter:
 
         return allocation
 
-    def _distribute_equal(self, ids, event_count):
-        """平均分配多映射reads到各ID，返回{id: count}映射"""
-        if not ids:
-            return {}
-        share = event_count / float(len(ids))
-        return {id_val: share for id_val in ids}
-
     def _build_length_dict(self, prefix, annotation_df=None):
         """构建用于TPM/EM分配的长度字典
         - prefix 为 'isoform_' 或 'gene_'
@@ -1420,8 +1471,9 @@ class FanseCounter:
         # 创建转录本到基因的映射列表
         # 修正：对 geneName 应用 sys.intern，稳定键匹配并降低内存占用（与解析器中对 ref_names 的驻留一致）
         import sys
+        # 修正：转录本ID键同样驻留，与解析阶段驻留过的计数器键为同一对象，查找时直接命中身份比较
         transcript_to_gene = {
-            str(tx): sys.intern(str(gn))
+            sys.intern(str(tx)): sys.intern(str(gn))
             for tx, gn in zip(self.annotation_df['txname'], self.annotation_df['geneName'])
         }
 
@@ -1459,6 +1511,19 @@ class FanseCounter:
         # 如 'isoform_unique_to_isoform' -> 'unique_to_isoform'
         # base_type = count_type.replace(self.isoform_prefix, '')
 
+        # 修正：逐事件用 Counter.update({键: 值}) 会走 Python 层的 Mapping 判断并为每个事件新建临时 dict；
+        # 改为先取出各计数器的局部引用，再直接 counter[键] += 值（结果相同）
+        g_firstID = gene_level_counts_unique_genes[f'{self.gene_prefix}firstID']
+        g_raw = gene_level_counts_unique_genes[f'{self.gene_prefix}raw']
+        g_unique_to_gene = gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene']
+        g_unique_to_isoform = gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_isoform']
+        g_unique_and_isoform = gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene_and_isoform']
+        g_unique_not_isoform = gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene_but_not_isoform']
+        gm_raw = gene_level_counts_multi_genes[f'{self.gene_prefix}raw']
+        gm_multi_to_gene = gene_level_counts_multi_genes[f'{self.gene_prefix}multi_to_gene']
+        gm_multi_to_isoform = gene_level_counts_multi_genes[f'{self.gene_prefix}multi_to_isoform']
+        isoform_unique = self.counts_data.get(f'{self.isoform_prefix}unique_to_isoform', Counter())
+
         # 遍历当前计数器中的每一条记录：键为转录本ID（或组合），值为对应reads数
         for transcript_ids_key, event_count in counter_raw.items():
             # 判断该键是否为“多转录本组合”——既可能是tuple，也可能是逗号分隔的字符串
@@ -1477,42 +1542,42 @@ class FanseCounter:
                 # 修正：直接获取首转录本所属基因名称（字符串），避免对字符串迭代导致仅取首字符
                 first_gene = transcript_to_gene.get(transcript_ids[0])
                 if first_gene:
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}firstID'].update({first_gene: event_count})
+                    g_firstID[first_gene] += event_count
                 
                 # 1) 多转录本 → 单基因：isoform 不唯一但 gene 唯一
                 if len(genes) == 1:
                     gene = genes.pop()          # 唯一基因
                     # 基础计数
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}raw'].update({gene: event_count})
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene'].update({gene: event_count})
+                    g_raw[gene] += event_count
+                    g_unique_to_gene[gene] += event_count
 
                     # 细分：区分“是否唯一比对到 isoform”
                     first_tx = transcript_ids[0]
-                    if first_tx in self.counts_data.get(f'{self.isoform_prefix}unique_to_isoform', Counter()):
+                    if first_tx in isoform_unique:
                         # 首转录本在gene层和 isoform 层都唯一 → 同时唯一到 isoform & gene
-                        gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene_and_isoform'].update({gene: event_count})
+                        g_unique_and_isoform[gene] += event_count
                     else:
                         # 首转录本在 isoform 层不唯一 → 仅 gene 唯一
-                        gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene_but_not_isoform'].update({gene: event_count})
+                        g_unique_not_isoform[gene] += event_count
 
                 # 2) 多转录本 → 多基因：gene 不唯一
                 elif len(genes) > 1:
                     # 修正：统一组合键为 tuple（按字典序排序保证稳定），导出阶段再格式化
                     gene_key = tuple(sorted(genes))
                     # 全部归入“基因-多重”计数器
-                    gene_level_counts_multi_genes[f'{self.gene_prefix}raw'].update({gene_key: event_count})
-                    gene_level_counts_multi_genes[f'{self.gene_prefix}multi_to_gene'].update({gene_key: event_count})
-                    gene_level_counts_multi_genes[f'{self.gene_prefix}multi_to_isoform'].update({gene_key: event_count})
+                    gm_raw[gene_key] += event_count
+                    gm_multi_to_gene[gene_key] += event_count
+                    gm_multi_to_isoform[gene_key] += event_count
 
             # 3) 单转录本 → 单基因：isoform & gene 均唯一
             else:
                 gene = transcript_to_gene.get(transcript_ids_key)
                 if gene:
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}raw'].update({gene: event_count})
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}firstID'].update({gene: event_count})
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene'].update({gene: event_count})
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_isoform'].update({gene: event_count})
-                    gene_level_counts_unique_genes[f'{self.gene_prefix}unique_to_gene_and_isoform'].update({gene: event_count})
+                    g_raw[gene] += event_count
+                    g_firstID[gene] += event_count
+                    g_unique_to_gene[gene] += event_count
+                    g_unique_to_isoform[gene] += event_count
+                    g_unique_and_isoform[gene] += event_count
 
         if self.verbose:
             print(f"基因水平 unique reads 计数完成: "
@@ -3128,7 +3193,7 @@ def load_annotation_data(args):
         if getattr(args, 'verbose', False):
             console.print(f"Found existing refflat file: {refflat_file}")
         try:
-            annotation_df = read_refflat_with_commented_header(refflat_file)
+            annotation_df = _cached_load_annotation(refflat_file, read_refflat_with_commented_header)
             if getattr(args, 'verbose', False):
                 console.print(
                     f"Successfully loaded {len(annotation_df)} transcripts from existing refflat file")
@@ -3150,9 +3215,125 @@ def load_annotation_data(args):
         return genomic_df
     else:
         # Just load the data without saving
-        genomic_df = load_annotation_to_dataframe(args.gxf)
+        genomic_df = _cached_load_annotation(args.gxf, load_annotation_to_dataframe)
         return genomic_df
 
+
+# 修正：注释缓存最多保留的文件数（按最近使用时间淘汰，/dev/shm 占用的是内存）
+ANNOTATION_CACHE_MAX_ENTRIES = 4
+
+
+def _annotation_cache_dir():
+    """注释缓存目录：环境变量 FANSE_ANNOTATION_CACHE_DIR 优先，否则使用 /dev/shm（内存文件系统）
+    - 实际缓存放在其下按用户区分的子目录（权限 0700），不直接写入全局可写目录
+    - 子目录不是当前用户所有、是符号链接或对其他用户可访问时视为不安全，返回 None（不缓存）
+    """
+    base_dir = os.environ.get('FANSE_ANNOTATION_CACHE_DIR')
+    if base_dir is None and os.path.isdir('/dev/shm'):
+        base_dir = '/dev/shm'
+    if not base_dir:
+        return None
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    cache_dir = os.path.join(base_dir, f"fansetools-{uid if uid is not None else 'cache'}")
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        st = os.lstat(cache_dir)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    if uid is not None and (st.st_uid != uid or st.st_mode & 0o077):
+        return None
+    return cache_dir
+
+
+def _is_own_cache_file(path):
+    """缓存文件是否为当前用户所有的普通文件（读取前校验）"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        return False
+    return not hasattr(os, 'getuid') or st.st_uid == os.getuid()
+
+
+def _evict_annotation_cache(cache_dir, keep):
+    """淘汰注释缓存：仅保留最近使用的 ANNOTATION_CACHE_MAX_ENTRIES 个文件，并清理残留的临时文件"""
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, 'fansetools_ann_*')):
+        try:
+            mtime = os.lstat(path).st_mtime
+        except OSError:
+            continue
+        if path.endswith('.tmp'):
+            # 超过 1 小时的临时文件来自中断的写入
+            if time.time() - mtime > 3600:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        elif path != keep:
+            entries.append((mtime, path))
+    entries.sort(reverse=True)
+    for _, path in entries[max(0, ANNOTATION_CACHE_MAX_ENTRIES - 1):]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _cached_load_annotation(source_path, loader):
+    """加载注释表并以 Arrow IPC 文件缓存，键为 (源文件路径, mtime_ns, 大小)
+    - 命中时以内存映射读取缓存，跳过 GTF/GFF 解析或 refflat 的 read_csv
+    - 同一源文件的旧缓存在写入新缓存时删除，总文件数按最近使用淘汰，避免在 /dev/shm 中堆积
+    - 未安装 pyarrow、无缓存目录或缓存读写失败时，直接调用 loader(source_path)
+    """
+    cache_dir = _annotation_cache_dir()
+    if pa is None or cache_dir is None:
+        return loader(source_path)
+    try:
+        st = os.stat(source_path)
+        path_key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:16]
+        state_key = hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, f"fansetools_ann_{path_key}_{state_key}.arrow")
+    except OSError:
+        return loader(source_path)
+
+    if _is_own_cache_file(cache_path):
+        try:
+            with pa.memory_map(cache_path, 'r') as source:
+                df = _arrow_table_to_pandas(pa.ipc.open_file(source).read_all())
+            try:
+                os.utime(cache_path)  # 记录最近使用时间，供淘汰排序
+            except OSError:
+                pass
+            return df
+        except Exception:
+            pass  # 缓存损坏：重新加载并覆盖
+
+    df = loader(source_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, cache_path)  # 原子替换，并发进程不会读到半写的缓存
+        for old in glob.glob(os.path.join(cache_dir, f"fansetools_ann_{path_key}_*.arrow")):
+            if old != cache_path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        _evict_annotation_cache(cache_dir, cache_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return df
+
 # 方法1：先读取注释行获取列名，然后读取数据
 def read_refflat_with_commented_header(file_path):
     """读取带有注释头部的refflat文件"""
@@ -3299,7 +3480,7 @@ def add_count_subparser(subparsers):
 
     # 新增：解析批处理大小，用于优化解析阶段性能与内存占用的权衡
     parser.add_argument('--batch-size', dest='batch_size', type=int, default=None,
-                        help='解析阶段的批处理大小（默认: 2000000）。数值越大，函数调用与哈希查找开销越少，但占用内存更高；请根据机器内存与文件规模调整。')
+                        help='（已弃用）解析阶段已改为按数据块的字节级扫描，该参数不再生效，将在后续版本移除')
 
     # 新增：定量方法选择，用于在唯一结果文件中追加表达量列
     parser.add_argument('-q','--quant', choices=['none','tpm','rpkm','both'], default='none',
@@ -4,10 +4,11 @@ import logging
 import os
 import uuid
 import pathlib
+import selectors
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor
-from .cluster import ClusterNode, OptimizedClusterManager
+from .cluster import ClusterNode, OptimizedClusterManager, get_manager
 
 # Configure logging
 logger = logging.getLogger('DistributedScheduler')
@@ -119,8 +120,10 @@ class DistributedScheduler:
         
         logger.info(f"Task {task.id} started on {node_name}: {task.command[:50]}...")
         
+        ssh = None
         try:
-            ssh = self.cluster_manager._create_ssh_connection(node)
+            # Reuse the pooled per-node session; each task opens its own channel on it
+            ssh = self.cluster_manager._get_ssh(node)
             if not ssh:
                 raise Exception(f"Failed to connect to {node_name}")
             
@@ -132,28 +135,48 @@ class DistributedScheduler:
                 actual_command = actual_command.replace("{{FANSE_PATH}}", fanse_exe)
 
             # Execute
-            # Note: exec_command returns (stdin, stdout, stderr)
-            # The command is executed asynchronously on the server
-            stdin, stdout, stderr = ssh.exec_command(actual_command)
-            channel = stdout.channel
-            
-            # Wait for completion with timeout support
-            while not channel.exit_status_ready():
-                if self.stop_event.is_set():
-                    # Try to kill if possible (optional)
-                    channel.close()
-                    return
-                
-                if self.timeout > 0 and (time.time() - task.start_time) > self.timeout:
-                     channel.close()
-                     raise TimeoutError(f"Task exceeded timeout of {self.timeout}s")
-                
-                time.sleep(0.5)
-            
-            exit_status = channel.recv_exit_status()
+            # Register the channel so the idle reaper never closes this pooled connection mid-task
+            with self.cluster_manager._channel_in_use(ssh):
+                # Note: exec_command returns (stdin, stdout, stderr)
+                # The command is executed asynchronously on the server
+                stdin, stdout, stderr = ssh.exec_command(actual_command)
+                channel = stdout.channel
+
+                # Wait for completion with timeout support.
+                # Block on the channel fd instead of sleeping, and keep draining output so a
+                # chatty remote command never stalls on a full SSH window.
+                err_chunks = []
+                sel = selectors.DefaultSelector()
+                sel.register(channel.fileno(), selectors.EVENT_READ)
+                try:
+                    while True:
+                        while channel.recv_ready():
+                            if not channel.recv(65536):
+                                break
+                        while channel.recv_stderr_ready():
+                            chunk = channel.recv_stderr(65536)
+                            if not chunk:
+                                break
+                            err_chunks.append(chunk)
+                        if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                            break
+                        if self.stop_event.is_set():
+                            # Try to kill if possible (optional)
+                            channel.close()
+                            return
+
+                        if self.timeout > 0 and (time.time() - task.start_time) > self.timeout:
+                             channel.close()
+                             raise TimeoutError(f"Task exceeded timeout of {self.timeout}s")
+
+                        sel.select(0.5)
+                finally:
+                    sel.close()
+
+                exit_status = channel.recv_exit_status()
             
             if exit_status != 0:
-                err = stderr.read().decode('utf-8', errors='ignore')
+                err = b''.join(err_chunks).decode('utf-8', errors='ignore')
                 raise Exception(f"Command failed with status {exit_status}: {err.strip()}")
                 
             with self.lock:
@@ -164,6 +187,11 @@ class DistributedScheduler:
             
         except Exception as e:
             logger.error(f"Task {task.id} failed on {node_name}: {str(e)}")
+            # Only a dead connection (not a failing remote command) invalidates the shared pooled client
+            transport = ssh.get_transport() if ssh is not None else None
+            connection_lost = transport is None or not transport.is_active()
+            if ssh is not None and connection_lost and self.cluster_manager._connection_pool.get(node_name) is ssh:
+                self.cluster_manager._drop_ssh(node_name)
             with self.lock:
                 self.node_states[node_name]['running_jobs'] -= 1
                 
@@ -176,7 +204,7 @@ class DistributedScheduler:
                     logger.warning(f"Task {task.id} queued for retry ({task.retries}/{self.max_retries})")
                     
                     # Fault tolerance: If node failed connection, mark suspicious
-                    if "connect" in str(e).lower() or "socket" in str(e).lower():
+                    if connection_lost:
                         self.node_states[node_name]['failed_count'] += 1
                         if self.node_states[node_name]['failed_count'] > 3:
                             self.node_states[node_name]['disabled'] = True
@@ -230,8 +258,7 @@ def run_distributed(commands: List[str], args) -> bool:
     args: parsed arguments containing 'nodes' (optional), 'timeout' (optional), etc.
     """
     config_dir = pathlib.Path.home() / ".fansetools"
-    manager = OptimizedClusterManager(config_dir)
-    manager._load_cluster_config()
+    manager = get_manager(config_dir)
     
     # Filter nodes if specified
     all_nodes = list(manager.nodes.values()) if hasattr(manager, 'nodes') else [] # manager.list_nodes() if available, else direct access
@@ -266,7 +293,7 @@ def run_distributed(commands: List[str], args) -> bool:
         print(f"Preparing to transfer {len(required_files)} files to {len(target_nodes)} nodes...")
         for node in target_nodes:
              try:
-                 ssh = manager._create_ssh_connection(node)
+                 ssh = manager._get_ssh(node)
                  if not ssh:
                      print(f"Skipping file transfer for {node.name}: Connection failed")
                      continue
@@ -283,7 +310,7 @@ def run_distributed(commands: List[str], args) -> bool:
                          sftp.stat(remote_dir)
                      except FileNotFoundError:
                          # Try creating
-                         if manager._is_windows_system(ssh):
+                         if manager._is_windows_node(node, ssh):
                              # Windows: try standard mkdir, replace / with \
                              win_dir = remote_dir.replace('/', '\\')
                              ssh.exec_command(f'mkdir "{win_dir}"')
@@ -295,7 +322,6 @@ def run_distributed(commands: List[str], args) -> bool:
                      sftp.put(str(local_path), str(remote_path))
                  
                  sftp.close()
-                 ssh.close()
              except Exception as e:
                  print(f"Error transferring files to {node.name}: {e}")
 
@@ -3,26 +3,39 @@
 提供以下接口：
 - rust_fastcount_available(): 检查本地是否已编译安装 fansetools_fastcount 模块
 - parse_and_count_rust(paths): 使用 Rust 引擎一次性解析多个 FANSe3 文件并返回计数结果
+- get_engine(): 返回进程内缓存的扩展模块句柄（跨文件复用）
 
 返回的计数结构与 FanseCounter.parse_fanse_file_optimized_final 初始化的 isoform 计数器一致：
 { 'raw': {id_or_combo: n}, 'unique_to_isoform': {...}, 'multi_to_isoform': {...}, 'firstID': {...}, 'multi2all': {...} }
 """
+import functools
 from typing import Dict, List
 
+_ENGINE = None  # 修正：进程内共享的 Rust 扩展模块句柄，同一工作进程处理多个文件时只导入/初始化一次
+
+
+def get_engine():
+    """返回进程内缓存的 Rust 扩展模块（首次调用时导入；导入失败抛出 ImportError）"""
+    global _ENGINE
+    if _ENGINE is None:
+        import fansetools_fastcount
+        _ENGINE = fansetools_fastcount
+    return _ENGINE
+
+
+@functools.lru_cache(maxsize=1)
 def rust_fastcount_available() -> bool:
-    """检测 Rust 扩展是否可导入"""
+    """检测 Rust 扩展是否可导入（结果在进程内缓存，导入失败时不再重复搜索模块路径）"""
     try:
-        import fansetools_fastcount  # noqa: F401
+        get_engine()
         return True
     except Exception:
         return False
 
 def parse_and_count_rust(paths: List[str]) -> Dict[str, Dict[str, int]]:
     """调用 Rust 扩展完成解析与计数
-    - paths: FANSe3 文件列表（支持 .fanse3 与 .fanse3.gz）
+    - paths: FANSe3 文件列表（支持 .fanse3 与 .fanse3.gz），多个文件在一次调用中完成，计数合并返回
     - 返回：五个 isoform 水平的基础计数器（字典），后续由 Python 层生成 EM/EQ 等衍生计数
+    - 扩展在解析期间释放 GIL（py.allow_threads），count 多文件并行时据此使用线程池
     """
-    import fansetools_fastcount
-    result = fansetools_fastcount.parse_files(paths)
-    return result
-
+    return get_engine().parse_files(paths)
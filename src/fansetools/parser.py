@@ -14,9 +14,18 @@ import gzip
 import zipfile
 import subprocess
 import shutil
+import mmap
+import queue
+import threading
+from collections import Counter
 # import os
 from dataclasses import dataclass
-from typing import List, Generator
+from typing import Callable, Iterator, List, Generator, Optional, Tuple
+# 修正：可选 ISA-L（python-isal），未安装 pigz 时 .gz 输入优先用其 SIMD 解压，均不可用时回退标准库 gzip
+try:
+    from isal import igzip as _igzip
+except ImportError:
+    _igzip = None
 # from typing import List, Generator, Deque
 # from collections import deque
 # from tqdm import tqdm
@@ -80,6 +89,191 @@ def _open_fanse_text(file_path: str):
         return io.TextIOWrapper(f, encoding='utf-8', errors='ignore')
     return open(file_path, 'r', encoding='utf-8', errors='ignore', buffering=1024 * 1024 * 16)
 
+# 修正：字节级扫描每次处理的数据块大小（按行边界对齐）；16 MB 使读取与计数流水线能在大文件上充分重叠
+FANSE_SLAB_SIZE = 1 << 24
+# 修正：后台预读的数据块个数上限（每块 FANSE_SLAB_SIZE，限制预读占用的内存）
+FANSE_PREFETCH_DEPTH = 2
+
+
+def _advise_sequential(fd: int) -> None:
+    """提示内核按顺序读取并预读整个文件（仅 POSIX 平台；页缓存已命中时无额外开销）"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+
+def _iter_fanse_slabs(file_path: str, slab_size: int = FANSE_SLAB_SIZE) -> Iterator[Tuple[bytes, Optional[int]]]:
+    """按行边界切分的字节块迭代器，yield (数据块, 已消耗的输入文件字节数或 None)
+    - 未压缩文件：mmap 后按块切片，直接使用内核页缓存，不经过逐行的文本解码与缓冲
+    - .gz/.zip：流式解压后按块读取；.gz 依次优先 pigz（独立进程，与解析并行）、ISA-L、标准库 gzip，以原始文件偏移量报告进度
+    - 打开后以 posix_fadvise/madvise 提示顺序读取，首次读取未缓存的大文件时由内核提前预读
+    """
+    if not file_path.endswith(('.gz', '.zip')):
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            if size <= slab_size:
+                # 修正：整个文件不超过一个数据块时直接一次 read 读入，省去 mmap/munmap 与逐页缺页中断（大量小文件时明显）
+                yield f.read(), size
+                return
+            _advise_sequential(f.fileno())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                pos = 0
+                while pos < size:
+                    end = min(pos + slab_size, size)
+                    if end < size:
+                        nl = mm.rfind(b'\n', pos, end)
+                        if nl < 0:  # 单行超过块大小
+                            nl = mm.find(b'\n', end)
+                        end = size if nl < 0 else nl + 1
+                    yield mm[pos:end], end
+                    pos = end
+        return
+
+    raw = open(file_path, 'rb')
+    _advise_sequential(raw.fileno())
+    proc = None
+    try:
+        if file_path.endswith('.gz'):
+            pigz = shutil.which('pigz')
+            if pigz:
+                # pigz 与本进程共享文件描述符的偏移量，lseek 即可得到已读取的压缩字节数
+                proc = subprocess.Popen([pigz, '-dc'], stdin=raw, stdout=subprocess.PIPE)
+                stream = proc.stdout
+            elif _igzip is not None:
+                stream = _igzip.IGzipFile(fileobj=raw, mode='rb')
+            else:
+                stream = gzip.GzipFile(fileobj=raw, mode='rb')
+            fd = raw.fileno()
+            position = lambda: os.lseek(fd, 0, os.SEEK_CUR)
+        else:
+            z = zipfile.ZipFile(raw)
+            names = z.namelist()
+            if not names:
+                raise ValueError('Empty zip archive')
+            stream = z.open(names[0], 'r')
+            position = lambda: None
+        carry = b''
+        while True:
+            chunk = stream.read(slab_size)
+            if not chunk:
+                if carry:
+                    yield carry, position()
+                break
+            data = carry + chunk if carry else chunk
+            nl = data.rfind(b'\n')
+            if nl < 0:
+                carry = data
+                continue
+            carry = data[nl + 1:]
+            yield data[:nl + 1], position()
+    finally:
+        if proc is not None:
+            proc.stdout.close()
+            proc.wait()
+        raw.close()
+
+
+def _prefetch(iterable, depth: int = FANSE_PREFETCH_DEPTH) -> Iterator:
+    """在后台线程中提前迭代 iterable，最多缓存 depth 个元素（读取/解压与调用方的切分计数重叠）
+    - 生产方异常在消费方原样抛出；消费方提前结束时通知生产方停止，并由生产方线程关闭底层生成器
+    """
+    q: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not _put((item, None)):
+                    break
+            else:
+                _put((done, None))
+        except BaseException as e:
+            _put((done, e))
+        finally:
+            close = getattr(it, 'close', None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=_produce, name='fanse-prefetch', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, err = q.get()
+            if item is done:
+                if err is not None:
+                    raise err
+                return
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def fanse_ref_field_counts(file_path: str, slab_size: int = FANSE_SLAB_SIZE,
+                           on_progress: Optional[Callable[[int], None]] = None) -> Tuple[Counter, int]:
+    """字节级统计 FANSe3 文件中每种比对ID字段（记录第二行第 2 列，如 b'tx1,tx2'）出现的次数
+    修正：计数只需比对ID字段，按块 split 后直接以 bytes 计数（Counter 的 C 实现），不创建 FANSeRecord、不逐行解码；
+    解码与按逗号拆分只在不同组合上进行一次（由调用方完成）。记录有效性判断与 fanse_parser_high_performance 一致。
+
+    返回 (Counter[bytes], 有效记录数)；on_progress(已消耗字节数) 在每个数据块后调用
+    """
+    counts: Counter = Counter()
+    total = 0
+    pending = None  # 跨块的记录首行
+    # 修正：数据块由后台线程读取/解压，ISA-L/zlib 解压与 pigz 管道读取期间释放 GIL，与本线程的切分计数流水线重叠；
+    # 单块即可读完的未压缩小文件无可重叠的工作，直接在本线程读取，免去每个文件创建预读线程的开销
+    slabs = _iter_fanse_slabs(file_path, slab_size)
+    if file_path.endswith(('.gz', '.zip')) or os.path.getsize(file_path) > slab_size:
+        slabs = _prefetch(slabs)
+    for slab, consumed in slabs:
+        lines = slab.split(b'\n')
+        if slab.endswith(b'\n'):
+            lines.pop()
+        start = 0
+        if pending is not None and lines:
+            fields2 = lines[0].split(b'\t', 5)
+            if b'\t' in pending and len(fields2) >= 5:
+                counts[fields2[1]] += 1
+                total += 1
+            pending = None
+            start = 1
+        end = len(lines)
+        if (end - start) % 2:
+            end -= 1
+            pending = lines[end]
+        # 修正：逐对流式切分第二行（maxsplit=4 足以判断“至少 5 列”），不再先为整块构建全部切分结果的列表，
+        # 块内临时对象数量与峰值内存减半
+        refs = []
+        append = refs.append
+        for line1, line2 in zip(lines[start:end:2], lines[start + 1:end:2]):
+            fields2 = line2.split(b'\t', 4)
+            if len(fields2) >= 5 and b'\t' in line1:
+                append(fields2[1])
+        total += len(refs)
+        counts.update(refs)
+        if on_progress is not None and consumed is not None:
+            on_progress(consumed)
+    return counts, total
+
+
 def fanse_line_reader(file_path: str, chunk_size: int = 20000) -> Generator[List[str], None, None]:
     """
     按块读取FANSe3结果文件，返回原始行列表
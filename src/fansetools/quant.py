@@ -81,17 +81,24 @@ def build_length_maps(annotation_df: pd.DataFrame,
     return length_map, eff_length_map
 
 
+def _lengths_kb(index: pd.Index, len_map: Dict[str, float]) -> pd.Series:
+    """
+    按 index 顺序取长度（单位 kb），与 index 一一对应；缺失/None 为 NaN（与长度 0 一样由调用方当作无效长度，结果记 0）。
+    修正：以 Index.map 批量查表代替逐ID构建 dict 再转 Series；结果与 counts 共用同一索引，后续除法无需按标签重新对齐。
+    """
+    return pd.Series(index.map(len_map), index=index).astype('float64') / 1000.0
+
+
 def _compute_tpm_series(counts: pd.Series, eff_len_map: Dict[str, float]) -> pd.Series:
     """
     计算 TPM：TPM = RPK / sum(RPK) * 1e6，其中 RPK = count / (effective_length_kb)
     counts 索引为 ID（geneName 或 txname），值为计数。
     """
-    ids = counts.index.tolist()
-    eff_kb = pd.Series({i: (eff_len_map.get(i, 0.0) or 0.0) / 1000.0 for i in ids}, dtype='float64')
+    eff_kb = _lengths_kb(counts.index, eff_len_map)
     rpk = counts.astype('float64').div(eff_kb.replace(0.0, math.nan)).fillna(0.0)
     total_rpk = float(rpk.sum())
     if total_rpk <= 0:
-        return pd.Series({i: 0.0 for i in ids})
+        return pd.Series(0.0, index=counts.index)
     scale = 1e6 / total_rpk
     return rpk * scale
 
@@ -100,15 +107,14 @@ def _compute_rpkm_series(counts: pd.Series, len_map: Dict[str, float]) -> pd.Ser
     """
     计算 RPKM：RPKM = count / (length_kb) / (total_counts_millions)
     """
-    ids = counts.index.tolist()
-    length_kb = pd.Series({i: (len_map.get(i, 0.0) or 0.0) / 1000.0 for i in ids}, dtype='float64')
+    length_kb = _lengths_kb(counts.index, len_map)
     total_counts = float(counts.sum())
     denom_millions = total_counts / 1e6 if total_counts > 0 else 0.0
     rpkm = counts.astype('float64').div(length_kb.replace(0.0, math.nan)).fillna(0.0)
     if denom_millions > 0:
         rpkm = rpkm.div(denom_millions)
     else:
-        rpkm = pd.Series({i: 0.0 for i in ids})
+        rpkm = pd.Series(0.0, index=counts.index)
     return rpkm
 
 
@@ -142,13 +148,14 @@ def add_quant_columns(df: pd.DataFrame,
             continue
         counts = pd.Series(df[col].values, index=ids.values, dtype='float64')
 
+        # 修正：TPM/RPKM 结果与 counts 按位置一一对应，直接整列赋值，不再逐行以 lambda 回查
         if methods in ('tpm', 'both'):
             tpm = _compute_tpm_series(counts, eff_length_map)
-            df[f'TPM_{col}'] = ids.map(lambda i: float(tpm.get(str(i), 0.0)))
+            df[f'TPM_{col}'] = tpm.to_numpy()
 
         if methods in ('rpkm', 'both'):
             rpkm = _compute_rpkm_series(counts, length_map)
-            df[f'RPKM_{col}'] = ids.map(lambda i: float(rpkm.get(str(i), 0.0)))
+            df[f'RPKM_{col}'] = rpkm.to_numpy()
 
     return df
 
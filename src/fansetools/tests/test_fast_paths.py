@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+计数与集群调度快速路径的回归测试：
+- fanse_ref_field_counts（字节级分块扫描）与原 fanse_parser 逐条解析结果一致
+- 小 slab_size 下的多块切分、后台预读与 .gz 流式路径
+- 单块即可读完的小文件：一次 read，不启动预读线程
+- TPM/RPKM 向量化计算（含重复ID）
+- _WorkStealingQueues 作业分发
+"""
+
+import gzip
+import math
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from fansetools import parser as fanse_parser_mod
+from fansetools.parser import fanse_parser, fanse_ref_field_counts
+from fansetools.quant import add_quant_columns
+from fansetools.cluster import _WorkStealingQueues
+
+# 仓库自带的示例 FANSe3 文件（<repo>/test/）
+SAMPLE_DIR = Path(__file__).resolve().parents[3] / 'test'
+SAMPLE_FILES = [SAMPLE_DIR / 'test_R1.fanse3', SAMPLE_DIR / 'test_R2.fanse3']
+
+
+def _baseline_counts(path):
+    """原解析器的结果：按比对ID组合计数"""
+    records = list(fanse_parser(str(path)))
+    return Counter(tuple(r.ref_names) for r in records), len(records)
+
+
+def _as_id_tuples(counts):
+    return Counter({tuple(k.decode('utf-8').split(',')): v for k, v in counts.items()})
+
+
+@unittest.skipUnless(all(p.exists() for p in SAMPLE_FILES), '缺少 test/ 下的示例 FANSe3 文件')
+class RefFieldCountsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp(prefix='fanse_fast_paths_')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def test_matches_baseline_parser(self):
+        for path in SAMPLE_FILES:
+            with self.subTest(file=path.name):
+                expected, n_expected = _baseline_counts(path)
+                counts, n_records = fanse_ref_field_counts(str(path))
+                self.assertEqual(n_records, n_expected)
+                self.assertEqual(_as_id_tuples(counts), expected)
+
+    def test_small_slabs_with_prefetch(self):
+        # 块远小于文件：走 mmap 多块切分与后台预读，记录跨块时仍需完整计数
+        for path in SAMPLE_FILES:
+            expected, n_expected = _baseline_counts(path)
+            for slab_size in (64, 257, 4096):
+                with self.subTest(file=path.name, slab_size=slab_size):
+                    with mock.patch.object(fanse_parser_mod, '_prefetch', wraps=fanse_parser_mod._prefetch) as prefetch:
+                        counts, n_records = fanse_ref_field_counts(str(path), slab_size=slab_size)
+                    prefetch.assert_called_once()
+                    self.assertEqual(n_records, n_expected)
+                    self.assertEqual(_as_id_tuples(counts), expected)
+
+    def test_gzip_input_small_slabs(self):
+        path = SAMPLE_FILES[0]
+        gz_path = os.path.join(self.tmp_dir, 'sample.fanse3.gz')
+        with open(path, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        expected, n_expected = _baseline_counts(path)
+        progress = []
+        counts, n_records = fanse_ref_field_counts(gz_path, slab_size=128, on_progress=progress.append)
+        self.assertEqual(n_records, n_expected)
+        self.assertEqual(_as_id_tuples(counts), expected)
+        self.assertTrue(progress)
+        self.assertLessEqual(progress[-1], os.path.getsize(gz_path))
+
+    def test_small_file_read_without_prefetch(self):
+        # 文件不超过一个数据块：一次 read 读入，不创建预读线程
+        path = SAMPLE_FILES[1]
+        expected, n_expected = _baseline_counts(path)
+        with mock.patch.object(fanse_parser_mod, '_prefetch', side_effect=AssertionError('prefetch used')), \
+                mock.patch.object(fanse_parser_mod.mmap, 'mmap', side_effect=AssertionError('mmap used')):
+            counts, n_records = fanse_ref_field_counts(str(path))
+        self.assertEqual(n_records, n_expected)
+        self.assertEqual(_as_id_tuples(counts), expected)
+
+    def test_missing_trailing_newline_and_empty_file(self):
+        path = SAMPLE_FILES[0]
+        data = path.read_bytes().rstrip(b'\r\n')
+        no_eol = os.path.join(self.tmp_dir, 'no_eol.fanse3')
+        with open(no_eol, 'wb') as f:
+            f.write(data)
+        expected, n_expected = _baseline_counts(path)
+        for slab_size in (fanse_parser_mod.FANSE_SLAB_SIZE, 100):
+            with self.subTest(slab_size=slab_size):
+                counts, n_records = fanse_ref_field_counts(no_eol, slab_size=slab_size)
+                self.assertEqual(n_records, n_expected)
+                self.assertEqual(_as_id_tuples(counts), expected)
+
+        empty = os.path.join(self.tmp_dir, 'empty.fanse3')
+        open(empty, 'wb').close()
+        self.assertEqual(fanse_ref_field_counts(empty), (Counter(), 0))
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def test_order_and_producer_error(self):
+        self.assertEqual(list(fanse_parser_mod._prefetch(iter(range(50)), depth=2)), list(range(50)))
+
+        def failing():
+            yield 1
+            raise ValueError('boom')
+
+        it = fanse_parser_mod._prefetch(failing(), depth=1)
+        self.assertEqual(next(it), 1)
+        with self.assertRaises(ValueError):
+            next(it)
+
+    def test_early_close_stops_producer(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield b'x'
+            finally:
+                closed.set()
+
+        it = fanse_parser_mod._prefetch(endless(), depth=2)
+        next(it)
+        it.close()
+        self.assertTrue(closed.wait(2))
+
+
+class QuantColumnsTest(unittest.TestCase):
+
+    @staticmethod
+    def _reference(counts, lengths):
+        # 逐行按公式计算的参考值（长度缺失或为 0 时记 0）
+        rpk = [c / (l / 1000.0) if l else 0.0 for c, l in zip(counts, lengths)]
+        total_rpk = sum(rpk)
+        tpm = [v / total_rpk * 1e6 if total_rpk > 0 else 0.0 for v in rpk]
+        total = sum(counts)
+        rpkm = [c / (l / 1000.0) / (total / 1e6) if l and total > 0 else 0.0 for c, l in zip(counts, lengths)]
+        return tpm, rpkm
+
+    def _assert_close(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(actual, expected):
+            self.assertTrue(math.isclose(a, e, rel_tol=1e-12, abs_tol=1e-9), f'{a} != {e}')
+
+    def test_tpm_rpkm_match_formula(self):
+        df = pd.DataFrame({'Gene': ['g1', 'g2', 'g3', 'g4'], 'Final_EM': [10.0, 5.0, 3.0, 0.0]})
+        lengths = {'g1': 1000, 'g2': 2500, 'g3': 0}  # g3 长度为 0、g4 无长度：均记 0
+        res = add_quant_columns(df.copy(), id_col='Gene', count_cols=['Final_EM'],
+                                length_map=lengths, eff_length_map=lengths, methods='both')
+        tpm, rpkm = self._reference([10.0, 5.0, 3.0, 0.0], [1000, 2500, 0, None])
+        self._assert_close(res['TPM_Final_EM'].tolist(), tpm)
+        self._assert_close(res['RPKM_Final_EM'].tolist(), rpkm)
+        self.assertTrue(math.isclose(res['TPM_Final_EM'].sum(), 1e6))
+
+    def test_duplicated_ids_are_computed_per_row(self):
+        # 重复ID的每一行按本行计数计算，结果与行位置一一对应
+        df = pd.DataFrame({'Gene': ['g1', 'g2', 'g1'], 'Final_EM': [4.0, 2.0, 6.0]}, index=[10, 20, 30])
+        lengths = {'g1': 2000, 'g2': 500}
+        res = add_quant_columns(df.copy(), id_col='Gene', count_cols=['Final_EM'],
+                                length_map=lengths, eff_length_map=lengths, methods='both')
+        tpm, rpkm = self._reference([4.0, 2.0, 6.0], [2000, 500, 2000])
+        self.assertEqual(res.index.tolist(), [10, 20, 30])
+        self._assert_close(res['TPM_Final_EM'].tolist(), tpm)
+        self._assert_close(res['RPKM_Final_EM'].tolist(), rpkm)
+
+    def test_zero_total(self):
+        df = pd.DataFrame({'Gene': ['g1', 'g2'], 'Final_EM': [0.0, 0.0]})
+        res = add_quant_columns(df.copy(), id_col='Gene', count_cols=['Final_EM'],
+                                length_map={'g1': 1000}, eff_length_map={'g1': 1000}, methods='both')
+        self.assertEqual(res['TPM_Final_EM'].tolist(), [0.0, 0.0])
+        self.assertEqual(res['RPKM_Final_EM'].tolist(), [0.0, 0.0])
+
+
+class WorkStealingQueuesTest(unittest.TestCase):
+
+    def test_round_robin_local_order(self):
+        q = _WorkStealingQueues(range(6), ['a', 'b'])
+        self.assertEqual([q.get('a') for _ in range(3)], [0, 2, 4])
+        self.assertEqual(q.qsize(), 3)
+
+    def test_steal_when_local_queue_empty(self):
+        q = _WorkStealingQueues(range(8), ['a', 'b'])
+        taken_a = [q.get('a') for _ in range(4)]
+        self.assertEqual(taken_a, [0, 2, 4, 6])
+        stolen = q.get('a')
+        self.assertIn(stolen, {1, 3, 5, 7})
+        rest = []
+        while True:
+            job = q.get('b')
+            if job is None:
+                break
+            rest.append(job)
+        while True:
+            job = q.get('a')
+            if job is None:
+                break
+            rest.append(job)
+        self.assertEqual(sorted(rest + [stolen]), [1, 3, 5, 7])
+        self.assertIsNone(q.get('a'))
+        self.assertEqual(q.qsize(), 0)
+
+    def test_get_local_if_never_steals(self):
+        q = _WorkStealingQueues(range(3), ['a', 'b'])  # a: [0, 2]，b: [1]
+        self.assertIsNone(q.get_local_if('a', lambda job: job % 2 == 1))
+        self.assertEqual(q.get_local_if('a', lambda job: job == 0), 0)
+        self.assertEqual(q.get_local_if('a', lambda job: True), 2)
+        self.assertIsNone(q.get_local_if('a', lambda job: True))  # 本地为空时不窃取 b 的作业
+        self.assertEqual(q.qsize(), 1)
+
+    def test_concurrent_consumers_get_each_job_once(self):
+        owners = ['n1', 'n2', 'n3', 'n4']
+        q = _WorkStealingQueues(range(2000), owners)
+        taken = {n: [] for n in owners}
+
+        def consume(owner):
+            while True:
+                job = q.get(owner)
+                if job is None:
+                    return
+                taken[owner].append(job)
+
+        threads = [threading.Thread(target=consume, args=(n,)) for n in owners]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        all_jobs = [job for jobs in taken.values() for job in jobs]
+        self.assertEqual(sorted(all_jobs), list(range(2000)))
+
+
+if __name__ == '__main__':
+    unittest.main()
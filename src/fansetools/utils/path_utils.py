@@ -1,6 +1,7 @@
 # fansetools/utils/path_utils.py
 import os
 import glob
+import stat
 import logging
 from pathlib import Path
 from typing import List, Dict, Optional, Union, Tuple
@@ -54,6 +55,21 @@ class PathProcessor:
             
         input_items = [item.strip() for item in input_str.split(',') if item.strip()]
         input_paths = []
+        # 修正：扩展名只转换一次为小写元组，匹配时单次 endswith；每个候选路径只做一次 os.stat
+        exts = self._ext_tuple(valid_extensions)
+
+        def _add_path(p: Path) -> bool:
+            try:
+                st = os.stat(p)
+            except OSError:
+                return False
+            if stat.S_ISREG(st.st_mode):
+                if exts is None or p.name.lower().endswith(exts):
+                    input_paths.append(p)
+            elif stat.S_ISDIR(st.st_mode):
+                # 目录：添加目录下所有有效文件
+                self._add_directory_files(p, input_paths, valid_extensions)
+            return True
         
         for item in input_items:
             # 移除可能包裹在路径两端的引号
@@ -72,27 +88,11 @@ class PathProcessor:
                         self.logger.warning(f"未找到匹配的文件: {item}") if self.logger else None
                         continue
                     for mp in matched_paths:
-                        p = self._normalize_path(mp)
-                        if p.exists():
-                            if p.is_file():
-                                if self._is_valid_extension(p, valid_extensions):
-                                    input_paths.append(p)
-                            elif p.is_dir():
-                                # 目录：添加目录下所有有效文件
-                                self._add_directory_files(p, input_paths, valid_extensions)
-                        else:
+                        if not _add_path(self._normalize_path(mp)):
                             self.logger.warning(f"路径不存在: {mp}") if self.logger else None
                 else:
                     # 没有通配符，直接处理路径
-                    p = self._normalize_path(item)
-                    if p.exists():
-                        if p.is_file():
-                            if self._is_valid_extension(p, valid_extensions):
-                                input_paths.append(p)
-                        elif p.is_dir():
-                            # 目录：添加目录下所有有效文件
-                            self._add_directory_files(p, input_paths, valid_extensions)
-                    else:
+                    if not _add_path(self._normalize_path(item)):
                         self.logger.warning(f"路径不存在: {item}") if self.logger else None
             except Exception as e:
                 error_msg = f"解析输入路径失败: {item} - {str(e)}"
@@ -104,6 +104,13 @@ class PathProcessor:
         # 去重并保持顺序
         return list(OrderedDict.fromkeys(input_paths))
     
+    @staticmethod
+    def _ext_tuple(valid_extensions: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+        """扩展名列表转为小写元组（None 表示接受所有文件）"""
+        if valid_extensions is None:
+            return None
+        return tuple(ext.lower() for ext in valid_extensions)
+
     def _is_valid_extension(self, path: Path, valid_extensions: List[str]) -> bool:
         """检查文件扩展名是否有效"""
         if valid_extensions is None:
@@ -111,14 +118,17 @@ class PathProcessor:
             
         # 使用 endswith 检查，支持任意复杂的后缀（如 .counts_gene_level_unique.csv）
         # 这种方式比 pathlib.suffixes 更灵活，且保持向下兼容
-        name_lower = path.name.lower()
-        return any(name_lower.endswith(ext.lower()) for ext in valid_extensions)
+        return path.name.lower().endswith(self._ext_tuple(valid_extensions))
     
     def _add_directory_files(self, directory: Path, file_list: List[Path], valid_extensions: List[str]):
-        """将目录下的有效文件添加到文件列表"""
-        for file_path in directory.iterdir():
-            if file_path.is_file() and self._is_valid_extension(file_path, valid_extensions):
-                file_list.append(file_path)
+        """将目录下的有效文件添加到文件列表
+        修正：os.scandir 一次遍历，文件类型取自目录项（多数文件系统无需逐个 stat）
+        """
+        exts = self._ext_tuple(valid_extensions)
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and (exts is None or entry.name.lower().endswith(exts)):
+                    file_list.append(directory / entry.name)
     
     def generate_output_mapping(self, input_paths: List[Path], 
                                output_path: Optional[Union[str, Path]] = None,